@@ -0,0 +1,82 @@
+"""
+Benchmark the in-memory compression methods of Mesh.compress():
+the original 'lz4' (which compresses the raw arrays twice) vs. 'delta-lz4' and 'delta-zstd',
+with and without vertex quantization.
+
+For each method, reports the compressed size (and ratio), and the time to compress and decompress.
+
+The test mesh is a smoothed, noisy sphere, generated from a label volume of width --size.
+
+Example Usage:
+
+    python benchmarks/bench_compression.py --size 256
+"""
+import time
+import argparse
+
+import numpy as np
+
+from vol2mesh import Mesh
+from vol2mesh.compression import _zstd_available
+
+
+def sphere_mesh(size, seed=0):
+    rng = np.random.default_rng(seed)
+    coords = np.indices((size,)*3) - size//2
+    radius = size//2 - 2
+    dist = np.sqrt((coords**2).sum(axis=0)) + rng.normal(scale=0.5, size=(size,)*3)
+    vol = (dist < radius).astype(np.uint64)
+    mesh = Mesh.from_label_volume(vol, [(0,0,0), (size,)*3], method='multilabel')[1]
+    mesh.laplacian_smooth(2)
+    return mesh
+
+
+def measure(mesh, method, quantization_step, repeats):
+    """
+    Return (compressed_size, compress_seconds, decompress_seconds), the best of N runs.
+    """
+    best_compress = best_decompress = np.inf
+    for _ in range(repeats):
+        m = Mesh(mesh.vertices_zyx, mesh.faces, mesh.normals_zyx)
+        start = time.perf_counter()
+        if quantization_step:
+            size = m.compress(method, quantization_step)
+        else:
+            size = m.compress(method)
+        best_compress = min(best_compress, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        m._uncompress()
+        best_decompress = min(best_decompress, time.perf_counter() - start)
+    return size, best_compress, best_decompress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=256, help='Width of the label volume')
+    parser.add_argument('--quantization-step', type=float, default=1/16)
+    parser.add_argument('--repeats', type=int, default=3, help='Report the best of N runs')
+    args = parser.parse_args()
+
+    mesh = sphere_mesh(args.size)
+    raw_size = mesh.uncompressed_size()
+    print(f"Mesh: {len(mesh.vertices_zyx):,} vertices, {len(mesh.faces):,} faces, {raw_size / 2**20:.1f} MiB")
+
+    configs = [('lz4', None), ('delta-lz4', None), ('delta-lz4', args.quantization_step)]
+    if _zstd_available:
+        configs += [('delta-zstd', None), ('delta-zstd', args.quantization_step)]
+
+    # Trigger compilation before timing
+    small_mesh = Mesh(mesh.vertices_zyx[:100], mesh.faces[:10], mesh.normals_zyx[:100])
+    small_mesh.compress('delta-lz4')
+    small_mesh._uncompress()
+
+    print(f"{'method':>24} {'MiB':>7} {'ratio':>6} {'compress':>9} {'decompress':>11}")
+    for method, step in configs:
+        size, t_compress, t_decompress = measure(mesh, method, step, args.repeats)
+        name = method if step is None else f"{method} (q={step:g})"
+        print(f"{name:>24} {size / 2**20:7.2f} {raw_size / size:6.2f} {t_compress:8.3f}s {t_decompress:10.3f}s")
+
+
+if __name__ == "__main__":
+    main()
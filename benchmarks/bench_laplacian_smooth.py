@@ -0,0 +1,83 @@
+"""
+Benchmark the Laplacian smoothing engines in vol2mesh.smoothing
+against the original np.add.at() implementation.
+
+The test mesh is a noisy triangulated height-field with (--size)^2 vertices.
+
+Example Usage:
+
+    python benchmarks/bench_laplacian_smooth.py --size 2000 --iterations 5
+    python benchmarks/bench_laplacian_smooth.py --size 2000 --iterations 5 --mode taubin
+"""
+import time
+import argparse
+
+import numpy as np
+
+from vol2mesh.smoothing import laplacian_smooth, vertex_adjacency, _numba_available, _scipy_available
+
+
+def grid_mesh(size, seed=0):
+    """
+    Return (vertices_zyx, faces) for a noisy size x size height-field.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[:size, :size].astype(np.float32)
+    z = rng.normal(size=(size, size)).astype(np.float32)
+    vertices_zyx = np.stack((z, y, x), axis=-1).reshape(-1, 3)
+
+    ids = np.arange(size*size, dtype=np.uint32).reshape(size, size)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    faces = np.concatenate((np.stack((a, c, b), axis=1),
+                            np.stack((b, c, d), axis=1)))
+    return vertices_zyx, faces
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2000, help='Grid width (the mesh has size^2 vertices)')
+    parser.add_argument('--iterations', type=int, default=5)
+    parser.add_argument('--mode', choices=['laplacian', 'taubin', 'cotangent'], default='laplacian')
+    args = parser.parse_args()
+
+    vertices_zyx, faces = grid_mesh(args.size)
+    print(f"Mesh: {len(vertices_zyx):,} vertices, {len(faces):,} faces, {args.iterations} {args.mode} iterations")
+
+    t = time.perf_counter()
+    vertex_adjacency(faces, len(vertices_zyx))
+    print(f"{'(adjacency only)':>16}: {time.perf_counter() - t:7.2f}s")
+
+    engines = ['add.at']
+    if _scipy_available:
+        engines.append('csr')
+    if _numba_available:
+        # Trigger compilation before timing
+        laplacian_smooth(*grid_mesh(3), 1, engine='numba', mode=args.mode)
+        engines.append('numba')
+
+    timings = {}
+    single_timings = {}
+    results = {}
+    for engine in engines:
+        t = time.perf_counter()
+        laplacian_smooth(vertices_zyx, faces, 1, engine=engine, mode=args.mode)
+        single_timings[engine] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        results[engine] = laplacian_smooth(vertices_zyx, faces, args.iterations, engine=engine, mode=args.mode)
+        timings[engine] = time.perf_counter() - t
+
+    # Per-iteration cost, excluding the one-time setup
+    per_iteration = {k: max(timings[k] - single_timings[k], 0) / max(args.iterations - 1, 1) for k in engines}
+
+    for engine in engines:
+        speedup = timings['add.at'] / timings[engine]
+        iteration_speedup = per_iteration['add.at'] / max(per_iteration[engine], 1e-9)
+        max_diff = np.abs(results[engine] - results['add.at']).max()
+        print(f"{engine:>16}: {timings[engine]:7.2f}s total ({speedup:5.1f}x), "
+              f"{per_iteration[engine]:6.3f}s/iteration ({iteration_speedup:5.1f}x)  max diff: {max_diff:.2g}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark the normals implementations in vol2mesh.normals.
+
+Compares the original combination (chunked numpy face normals + serial numba vertex normals)
+against the parallel numba kernels, which are used by default if numba is available.
+The parallel kernels use os.cpu_count() threads.
+
+Also compares the pure-numpy implementations, which are used if numba is not available:
+vertex normals accumulated via np.bincount() vs. the original np.add.at().
+
+The test mesh is a noisy triangulated height-field with (--size)^2 vertices.
+
+Example Usage:
+
+    python benchmarks/bench_normals.py --size 2000
+"""
+import os
+import time
+import argparse
+
+import numpy as np
+
+from vol2mesh.normals import (compute_face_normals_numpy_chunked, compute_vertex_normals_numba, compute_vertex_normals_parallel,
+                              compute_vertex_normals_numpy, compute_vertex_normals_numpy_add_at)
+
+
+def grid_mesh(size, seed=0):
+    """
+    Return (vertices_zyx, faces) for a noisy size x size height-field.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[:size, :size].astype(np.float32)
+    z = rng.normal(size=(size, size)).astype(np.float32)
+    vertices_zyx = np.stack((z, y, x), axis=-1).reshape(-1, 3)
+
+    ids = np.arange(size*size, dtype=np.uint32).reshape(size, size)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    faces = np.concatenate((np.stack((a, c, b), axis=1),
+                            np.stack((b, c, d), axis=1)))
+    return vertices_zyx, faces
+
+
+def original(vertices_zyx, faces):
+    face_normals = compute_face_normals_numpy_chunked(vertices_zyx, faces, True)
+    return compute_vertex_normals_numba(vertices_zyx, faces, False, face_normals)
+
+
+def parallel(vertices_zyx, faces):
+    return compute_vertex_normals_parallel(vertices_zyx, faces, False)
+
+
+def parallel_fused(vertices_zyx, faces):
+    return compute_vertex_normals_parallel(vertices_zyx, faces, False, fused=True)
+
+
+def numpy_bincount(vertices_zyx, faces):
+    return compute_vertex_normals_numpy(vertices_zyx, faces, False)
+
+
+def numpy_add_at(vertices_zyx, faces):
+    return compute_vertex_normals_numpy_add_at(vertices_zyx, faces, False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=2000, help='Grid width (the mesh has size^2 vertices)')
+    parser.add_argument('--repeats', type=int, default=3, help='Report the best of N runs')
+    args = parser.parse_args()
+
+    vertices_zyx, faces = grid_mesh(args.size)
+    print(f"Mesh: {len(vertices_zyx):,} vertices, {len(faces):,} faces, {os.cpu_count()} threads")
+
+    implementations = {
+        'original': original,
+        'parallel': parallel,
+        'parallel (fused)': parallel_fused,
+        'numpy (bincount)': numpy_bincount,
+        'numpy (np.add.at)': numpy_add_at,
+    }
+
+    # Trigger compilation before timing
+    for f in implementations.values():
+        f(*grid_mesh(3))
+
+    results = {}
+    timings = {}
+    for name, f in implementations.items():
+        best = np.inf
+        for _ in range(args.repeats):
+            t = time.perf_counter()
+            results[name] = f(vertices_zyx, faces)
+            best = min(best, time.perf_counter() - t)
+        timings[name] = best
+        print(f"{name:>19}: {best:7.3f}s ({timings['original'] / best:4.1f}x)")
+
+    for name, normals in results.items():
+        assert np.allclose(normals, results['original'], atol=1e-5), f"{name} disagrees with the original"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark the OBJ parsing engines in vol2mesh.obj_utils.read_obj():
+the compiled (numba) line scanner vs. the original regex + pandas.read_csv() implementation.
+
+The test mesh is a noisy triangulated height-field with (--size)^2 vertices,
+written with normals (i.e. with 'f a//a b//b c//c' face records).
+
+Example Usage:
+
+    python benchmarks/bench_read_obj.py --size 1000 --repeats 3
+"""
+import time
+import argparse
+
+import numpy as np
+
+from vol2mesh.obj_utils import read_obj, write_obj, _numba_available
+
+
+def grid_mesh(size, seed=0):
+    """
+    Return (vertices_xyz, faces, normals_xyz) for a noisy size x size height-field.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[:size, :size].astype(np.float32)
+    z = rng.normal(size=(size, size)).astype(np.float32)
+    vertices_xyz = np.stack((x, y, z), axis=-1).reshape(-1, 3)
+
+    normals_xyz = rng.normal(size=vertices_xyz.shape).astype(np.float32)
+    normals_xyz /= np.linalg.norm(normals_xyz, axis=1)[:, None]
+
+    ids = np.arange(size*size, dtype=np.uint32).reshape(size, size)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    faces = np.concatenate((np.stack((a, c, b), axis=1),
+                            np.stack((b, c, d), axis=1)))
+    return vertices_xyz, faces, normals_xyz
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='Grid width (the mesh has size^2 vertices)')
+    parser.add_argument('--repeats', type=int, default=3, help='Report the best of N runs')
+    args = parser.parse_args()
+
+    obj = write_obj(*grid_mesh(args.size))
+    print(f"OBJ: {len(obj) / 2**20:.1f} MiB, {args.size**2:,} vertices, {2*(args.size-1)**2:,} faces")
+
+    engines = ['pandas']
+    if _numba_available:
+        # Trigger compilation before timing
+        read_obj(write_obj(*grid_mesh(3)), engine='numba')
+        engines.append('numba')
+
+    results = {}
+    timings = {}
+    for engine in engines:
+        best = np.inf
+        for _ in range(args.repeats):
+            t = time.perf_counter()
+            results[engine] = read_obj(obj, engine=engine)
+            best = min(best, time.perf_counter() - t)
+        timings[engine] = best
+        print(f"{engine:>8}: {best:7.2f}s ({len(obj) / 2**20 / best:6.1f} MiB/s)")
+
+    if 'numba' in results:
+        for a, b in zip(results['pandas'], results['numba']):
+            assert (a == b).all(), "Engines disagree!"
+        print(f"Speedup: {timings['pandas'] / timings['numba']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
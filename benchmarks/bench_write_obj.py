@@ -0,0 +1,100 @@
+"""
+Benchmark vol2mesh.obj_utils.write_obj() (which formats the mesh in fixed-size chunks)
+against the original implementation, which formats the entire mesh in one giant string.
+
+Reports the runtime and the peak Python memory usage (via tracemalloc) of each,
+and verifies that both produce identical output.
+
+Example Usage:
+
+    python benchmarks/bench_write_obj.py --size 1000
+"""
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+from vol2mesh.obj_utils import write_obj
+
+
+def grid_mesh(size, seed=0):
+    """
+    Return (vertices_xyz, faces, normals_xyz) for a noisy size x size height-field.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[:size, :size].astype(np.float32)
+    z = rng.normal(size=(size, size)).astype(np.float32)
+    vertices_xyz = np.stack((x, y, z), axis=-1).reshape(-1, 3)
+
+    normals_xyz = rng.normal(size=vertices_xyz.shape).astype(np.float32)
+    normals_xyz /= np.linalg.norm(normals_xyz, axis=1)[:, None]
+
+    ids = np.arange(size*size, dtype=np.uint32).reshape(size, size)
+    a, b = ids[:-1, :-1].ravel(), ids[:-1, 1:].ravel()
+    c, d = ids[1:, :-1].ravel(), ids[1:, 1:].ravel()
+    faces = np.concatenate((np.stack((a, c, b), axis=1),
+                            np.stack((b, c, d), axis=1)))
+    return vertices_xyz, faces, normals_xyz
+
+
+def write_obj_original(vertices_xyz, faces, normals_xyz):
+    """
+    The original (unchunked) implementation of _write_obj().
+    """
+    mesh_bytestream = BytesIO()
+    mesh_bytestream.write(b"# OBJ file\n")
+    mesh_bytestream.write(("v {:.7g} {:.7g} {:.7g}\n" * len(vertices_xyz)).format(*vertices_xyz.ravel()).encode('utf-8'))
+    if len(normals_xyz) > 0:
+        mesh_bytestream.write(("vn {:.7g} {:.7g} {:.7g}\n" * len(normals_xyz)).format(*normals_xyz.ravel()).encode('utf-8'))
+
+    faces = faces + 1
+    if len(normals_xyz) > 0:
+        faces = as_strided(faces, faces.shape + (2,), faces.strides + (0,), writeable=False)
+        mesh_bytestream.write(("f {}//{} {}//{} {}//{}\n" * len(faces)).format(*faces.flat).encode('utf-8'))
+    else:
+        mesh_bytestream.write(("f {} {} {}\n" * len(faces)).format(*faces.ravel()).encode('utf-8'))
+    return mesh_bytestream.getvalue()
+
+
+def measure(f, *args):
+    """
+    Return (result, seconds, peak_bytes) for f(*args).
+    The output buffer itself is included in the peak.
+    """
+    tracemalloc.start()
+    t = time.perf_counter()
+    result = f(*args)
+    elapsed = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1000, help='Grid width (the mesh has size^2 vertices)')
+    parser.add_argument('--no-normals', action='store_true')
+    args = parser.parse_args()
+
+    vertices_xyz, faces, normals_xyz = grid_mesh(args.size)
+    if args.no_normals:
+        normals_xyz = np.zeros((0, 3), np.float32)
+    print(f"Mesh: {len(vertices_xyz):,} vertices, {len(faces):,} faces, {len(normals_xyz):,} normals")
+
+    original, original_time, original_peak = measure(write_obj_original, vertices_xyz, faces, normals_xyz)
+    print(f"original: {original_time:7.2f}s, peak memory {original_peak / 2**20:8.1f} MiB")
+    del original
+
+    chunked, chunked_time, chunked_peak = measure(write_obj, vertices_xyz, faces, normals_xyz)
+    print(f" chunked: {chunked_time:7.2f}s, peak memory {chunked_peak / 2**20:8.1f} MiB")
+    print(f"(Output size: {len(chunked) / 2**20:.1f} MiB)")
+
+    assert write_obj_original(vertices_xyz, faces, normals_xyz) == chunked, "Outputs differ!"
+    print(f"Speedup: {original_time / chunked_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,3 @@
-from .mesh import Mesh, concatenate_meshes
+from .mesh import Mesh, concatenate_meshes, concatenate_meshes_to_disk, simplify_meshes
 from .mesh_from_array import mesh_from_array
+from .pipeline import Pipeline
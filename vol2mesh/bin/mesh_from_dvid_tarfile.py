@@ -38,17 +38,19 @@ def main():
                         help='Multiply by this factor before writing the mesh '
                         '(e.g. ngmesh should be written at 1-nm resolution, so you should '
                         'probably rescale by 8 for FlyEM FIBSEM data.)')
+    parser.add_argument('--workers', '-w', type=int, default=None,
+                        help='How many threads to use when decoding the supervoxel meshes.')
     parser.add_argument('server')
     parser.add_argument('uuid')
     parser.add_argument('tarsupervoxels_instance')
     parser.add_argument('body', nargs='+')
     args = parser.parse_args()
 
-    mesh_from_dvid_tarfile(args.server, args.uuid, args.tarsupervoxels_instance, args.body, args.simplify, args.drop_normals, args.rescale_factor, args.output_path)
+    mesh_from_dvid_tarfile(args.server, args.uuid, args.tarsupervoxels_instance, args.body, args.simplify, args.drop_normals, args.rescale_factor, args.output_path, args.workers)
     logger.info("DONE")
 
 
-def mesh_from_dvid_tarfile(server, uuid, tsv_instance, bodies, simplify=1.0, drop_normals=False, rescale_factor=1.0, output_path='{body}.obj'):
+def mesh_from_dvid_tarfile(server, uuid, tsv_instance, bodies, simplify=1.0, drop_normals=False, rescale_factor=1.0, output_path='{body}.obj', workers=None):
     from neuclease.dvid import fetch_tarfile
 
     for body in bodies:
@@ -56,7 +58,7 @@ def mesh_from_dvid_tarfile(server, uuid, tsv_instance, bodies, simplify=1.0, dro
         tar_bytes = fetch_tarfile(server, uuid, tsv_instance, body)
 
         logger.info(f"Body {body}: Loading mesh")
-        mesh = Mesh.from_tarfile(tar_bytes)
+        mesh = Mesh.from_tarfile(tar_bytes, workers=workers)
 
         if simplify != 1.0:
             logger.info(f"Body {body}: Simplifying")
@@ -68,6 +70,7 @@ def mesh_from_dvid_tarfile(server, uuid, tsv_instance, bodies, simplify=1.0, dro
         if rescale_factor != 1.0:
             logger.info(f"Body {body}: Scaling by {rescale_factor}x")
             mesh.vertices_zyx[:] *= rescale_factor
+            mesh.invalidate_caches()
 
         p = output_path.format(body=body)
         logger.info(f"Body {body}: Serializing to {p}")
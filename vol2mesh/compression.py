@@ -0,0 +1,343 @@
+"""
+Compact in-memory encoding of mesh arrays, for Mesh.compress('delta-lz4') and Mesh.compress('delta-zstd').
+
+Raw float32 vertices and uint32 face indices compress poorly as-is.
+Before compression, we transform them into streams that compress much better:
+
+- faces: Each face is rotated (preserving its winding) so its lowest vertex ID comes first,
+  and the faces are sorted by that first vertex.  Then the first column is delta-encoded,
+  and the other two columns are stored relative to the first column.
+  (All of those deltas are non-negative and mostly small.)
+- vertices and normals: The bytes of each float column are "shuffled" into separate planes
+  (all the sign/exponent bytes together, etc.), which are far more repetitive than the interleaved bytes.
+- Optionally (lossy), the vertices are quantized to a grid (e.g. 1/16 voxel) and delta-encoded.
+  The signed deltas are zigzag-encoded, so small magnitudes become small unsigned values.
+  In that case, the normals are also quantized, to int16 (a precision of about 3e-5).
+
+All streams are byte-shuffled and then compressed in a single lz4 or zstd frame.
+
+Note:
+    The encoding is lossless for the mesh geometry, but it does not preserve the
+    order of the faces, or which corner of each face is listed first.
+"""
+import struct
+
+import numpy as np
+import lz4.frame
+
+try:
+    import zstandard
+    _zstd_available = True
+except ImportError:
+    _zstd_available = False
+
+try:
+    import numba
+    _numba_available = True
+except ImportError:
+    _numba_available = False
+
+CODECS = ('lz4', 'zstd')
+ZSTD_LEVEL = 3
+
+# magic, version, codec, flags, num_vertices, num_normals, num_faces, quantization_step
+_HEADER = struct.Struct('<4sBBBxQQQd')
+_MAGIC = b'VMDZ'
+_VERSION = 1
+_QUANTIZED = 1
+_NORMAL_SCALE = 2**15 - 1
+
+
+def encode_mesh_arrays(vertices_zyx, normals_zyx, faces, codec='lz4', quantization_step=None):
+    """
+    Encode and compress the given mesh arrays into a single bytes object.
+
+    Args:
+        vertices_zyx:
+            ndarray (N,3), float32
+        normals_zyx:
+            ndarray (N,3) or (0,3), float32
+        faces:
+            ndarray (M,3), integer
+        codec:
+            Either 'lz4' or 'zstd' (which requires the ``zstandard`` package).
+            zstd is slower than lz4, but produces smaller results.
+        quantization_step:
+            If given, the vertices are rounded to the nearest multiple of this value
+            (e.g. 1/16, in units of voxels), and the normals are stored with 16 bits per component.
+            That's lossy, but much more compact.
+            By default, the vertices and normals are stored exactly.
+
+    Returns:
+        bytes
+    """
+    assert codec in CODECS, f"Unknown codec: {codec}"
+    assert len(vertices_zyx) < 2**31, "Too many vertices to encode"
+
+    streams = []
+    flags = 0
+    if quantization_step:
+        flags |= _QUANTIZED
+        streams.append(_encode_quantized_vertices(vertices_zyx, quantization_step))
+        streams.append(_shuffle_columns(_quantize_normals(normals_zyx)))
+    else:
+        streams.append(_shuffle_columns(vertices_zyx.astype(np.float32, copy=False)))
+        streams.append(_shuffle_columns(normals_zyx.astype(np.float32, copy=False)))
+        quantization_step = 0.0
+
+    streams.append(_encode_faces(faces))
+
+    header = _HEADER.pack(_MAGIC, _VERSION, CODECS.index(codec), flags,
+                          len(vertices_zyx), len(normals_zyx), len(faces), quantization_step)
+    return header + _compress(b''.join(streams), codec)
+
+
+def decode_mesh_arrays(encoded):
+    """
+    Decode the result of encode_mesh_arrays().
+
+    Returns:
+        (vertices_zyx, normals_zyx, faces)
+    """
+    magic, version, codec_index, flags, nv, nn, nf, quantization_step = _HEADER.unpack_from(encoded)
+    if magic != _MAGIC or version != _VERSION:
+        raise RuntimeError("Not an encoded mesh (or an unsupported version)")
+
+    quantized = bool(flags & _QUANTIZED)
+    buf = memoryview(_decompress(memoryview(encoded)[_HEADER.size:], CODECS[codec_index]))
+    vertex_bytes, normal_bytes, face_bytes = 12*nv, (6 if quantized else 12)*nn, 12*nf
+    if len(buf) != vertex_bytes + normal_bytes + face_bytes:
+        raise RuntimeError("Encoded mesh is corrupt: unexpected decompressed size")
+
+    vertices_buf = buf[:vertex_bytes]
+    normals_buf = buf[vertex_bytes:vertex_bytes+normal_bytes]
+    faces_buf = buf[vertex_bytes+normal_bytes:]
+
+    if quantized:
+        vertices_zyx = _decode_quantized_vertices(vertices_buf, nv, quantization_step)
+        normals_zyx = _unshuffle_columns(normals_buf, nn, np.int16) / np.float32(_NORMAL_SCALE)
+    else:
+        vertices_zyx = _unshuffle_columns(vertices_buf, nv, np.float32)
+        normals_zyx = _unshuffle_columns(normals_buf, nn, np.float32)
+    faces = _decode_faces(faces_buf, nf)
+    return vertices_zyx, normals_zyx, faces
+
+
+def encoded_array_counts(encoded):
+    """
+    Return (num_vertices, num_normals, num_faces) without decoding the mesh.
+    """
+    _magic, _version, _codec, _flags, nv, nn, nf, _step = _HEADER.unpack_from(encoded)
+    return (nv, nn, nf)
+
+
+def canonicalize_faces(faces):
+    """
+    Rotate each face so that its lowest vertex ID comes first (preserving its winding),
+    and sort the faces by their first vertex (stable).
+    """
+    faces = np.asarray(faces)
+    if len(faces) == 0:
+        return faces.copy()
+    first = np.argmin(faces, axis=1)
+    corners = (first[:, None] + np.arange(3)) % 3
+    faces = np.take_along_axis(faces, corners, axis=1)
+    return faces[np.argsort(faces[:, 0], kind='stable')]
+
+
+def _encode_faces(faces):
+    if _numba_available and len(faces) > 0:
+        # Same result as below, but via a counting sort, in two passes over the faces,
+        # writing the shuffled bytes directly.
+        num_vertices = int(faces.max()) + 1
+        return _encode_faces_numba(np.ascontiguousarray(faces), num_vertices).tobytes()
+
+    faces = canonicalize_faces(faces).astype(np.int64)
+    deltas = np.empty((3, len(faces)), np.int64)
+    deltas[0] = np.diff(faces[:, 0], prepend=0)
+    deltas[1] = faces[:, 1] - faces[:, 0]
+    deltas[2] = faces[:, 2] - faces[:, 0]
+    return _shuffle_columns(deltas.astype(np.uint32).T)
+
+
+def _decode_faces(buf, num_faces):
+    if _numba_available:
+        # Same result as below, but in a single pass over the shuffled bytes.
+        return _decode_faces_numba(_planes(buf, num_faces, np.uint32))
+
+    deltas = _unshuffle_columns(buf, num_faces, np.uint32).T
+    faces = np.empty((num_faces, 3), np.uint32)
+    np.cumsum(deltas[0], out=faces[:, 0])
+    np.add(faces[:, 0], deltas[1], out=faces[:, 1])
+    np.add(faces[:, 0], deltas[2], out=faces[:, 2])
+    return faces
+
+
+def _encode_quantized_vertices(vertices_zyx, quantization_step):
+    q = np.round(vertices_zyx / quantization_step).astype(np.int64)
+    deltas = np.diff(q, axis=0, prepend=np.zeros((1, 3), np.int64))
+    if len(deltas) and np.abs(deltas).max() >= 2**31:
+        raise RuntimeError("quantization_step is too small for this mesh's coordinates")
+    return _shuffle_columns(_zigzag(deltas))
+
+
+def _decode_quantized_vertices(buf, num_vertices, quantization_step):
+    if _numba_available:
+        # Same result as below, but in a single pass over the shuffled bytes.
+        return _decode_quantized_vertices_numba(_planes(buf, num_vertices, np.uint32), quantization_step)
+
+    deltas = _unzigzag(_unshuffle_columns(buf, num_vertices, np.uint32))
+    return (np.cumsum(deltas, axis=0) * quantization_step).astype(np.float32)
+
+
+def _quantize_normals(normals_zyx):
+    normals_zyx = np.clip(normals_zyx, -1, 1)
+    return np.round(normals_zyx * _NORMAL_SCALE).astype(np.int16)
+
+
+def _zigzag(a):
+    """
+    Map signed int64 values to uint32, such that small magnitudes yield small values:
+    0, -1, 1, -2, 2, ... -> 0, 1, 2, 3, 4, ...
+    (The values must be in the range of int32.)
+    """
+    return ((a << 1) ^ (a >> 63)).astype(np.uint32)
+
+
+def _unzigzag(z):
+    z = z.astype(np.int64)
+    return (z >> 1) ^ -(z & 1)
+
+
+def _shuffle_columns(a):
+    """
+    Given an array (N,K), return a bytes object in which each column's bytes
+    are grouped into planes: all first bytes of column 0, all second bytes of column 0, etc.
+    """
+    assert a.ndim == 2
+    n, k = a.shape
+    planes = np.empty((k, a.dtype.itemsize, n), np.uint8)
+    planes.transpose(2, 0, 1)[:] = np.ascontiguousarray(a).view(np.uint8).reshape(n, k, a.dtype.itemsize)
+    return planes.tobytes()
+
+
+def _unshuffle_columns(buf, n, dtype):
+    """
+    Inverse of _shuffle_columns(), for an array (n,3).
+    """
+    itemsize = np.dtype(dtype).itemsize
+    planes = _planes(buf, n, dtype)
+    a = np.empty((n, 3), dtype)
+    a.view(np.uint8).reshape(n, 3, itemsize)[:] = planes.transpose(2, 0, 1)
+    return a
+
+
+def _planes(buf, n, dtype):
+    """
+    View the output of _shuffle_columns() (for an array (n,3)) as byte planes (3, itemsize, n).
+    """
+    return np.frombuffer(buf, np.uint8).reshape(3, np.dtype(dtype).itemsize, n)
+
+
+def _compress(data, codec):
+    if codec == 'zstd':
+        if not _zstd_available:
+            raise RuntimeError("Can't use zstd compression: the zstandard package is not installed.")
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return lz4.frame.compress(data)
+
+
+def _decompress(data, codec):
+    if codec == 'zstd':
+        if not _zstd_available:
+            raise RuntimeError("Can't decompress zstd data: the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return lz4.frame.decompress(data)
+
+
+if _numba_available:
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _encode_faces_numba(faces, num_vertices):
+        """
+        Equivalent to the numpy implementation in _encode_faces(),
+        but without sorting.
+        Returns the shuffled bytes of the deltas as an array (3,4,M), uint8.
+        """
+        # Count the faces by their lowest vertex, to find each group's start
+        starts = np.zeros(num_vertices + 1, np.int64)
+        for i in range(len(faces)):
+            lowest = min(faces[i, 0], faces[i, 1], faces[i, 2])
+            starts[lowest + 1] += 1
+        for v in range(num_vertices):
+            starts[v + 1] += starts[v]
+
+        # Rotate each face and place it in sorted position.
+        # (Ties are resolved like np.argmin(), i.e. the first lowest corner.)
+        deltas = np.empty((3, len(faces)), np.uint32)
+        for i in range(len(faces)):
+            a, b, c = np.int64(faces[i, 0]), np.int64(faces[i, 1]), np.int64(faces[i, 2])
+            if a <= b and a <= c:
+                f0, f1, f2 = a, b, c
+            elif b <= c:
+                f0, f1, f2 = b, c, a
+            else:
+                f0, f1, f2 = c, a, b
+            j = starts[f0]
+            starts[f0] += 1
+            deltas[0, j] = f0
+            deltas[1, j] = f1 - f0
+            deltas[2, j] = f2 - f0
+
+        # The first column is sorted, so its deltas are non-negative.
+        prev = 0
+        for j in range(len(faces)):
+            f0 = np.int64(deltas[0, j])
+            deltas[0, j] = f0 - prev
+            prev = f0
+
+        # Shuffle the bytes into planes (little-endian)
+        planes = np.empty((3, 4, len(faces)), np.uint8)
+        for k in range(3):
+            for b in range(4):
+                for j in range(len(faces)):
+                    planes[k, b, j] = (deltas[k, j] >> (8*b)) & 0xFF
+        return planes
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _unshuffle_uint32(planes, k, i):
+        return (np.uint32(planes[k, 0, i])
+                | (np.uint32(planes[k, 1, i]) << 8)
+                | (np.uint32(planes[k, 2, i]) << 16)
+                | (np.uint32(planes[k, 3, i]) << 24))
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _decode_faces_numba(planes):
+        """
+        Equivalent to the numpy implementation in _decode_faces(),
+        reading the shuffled bytes (3,4,M) directly.
+        """
+        num_faces = planes.shape[2]
+        faces = np.empty((num_faces, 3), np.uint32)
+        f0 = np.uint32(0)
+        for i in range(num_faces):
+            f0 += _unshuffle_uint32(planes, 0, i)
+            faces[i, 0] = f0
+            faces[i, 1] = f0 + _unshuffle_uint32(planes, 1, i)
+            faces[i, 2] = f0 + _unshuffle_uint32(planes, 2, i)
+        return faces
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _decode_quantized_vertices_numba(planes, quantization_step):
+        """
+        Equivalent to the numpy implementation in _decode_quantized_vertices(),
+        reading the shuffled, zigzag-encoded deltas (3,4,N) directly.
+        """
+        num_vertices = planes.shape[2]
+        vertices = np.empty((num_vertices, 3), np.float32)
+        q = np.zeros(3, np.int64)
+        for i in range(num_vertices):
+            for k in range(3):
+                z = np.int64(_unshuffle_uint32(planes, k, i))
+                q[k] += (z >> 1) ^ -(z & 1)
+                vertices[i, k] = q[k] * quantization_step
+        return vertices
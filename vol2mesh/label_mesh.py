@@ -0,0 +1,281 @@
+"""
+A multi-label marching cubes implementation, for meshing every object
+in a segmentation (label) volume in a single pass over the volume.
+
+Conceptually, this is equivalent to running ordinary marching cubes on
+a binary mask (at threshold 0.5) for each label independently.
+But instead of extracting a mask for each label, we examine every cube
+(2x2x2 voxel neighborhood) in the volume just once, and emit triangles
+for each of the (up to eight) labels which are present in the cube.
+The total cost thus depends on the size of the volume (and the number of
+cubes which straddle an object boundary), not on the number of labels.
+
+The cube configuration table is generated programmatically (see _generate_tables()).
+Ambiguous cube faces (with two diagonally opposed "inside" corners) are always
+resolved by separating the inside corners.  Since that decision only depends on
+the four corners of the face, neighboring cubes always agree, so the resulting
+meshes are watertight (except where the object touches the edge of the volume).
+
+Vertices are placed at the midpoints of the cube edges, using the same
+coordinate conventions as ``Mesh.from_binary_vol()``, i.e. the coordinate
+origin is the upper-left corner of voxel (0,0,0), and its center is (0.5, 0.5, 0.5).
+"""
+import numpy as np
+
+from .util import imap_ordered
+
+# Corner k of a cube is located at the offset (dz, dy, dx) given by the bits of k.
+CUBE_CORNER_OFFSETS = np.array([((k >> 2) & 1, (k >> 1) & 1, k & 1) for k in range(8)], np.int64)
+
+# Each cube edge connects two corners which differ in one bit.
+# Edges are listed as (lower corner, axis), where axis 0,1,2 means z,y,x.
+CUBE_EDGES = np.array([(a, axis) for axis in range(3) for a in range(8) if not a & (4 >> axis)], np.int64)
+
+
+def _generate_tables():
+    """
+    Generate the marching cubes triangle table for all 256 cube configurations.
+
+    For each configuration, we intersect the 'inside' region with each face of the cube,
+    which gives us a set of line segments (connecting edge midpoints) on the cube's surface.
+    Each segment is directed so that the inside region is on its left (as seen from outside the cube).
+    Together, the segments form closed loops, each of which is triangulated as a fan.
+    (The triangle winding matches that of the meshes produced by ``Mesh.from_binary_vol()``.)
+
+    Returns:
+        (tri_table, tri_counts), where tri_table has shape (256, max_triangles, 3)
+        and lists the edge indices (into CUBE_EDGES) for each triangle's corners.
+    """
+    corner_pos = CUBE_CORNER_OFFSETS.astype(np.float64)
+    edge_corners = [(a, a | (4 >> axis)) for a, axis in CUBE_EDGES]
+    edge_index = {frozenset(c): i for i, c in enumerate(edge_corners)}
+    edge_midpoints = np.array([(corner_pos[a] + corner_pos[b]) / 2 for a, b in edge_corners])
+
+    # Each face of the cube, as its four corners in cyclic order, and its outward normal
+    faces = []
+    for axis in range(3):
+        p, q = [4 >> a for a in range(3) if a != axis]
+        for side in (0, 1):
+            base = side * (4 >> axis)
+            corners = [base, base | q, base | p | q, base | p]
+            normal = np.zeros(3)
+            normal[axis] = 2*side - 1
+            faces.append((corners, normal))
+
+    all_triangles = []
+    for config in range(256):
+        inside = [bool(config & (1 << k)) for k in range(8)]
+        next_edge = {}
+        for corners, normal in faces:
+            face_edges = [frozenset(pair) for pair in zip(corners, corners[1:] + corners[:1])]
+            crossing = [edge_index[e] for e in face_edges if len({inside[c] for c in e}) == 2]
+            if len(crossing) == 2:
+                segments = [crossing]
+            elif len(crossing) == 4:
+                # Ambiguous face: separate the two inside corners from each other.
+                segments = []
+                for c in corners:
+                    if inside[c]:
+                        segments.append([edge_index[e] for e in face_edges if c in e])
+            else:
+                segments = []
+
+            for e1, e2 in segments:
+                p1, p2 = edge_midpoints[e1], edge_midpoints[e2]
+                inside_corner = [c for c in edge_corners[e1] if inside[c]][0]
+                if np.dot(np.cross(normal, p2 - p1), corner_pos[inside_corner] - p1) < 0:
+                    e1, e2 = e2, e1
+                assert e1 not in next_edge
+                next_edge[e1] = e2
+
+        # Chain the segments into loops, and triangulate each loop.
+        triangles = []
+        while next_edge:
+            loop = [next(iter(next_edge))]
+            while next_edge[loop[-1]] != loop[0]:
+                loop.append(next_edge[loop[-1]])
+            for e in loop:
+                del next_edge[e]
+            for i in range(1, len(loop) - 1):
+                triangles.append((loop[0], loop[i], loop[i+1]))
+        all_triangles.append(triangles)
+
+    tri_counts = np.array([len(t) for t in all_triangles], np.int64)
+    tri_table = np.full((256, tri_counts.max(), 3), -1, np.int64)
+    for config, triangles in enumerate(all_triangles):
+        if triangles:
+            tri_table[config, :len(triangles)] = triangles
+    return tri_table, tri_counts
+
+
+TRI_TABLE, TRI_COUNTS = _generate_tables()
+
+
+def marching_cubes_labels(label_vol, labels=None, slab_voxels=2**22, executor=None):
+    """
+    Run marching cubes on every object in the given label volume at once.
+
+    Args:
+        label_vol:
+            3D label volume (ZYX order), any integer dtype.
+            Label 0 is considered background and is never meshed.
+        labels:
+            Optional.  If given, only these labels are meshed.
+        slab_voxels:
+            The volume is processed in Z-slabs of (approximately) this many voxels,
+            which bounds the memory needed for intermediate results.
+        executor:
+            Optional ``ThreadPoolExecutor`` with which to process the slabs in parallel.
+
+    Returns:
+        dict of ``{label: (vertices_zyx, faces)}``, sorted by label.
+        Labels which were requested but could not be found in the volume are omitted.
+        Vertex coordinates are in voxel units, with the origin at the upper-left corner of voxel (0,0,0).
+    """
+    assert label_vol.ndim == 3
+    label_vol = np.ascontiguousarray(label_vol)
+    if labels is not None:
+        labels = np.asarray(sorted(labels), label_vol.dtype)
+
+    if (np.array(label_vol.shape) < 2).any():
+        return {}
+
+    Z, Y, X = label_vol.shape
+    slab_depth = max(1, slab_voxels // (Y*X))
+
+    def process_slab(z_start):
+        return _slab_triangles(label_vol, z_start, min(z_start + slab_depth, Z-1), labels)
+
+    results = list(imap_ordered(process_slab, range(0, Z-1, slab_depth), executor))
+    tri_labels = np.concatenate([r[0] for r in results])
+    tri_edges = np.concatenate([r[1] for r in results])
+    del results
+
+    return _assemble_label_meshes(label_vol.shape, tri_labels, tri_edges)
+
+
+def _slab_triangles(label_vol, z_start, z_stop, labels=None):
+    """
+    Compute the triangles for all cubes whose upper-left corner lies in the given
+    range of Z-slices, and return them as a label for each triangle along with the
+    global edge IDs of each triangle corner.
+    (A global edge ID identifies the voxel edge on which the vertex lies,
+    and is computed as ``3 * (linear index of edge's first voxel) + axis``.)
+    """
+    Z, Y, X = label_vol.shape
+    slab = label_vol[z_start:z_stop+1]
+    cube_shape = (z_stop - z_start, Y-1, X-1)
+
+    # Find the cubes whose corners are not all identical.
+    corner_views = [slab[dz:dz+cube_shape[0], dy:dy+Y-1, dx:dx+X-1] for (dz, dy, dx) in CUBE_CORNER_OFFSETS]
+    boundary_cubes = np.zeros(cube_shape, bool)
+    for view in corner_views[1:]:
+        boundary_cubes |= (view != corner_views[0])
+    del corner_views
+
+    cube_z, cube_y, cube_x = np.nonzero(boundary_cubes)
+    del boundary_cubes
+
+    # Linear index of each cube's first corner, within the full volume
+    cube_voxels = ((cube_z + z_start) * Y + cube_y) * X + cube_x
+    corner_deltas = (CUBE_CORNER_OFFSETS * (Y*X, X, 1)).sum(axis=1)
+
+    # (N, 8) array of corner labels for each boundary cube
+    flat_vol = label_vol.reshape(-1)
+    corner_labels = flat_vol[cube_voxels[:, None] + corner_deltas[None, :]]
+
+    tri_labels = []
+    tri_edges = []
+    edge_deltas = 3 * corner_deltas[CUBE_EDGES[:, 0]] + CUBE_EDGES[:, 1]
+    for k in range(8):
+        # Consider each distinct label in the cube once, at its first corner.
+        label = corner_labels[:, k]
+        keep = (label != 0)
+        for j in range(k):
+            keep &= (corner_labels[:, j] != label)
+        if labels is not None:
+            keep &= _isin_sorted(label, labels)
+
+        rows = np.flatnonzero(keep)
+        configs = np.zeros(len(rows), np.int64)
+        for j in range(8):
+            configs |= (corner_labels[rows, j] == label[rows]).astype(np.int64) << j
+
+        # Emit each of the triangles for each configuration.
+        counts = TRI_COUNTS[configs]
+        tri_rows = np.repeat(rows, counts)
+        tri_configs = np.repeat(configs, counts)
+        tri_index = np.arange(len(tri_rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+        local_edges = TRI_TABLE[tri_configs, tri_index]
+
+        tri_labels.append(label[tri_rows])
+        tri_edges.append(3 * cube_voxels[tri_rows, None] + edge_deltas[local_edges])
+
+    return np.concatenate(tri_labels), np.concatenate(tri_edges)
+
+
+def _isin_sorted(values, sorted_items):
+    """
+    Equivalent to np.isin(values, sorted_items), for a sorted (non-empty) array of items.
+    """
+    if len(sorted_items) == 0:
+        return np.zeros(len(values), bool)
+    pos = np.searchsorted(sorted_items, values)
+    pos[pos == len(sorted_items)] = 0
+    return sorted_items[pos] == values
+
+
+def _assemble_label_meshes(vol_shape, tri_labels, tri_edges):
+    """
+    Given the triangles for all labels (as computed by _slab_triangles()),
+    group them by label and deduplicate their vertices.
+    """
+    if len(tri_labels) == 0:
+        return {}
+
+    order = np.argsort(tri_labels, kind='stable')
+    tri_labels = tri_labels[order]
+    tri_edges = tri_edges[order]
+
+    # Each vertex is identified by its (label, edge) pair.
+    # Since the triangles are already sorted by label, we can combine the
+    # label's rank and the edge ID into a single sort key (if it fits in int64).
+    label_ranks = np.cumsum(np.diff(tri_labels, prepend=tri_labels[:1]) != 0)
+    corner_ranks = np.repeat(label_ranks, 3)
+    corner_edges = tri_edges.reshape(-1)
+    num_edges = 3 * int(np.prod(vol_shape))
+    if (int(label_ranks[-1]) + 1) * num_edges < 2**63:
+        corner_order = np.argsort(corner_ranks * num_edges + corner_edges)
+    else:
+        corner_order = np.lexsort((corner_edges, corner_ranks))
+    sorted_ranks = corner_ranks[corner_order]
+    sorted_edges = corner_edges[corner_order]
+
+    new_vertex = np.ones(len(corner_order), bool)
+    new_vertex[1:] = (sorted_ranks[1:] != sorted_ranks[:-1]) | (sorted_edges[1:] != sorted_edges[:-1])
+    vertex_ids = np.cumsum(new_vertex) - 1
+
+    corner_vertices = np.empty(len(corner_order), np.int64)
+    corner_vertices[corner_order] = vertex_ids
+    faces = corner_vertices.reshape(-1, 3)
+
+    vertex_ranks = sorted_ranks[new_vertex]
+    vertex_edges = sorted_edges[new_vertex]
+    del corner_ranks, corner_edges, corner_order, sorted_ranks, sorted_edges, new_vertex, vertex_ids
+
+    # Vertices sit at the midpoint of their edge, i.e. between two voxel centers.
+    vertices_zyx = np.transpose(np.unravel_index(vertex_edges // 3, vol_shape)).astype(np.float32)
+    vertices_zyx += 0.5
+    vertices_zyx[np.arange(len(vertices_zyx)), vertex_edges % 3] += 0.5
+
+    # Split into per-label meshes
+    vertex_starts = np.searchsorted(vertex_ranks, np.arange(label_ranks[-1] + 1))
+    vertex_stops = np.append(vertex_starts[1:], len(vertex_ranks))
+    face_starts = np.flatnonzero(np.diff(label_ranks, prepend=-1))
+    face_stops = np.append(face_starts[1:], len(label_ranks))
+    unique_labels = tri_labels[face_starts]
+
+    meshes = {}
+    for label, v0, v1, f0, f1 in zip(unique_labels, vertex_starts, vertex_stops, face_starts, face_stops):
+        meshes[label] = (vertices_zyx[v0:v1], (faces[f0:f1] - v0).astype(np.uint32))
+    return meshes
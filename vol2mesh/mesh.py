@@ -3,20 +3,18 @@ import sys
 import glob
 import logging
 import tarfile
+import shutil
+import tempfile
 import functools
 import subprocess
-import threading
 from io import BytesIO
 from itertools import chain
 from contextlib import contextmanager
 
 import numpy as np
 import lz4.frame
-from scipy.ndimage import find_objects
-import pyfqmr
-from vol2mesh.util import compute_nonzero_box, extract_subvol, has_nonzero_edges
-
-PYFQMR_LOCK = threading.Lock()
+from vol2mesh.util import (compute_label_boxes, extract_subvol, has_nonzero_edges, executor_for, imap_ordered,
+                           factorize_rows)
 
 try:
     from dvidutils import encode_faces_to_drc_bytes, decode_drc_bytes_to_faces
@@ -25,9 +23,15 @@ except ImportError:
     _dvidutils_available = False
 
 from .normals import compute_face_normals, compute_vertex_normals
-from .obj_utils import write_obj, read_obj
+from .obj_utils import write_obj, read_obj, _write_obj_chunks, OBJ_WRITE_CHUNK_SIZE
 from .ngmesh import read_ngmesh, write_ngmesh
+from .compression import encode_mesh_arrays, decode_mesh_arrays, encoded_array_counts
+from .tar_meshes import TarfileMeshes
 from .io_utils import stdout_redirected
+from .label_mesh import marching_cubes_labels
+from .smoothing import laplacian_smooth, unique_edges
+from .simplify import (PYFQMR_LOCK, default_simplify_pool, simplify_arrays, simplify_arrays_in_subprocess,
+                       simplify_batch, simplify_batch_in_subprocess)
 
 logger = logging.getLogger(__name__)
 
@@ -56,9 +60,10 @@ class Mesh:
             
             pickle_compression_method:
                 How (or whether) to compress vertices, normals, and faces during pickling.
-                Choices are: 'draco', 'lz4', or None.
+                Choices are: 'draco', 'lz4', 'delta-lz4', 'delta-zstd', or None.
+                (See compress().)
         """
-        assert pickle_compression_method in (None, 'lz4', 'draco')
+        assert pickle_compression_method in (None, 'lz4', 'draco', 'delta-lz4', 'delta-zstd')
         self.pickle_compression_method = pickle_compression_method
         self._destroyed = False
         
@@ -69,6 +74,12 @@ class Mesh:
         self._faces = np.asarray(faces, dtype=np.uint32)
         self._draco_bytes = None
         self._lz4_items = None
+        self._lz4_shapes = None
+        self._delta_bytes = None
+
+        # Derived data (e.g. face normals), computed on demand.
+        # See _cached() and invalidate_caches()
+        self._cache = {}
 
         if normals_zyx is None:
             self._normals_zyx = np.zeros((0,3), dtype=np.int32)
@@ -104,12 +115,24 @@ class Mesh:
 
 
     @classmethod
-    def from_file(cls, path):
+    def from_file(cls, path, mmap=False):
         """
         Alternate constructor.
-        Read a mesh from .obj or .drc
+        Read a mesh from .obj, .drc, or .ngmesh
+
+        Args:
+            path:
+                The file to read.  The format is determined by the extension.
+            mmap:
+                Only valid for .ngmesh files.
+                If True, memory-map the file instead of reading it,
+                so the vertex and face data are only loaded from disk as needed.
+                The mesh arrays are copy-on-write views of the file,
+                so the file is never modified, even if the mesh is.
+                (Computing the mesh bounding box still requires reading all vertices.)
         """
         ext = os.path.splitext(path)[1]
+        assert not mmap or ext == '.ngmesh', "mmap is only supported for .ngmesh files"
         
         # By special convention,
         # we permit 0-sized files, which result in empty meshes
@@ -130,7 +153,7 @@ class Mesh:
             return Mesh(vertices_zyx, faces, normals_zyx)
         elif ext == '.ngmesh':
             with open(path, 'rb') as ngmesh_stream:
-                vertices_xyz, faces = read_ngmesh(ngmesh_stream)
+                vertices_xyz, faces = read_ngmesh(ngmesh_stream, mmap=mmap)
             return Mesh(vertices_xyz[:,::-1], faces)
         else:
             msg = f"Unknown file type: {path}"
@@ -152,7 +175,8 @@ class Mesh:
 
 
     @classmethod
-    def from_tarfile(cls, path_or_bytes, keep_normals=True, concatenate=True):
+    def from_tarfile(cls, path_or_bytes, keep_normals=True, concatenate=True, workers=None, executor=None,
+                     lazy=False, cache_size=0):
         """
         Alternate constructor.
         Read all mesh files (either .drc or .obj) from a .tar file
@@ -173,6 +197,25 @@ class Mesh:
                 If True, concatenate all meshes into a single ``Mesh`` object.
                 Otherwise, return a dict of ``{name : Mesh}`` items,
                 named according to the names in the tarfile.
+
+            workers:
+                If given, decode the meshes in parallel, using a thread pool of this size.
+                (The tar members are always read serially.)
+
+            executor:
+                Alternatively, provide your own ``concurrent.futures`` executor
+                (either a ThreadPoolExecutor or a ProcessPoolExecutor) to decode the meshes with.
+
+            lazy:
+                If True (requires ``concatenate=False``), don't decode anything up-front.
+                Instead, return a read-only ``TarfileMeshes`` mapping, which indexes the
+                tar members and decodes each mesh only when it is accessed.
+                The tarfile must not be compressed.
+                Unlike the eager dict, members which can't be decoded are not skipped;
+                accessing them raises an error.
+
+            cache_size:
+                If lazy=True, how many decoded meshes to keep in an LRU cache.
         
         Note: The tar file structure should be completely flat,
         i.e. no internal directory.
@@ -180,7 +223,12 @@ class Mesh:
         Returns:
             Either a single ``Mesh``, or a dict of ``{name : Mesh}``,
             depending on ``concatenate``.
+            (Or a ``TarfileMeshes`` mapping, if lazy=True.)
         """
+        if lazy:
+            assert not concatenate, "Can't use lazy=True with concatenate=True"
+            return TarfileMeshes(path_or_bytes, Mesh.from_buffer, cls.MESH_FORMATS, cache_size)
+
         if isinstance(path_or_bytes, str):
             tf = tarfile.open(path_or_bytes)
         else:
@@ -190,20 +238,19 @@ class Mesh:
         # This ensures that tarball storage order doesn't affect vertex order.
         members = sorted(tf.getmembers(), key=lambda m: m.name)
 
-        meshes = {}
-        for member in members:
-            ext = os.path.splitext(member.name)[1][1:]
-            
-            # Skip non-mesh files and empty files            
-            if ext in cls.MESH_FORMATS and member.size > 0:
-                buf = tf.extractfile(member).read()
-                try:
-                    mesh = Mesh.from_buffer(buf, ext)
-                except:
-                    logger.error(f"Could not decode {member.name} ({member.size} bytes). Skipping!")
-                    continue
+        def member_buffers():
+            for member in members:
+                ext = os.path.splitext(member.name)[1][1:]
 
-                meshes[member.name] = mesh
+                # Skip non-mesh files and empty files
+                if ext in cls.MESH_FORMATS and member.size > 0:
+                    yield member.name, ext, tf.extractfile(member).read()
+
+        meshes = {}
+        with executor_for(workers, executor) as ex:
+            for name, mesh in imap_ordered(_decode_tar_member, member_buffers(), ex):
+                if mesh is not None:
+                    meshes[name] = mesh
 
         if concatenate:
             return concatenate_meshes(meshes.values(), keep_normals)
@@ -356,7 +403,8 @@ class Mesh:
 
 
     @classmethod
-    def from_label_volume(cls, downsampled_volume_zyx, fullres_box_zyx=None, labels=None, ensure_halo=True, method='ilastik', progress=True, **kwargs):
+    def from_label_volume(cls, downsampled_volume_zyx, fullres_box_zyx=None, labels=None, ensure_halo=True, method='ilastik',
+                          progress=True, workers=None, executor=None, **kwargs):
         """
         Generate a mesh for multiple labels in a segmentation volume.
         Calls ``Mesh.from_binary_volume()`` for each object.
@@ -379,17 +427,36 @@ class Mesh:
                 - "ilastik" -- Use github.com/ilastik/marching_cubes
                 - "skimage" -- Use scikit-image marching_cubes_lewiner
                   (Not a required dependency.  Install ``scikit-image`` to use this method.)
+                - "multilabel" -- Use our own multi-label marching cubes implementation,
+                  which meshes all labels in a single pass over the volume,
+                  rather than extracting a separate mask for each label.
+                  (See ``vol2mesh.label_mesh``.)  Normals are computed from the mesh faces.
             progress:
                 Show a progress bar if tqdm is installed.
+                (Not supported by the 'multilabel' method.)
+            workers:
+                If given, compute the meshes in parallel, using a thread pool of this size.
+            executor:
+                Alternatively, provide your own ``concurrent.futures`` executor
+                (either a ThreadPoolExecutor or a ProcessPoolExecutor) to compute the meshes with.
+                Only a few labels are submitted to the executor at a time,
+                so memory usage remains bounded regardless of the number of labels.
+                (If using a process pool, each label's subvolume is copied to the worker process,
+                but the full volume is never copied.)
+                The 'multilabel' method processes the volume in slabs rather than labels,
+                and requires a ThreadPoolExecutor.
             kwargs:
                 Any extra arguments to the particular marching cubes implementation.
                 The 'ilastik' method supports initial smoothing via a ``smoothing_rounds`` parameter.
 
         Returns:
-            dict of ``{label: Mesh}``
+            dict of ``{label: Mesh}``, in the same order as the given labels
+            (or in sorted order, if no labels were given).
         """
         if fullres_box_zyx is None:
             fullres_box_zyx = np.array([[0, 0, 0], downsampled_volume_zyx.shape])
+        else:
+            fullres_box_zyx = np.array(fullres_box_zyx)
         fullres_shape = fullres_box_zyx[1] - fullres_box_zyx[0]
         resolution = fullres_shape // downsampled_volume_zyx.shape
 
@@ -402,6 +469,10 @@ class Mesh:
             downsampled_volume_zyx = np.pad(downsampled_volume_zyx, 1)
             fullres_box_zyx += resolution * np.array([[-1, -1, -1], [1, 1, 1]])
 
+        if method == 'multilabel':
+            return cls._from_label_volume_multilabel(downsampled_volume_zyx, fullres_box_zyx[0], resolution,
+                                                     labels, workers, executor, **kwargs)
+
         if labels is None:
             # Which labels are present?
             # (Use pandas if available, since it's faster.)
@@ -412,33 +483,68 @@ class Mesh:
                 labels = np.unique(downsampled_volume_zyx)
 
             labels = sorted({*labels} - {0})
+        else:
+            labels = list(labels)
 
-        if progress:
-            try:
-                from tqdm import tqdm
-                labels = tqdm(labels)
-            except ImportError:
-                pass
+        box_labels, boxes = cls._label_boxes(downsampled_volume_zyx, labels)
+        box_label_set = set(box_labels.tolist())
+        found_labels = [label for label in labels if label in box_label_set]
+
+        def subvolumes():
+            box_index = np.searchsorted(box_labels, np.asarray(found_labels, box_labels.dtype))
+            for label, subvol_box in zip(found_labels, boxes[box_index]):
+                subvol_box[0] = np.maximum(0, subvol_box[0] - 1)
+                subvol_box[1] = np.minimum(downsampled_volume_zyx.shape, subvol_box[1] + 1)
+                subvol = extract_subvol(downsampled_volume_zyx, subvol_box)
+                yield (label, subvol, subvol_box)
 
-        boxes = cls._label_boxes(downsampled_volume_zyx, labels)
+        mesh_label = functools.partial(_mesh_from_label_subvol, resolution=resolution,
+                                       fullres_offset=fullres_box_zyx[0], method=method, kwargs=kwargs)
+
+        with executor_for(workers, executor) as ex:
+            label_meshes = imap_ordered(mesh_label, subvolumes(), ex)
+
+            if progress:
+                try:
+                    from tqdm import tqdm
+                    label_meshes = tqdm(label_meshes, total=len(found_labels))
+                except ImportError:
+                    pass
+
+            found_meshes = dict(zip(found_labels, label_meshes))
+
+        # Preserve the order of the given labels.
+        return {label: found_meshes.get(label) for label in labels}
+
+    @classmethod
+    def _from_label_volume_multilabel(cls, downsampled_volume_zyx, fullres_offset, resolution, labels=None, workers=None, executor=None, **kwargs):
+        """
+        Helper for from_label_volume(method='multilabel')
+        """
+        assert not kwargs, f"The 'multilabel' method does not accept extra arguments: {kwargs}"
+        if labels is not None:
+            labels = list(labels)
+
+        with executor_for(workers, executor) as ex:
+            label_arrays = marching_cubes_labels(downsampled_volume_zyx, labels, executor=ex)
+
+        if labels is None:
+            labels = list(label_arrays.keys())
 
         meshes = {}
         for label in labels:
             try:
-                subvol_box = boxes[label]
+                vertices_zyx, faces = label_arrays.pop(label)
             except KeyError:
                 meshes[label] = None
                 continue
 
-            subvol_box[0] = np.maximum(0, subvol_box[0] - 1)
-            subvol_box[1] = np.minimum(downsampled_volume_zyx.shape, subvol_box[1] + 1)
-
-            subvol_mask = (extract_subvol(downsampled_volume_zyx, subvol_box) == label)
-            mesh = cls.from_binary_vol(subvol_mask, subvol_box, method, **kwargs)
-
             # Upscale and translate the mesh into place
-            mesh.vertices_zyx[:] *= resolution
-            mesh.vertices_zyx[:] += fullres_box_zyx[0]
+            vertices_zyx *= resolution
+            vertices_zyx += fullres_offset
+
+            mesh = Mesh(vertices_zyx, faces)
+            mesh.recompute_normals(True)
             meshes[label] = mesh
 
         return meshes
@@ -448,37 +554,24 @@ class Mesh:
         """
         Find the bounding box of each object of interest in vol,
         as specified in the given list of label ids.
-        """
-        boxes = {}
-        if max(labels) <= 1e6:
-            # Use scipy to get a list of all objects.
-            vol[vol > max(labels)] = 0
-            slices = find_objects(vol)
-            for label, sl in enumerate(slices, start=1):
-                if not sl:
-                    continue
-                tuples = [(s.start, s.stop) for s in sl]
-                box = np.array(tuples).transpose()
-                boxes[label] = box
-        else:
-            # Slow path
-            for label in labels:
-                mask = (vol == label)
-                subvol_box = compute_nonzero_box(mask)
-                if not subvol_box.any():
-                    continue
-                boxes[label] = subvol_box
+        The volume is not modified.
 
-        return boxes
+        Returns:
+            (box_labels, boxes), i.e. a sorted array of the labels
+            that were actually found, and an array of their boxes.
+            See ``vol2mesh.util.compute_label_boxes()``.
+        """
+        return compute_label_boxes(vol, labels)
 
 
     @classmethod
-    def from_binary_blocks(cls, downsampled_binary_blocks, fullres_boxes_zyx, stitch=True, method='skimage', ensure_halo=False):
+    def from_binary_blocks(cls, downsampled_binary_blocks, fullres_boxes_zyx, stitch=True, method='skimage', ensure_halo=False,
+                           workers=None, executor=None):
         """
         Alternate constructor.
         Compute a mesh for each of the given binary volumes
         (scaled and translated according to its associated box),
-        and concatenate them (but not stitch them).
+        and concatenate them (and optionally stitch them).
         
         Args:
             downsampled_binary_blocks:
@@ -493,19 +586,52 @@ class Mesh:
                 Each block's mesh will be re-scaled to fit exactly within it's bounding box.
             
             stitch:
-                If True, deduplicate the vertices in the final mesh and topologically
-                connect the faces in adjacent blocks.
+                How to deduplicate the vertices in the final mesh and topologically
+                connect the faces in adjacent blocks.  Choices are:
+
+                - False: Don't stitch.  Just concatenate the block meshes.
+                - True (or 'global'): Concatenate the block meshes,
+                  and then call ``stitch_adjacent_faces()`` on the result.
+                - 'streaming': Stitch each block's mesh into the result as soon as it is available,
+                  by comparing only the vertices (and faces) that lie in the regions where its box
+                  overlaps with its neighbors' boxes.  The intermediate block meshes are discarded
+                  along the way, so peak memory usage is proportional to the final mesh size.
+                  The resulting mesh is equivalent to the 'global' result, but the vertices are not sorted.
+                  Note: The list of boxes will be loaded in its entirety at the start.
+                - 'seams': Concatenate the block meshes, and then deduplicate only the vertices
+                  that lie on the seams between blocks, via ``stitch_adjacent_faces(block_boxes=...)``.
+                  The result is equivalent to the 'global' result, but the interior vertices
+                  are not re-sorted, and the stitching cost scales with the seam area.
+                  Note: The list of boxes will be loaded in its entirety at the start.
             
             method:
-                Which library to use for marching_cubes. Currently, only 'skimage' is supported.
+                Which library to use for marching_cubes.
+                See ``from_binary_vol()`` for choices.
+
+            workers:
+                If given, compute the block meshes in parallel, using a thread pool of this size.
+
+            executor:
+                Alternatively, provide your own ``concurrent.futures`` executor
+                (thread pool or process pool) with which to compute the block meshes.
+                Only a few blocks are submitted at a time, so the input blocks
+                are not consumed faster than the meshes can be combined.
         """
-        meshes = []
-        for binary_vol, fullres_box_zyx in zip(downsampled_binary_blocks, fullres_boxes_zyx):
-            mesh = cls.from_binary_vol(binary_vol, fullres_box_zyx, method, ensure_halo)
-            meshes.append(mesh)
+        assert stitch in (True, False, 'global', 'streaming', 'seams'), f"Invalid stitch mode: {stitch}"
+        if stitch in ('streaming', 'seams'):
+            fullres_boxes_zyx = np.asarray(list(fullres_boxes_zyx))
+
+        mesh_block = functools.partial(_mesh_from_block, method=method, ensure_halo=ensure_halo)
+
+        with executor_for(workers, executor) as ex:
+            block_meshes = imap_ordered(mesh_block, zip(downsampled_binary_blocks, fullres_boxes_zyx), ex)
+            if stitch == 'streaming':
+                return _stitch_block_meshes_streaming(block_meshes, fullres_boxes_zyx)
+            mesh = concatenate_meshes(block_meshes)
 
-        mesh = concatenate_meshes(meshes)
-        if stitch:
+        if stitch == 'seams':
+            mesh.stitch_adjacent_faces(block_boxes=fullres_boxes_zyx)
+        elif stitch:
             mesh.stitch_adjacent_faces()
         return mesh
 
@@ -517,20 +643,43 @@ class Mesh:
         self.normals_zyx = np.zeros((0,3), np.float32)
 
 
-    def compress(self, method='lz4'):
+    def compress(self, method='lz4', quantization_step=None):
         """
         Compress the array members of this mesh, and return the (approximate) compressed size.
         
         Method 'lz4' preserves data without loss.
         Method 'draco' is lossy.
+        Methods 'delta-lz4' and 'delta-zstd' sort the faces and delta-encode them,
+        and byte-shuffle the vertices and normals before compressing them.
+        For a typical smoothed mesh, 'delta-lz4' is about 1.5x smaller than 'lz4' (1.85x smaller than
+        the raw arrays), compresses at the same speed, and decompresses ~15% slower.
+        With quantization_step=1/16, it is about 2.3x smaller than 'lz4'.
+        The geometry is preserved without loss (by default), but the order of the faces is not.
+        ('delta-zstd' requires the zstandard package.  See ``vol2mesh.compression`` for details.)
         Method None will not compress at all.
+
+        Cached derived data (e.g. face normals) is discarded, too.
+
+        Args:
+            method:
+                One of 'lz4', 'draco', 'delta-lz4', 'delta-zstd', or None.
+            quantization_step:
+                Only valid for the 'delta-*' methods.
+                If given, round the vertices to a grid with this spacing (e.g. 1/16 voxel),
+                and store the normals with 16 bits per component.  That's lossy, but far more compact.
         """
+        assert quantization_step is None or method in ('delta-lz4', 'delta-zstd'), \
+            "quantization_step is only supported for the 'delta-lz4' and 'delta-zstd' methods"
         if method is None:
             return self.vertices_zyx.nbytes + self.faces.nbytes + self.normals_zyx.nbytes
-        elif method == 'draco':
+
+        self.invalidate_caches()
+        if method == 'draco':
             return self._compress_as_draco()
         elif method == 'lz4':
             return self._compress_as_lz4()
+        elif method in ('delta-lz4', 'delta-zstd'):
+            return self._compress_as_delta(method[len('delta-'):], quantization_step)
         else:
             raise RuntimeError(f"Unknown compression method: {method}")
     
@@ -551,6 +700,7 @@ class Mesh:
         if self._lz4_items is None:
             self._uncompress() # Ensure not currently compressed as draco
             compressed = []
+            self._lz4_shapes = (len(self._vertices_zyx), len(self._normals_zyx), len(self._faces))
             
             flat_vertices = self._vertices_zyx.reshape(-1)
             compressed.append( lz4.frame.compress(flat_vertices) )
@@ -570,11 +720,24 @@ class Mesh:
         return sum(map(len, self._lz4_items))
     
 
+    def _compress_as_delta(self, codec, quantization_step):
+        if self._delta_bytes is None:
+            self._uncompress() # Ensure not currently compressed as draco or lz4
+            self._delta_bytes = encode_mesh_arrays(self._vertices_zyx, self._normals_zyx, self._faces,
+                                                   codec, quantization_step)
+            self._vertices_zyx = None
+            self._normals_zyx = None
+            self._faces = None
+        return len(self._delta_bytes)
+
+
     def _uncompress(self):
         if self._draco_bytes is not None:
             self._uncompress_from_draco()
         elif self._lz4_items is not None:
             self._uncompress_from_lz4()
+        elif self._delta_bytes is not None:
+            self._uncompress_from_delta()
         
         assert self._vertices_zyx is not None
         assert self._normals_zyx is not None
@@ -591,28 +754,42 @@ class Mesh:
     
 
     def _uncompress_from_lz4(self):
-        # Note: data was compressed twice, so uncompress twice
-        uncompressed = list(map(lz4.frame.decompress, self._lz4_items))
+        lz4_items = self._lz4_items
         self._lz4_items = None
+        self._vertices_zyx, self._normals_zyx, self._faces = _decompress_lz4_items(lz4_items)
 
-        decompress = lambda b: lz4.frame.decompress(b, return_bytearray=True)
-        uncompressed = list(map(decompress, uncompressed))
-        vertices_buf, normals_buf, faces_buf = uncompressed
-        del uncompressed
-        
-        self._vertices_zyx = np.frombuffer(vertices_buf, np.float32).reshape((-1,3))
-        del vertices_buf
-        
-        self._normals_zyx = np.frombuffer(normals_buf, np.float32).reshape((-1,3))
-        del normals_buf
 
-        self._faces = np.frombuffer(faces_buf, np.uint32).reshape((-1,3))
-        del faces_buf
+    def _uncompress_from_delta(self):
+        delta_bytes = self._delta_bytes
+        self._delta_bytes = None
+        self._vertices_zyx, self._normals_zyx, self._faces = decode_mesh_arrays(delta_bytes)
+
+
+    def _array_counts(self):
+        """
+        Return the number of vertices, normals, and faces in this mesh.
+        If the mesh is compressed with lz4, it is not decompressed.
+        """
+        assert not self._destroyed
+        if self._vertices_zyx is None and self._lz4_items is not None and getattr(self, '_lz4_shapes', None):
+            return self._lz4_shapes
+        if self._vertices_zyx is None and self._delta_bytes is not None:
+            return encoded_array_counts(self._delta_bytes)
+        return (len(self.vertices_zyx), len(self.normals_zyx), len(self.faces))
+
 
-        # Should be writeable already
-        self._vertices_zyx.flags['WRITEABLE'] = True
-        self._normals_zyx.flags['WRITEABLE'] = True
-        self._faces.flags['WRITEABLE'] = True
+    def _uncompressed_arrays(self):
+        """
+        Return (vertices_zyx, normals_zyx, faces).
+        If the mesh is compressed with lz4 (or delta-lz4/zstd), the arrays
+        are decompressed into new arrays, but the mesh itself remains compressed.
+        """
+        assert not self._destroyed
+        if self._vertices_zyx is None and self._lz4_items is not None:
+            return _decompress_lz4_items(self._lz4_items)
+        if self._vertices_zyx is None and self._delta_bytes is not None:
+            return decode_mesh_arrays(self._delta_bytes)
+        return self.vertices_zyx, self.normals_zyx, self.faces
 
 
     def __getstate__(self):
@@ -623,7 +800,21 @@ class Mesh:
         """
         if self.pickle_compression_method:
             self.compress(self.pickle_compression_method)
-        return self.__dict__
+        return {**self.__dict__, '_cache': {}}
+
+    def __setstate__(self, state):
+        # Meshes pickled by older versions of this class have no cache (or delta compression).
+        self.__dict__.update(state)
+        self.__dict__.setdefault('_cache', {})
+        self.__dict__.setdefault('_delta_bytes', None)
+
+    def __copy__(self):
+        # Share the arrays (and compressed buffers), but give the copy its own
+        # derived data cache, so reassigning the copy's arrays doesn't affect the original.
+        # (Unlike the default implementation, this doesn't compress the mesh via __getstate__().)
+        mesh = type(self).__new__(type(self))
+        mesh.__dict__.update({**self.__dict__, '_cache': dict(self._cache)})
+        return mesh
 
     def destroy(self):
         """
@@ -633,9 +824,12 @@ class Mesh:
         all references to the mesh, but you know you're done with it.
         """
         self._draco_bytes = None
+        self._lz4_items = None
+        self._delta_bytes = None
         self._vertices_zyx = None
         self._faces = None
         self._normals_zyx = None
+        self._cache = {}
         self._destroyed = True
 
 
@@ -661,6 +855,9 @@ class Mesh:
     @vertices_zyx.setter
     @auto_uncompress
     def vertices_zyx(self, new_vertices_zyx):
+        if len(new_vertices_zyx) != len(self._vertices_zyx):
+            self._cache.pop('valence', None)
+        self._cache.pop('face_normals', None)
         self._vertices_zyx = new_vertices_zyx
 
     @property
@@ -671,6 +868,7 @@ class Mesh:
     @faces.setter
     @auto_uncompress
     def faces(self, new_faces):
+        self._cache.clear()
         self._faces = new_faces
 
     @property
@@ -683,6 +881,77 @@ class Mesh:
     def normals_zyx(self, new_normals_zyx):
         self._normals_zyx = new_normals_zyx
 
+    def invalidate_caches(self):
+        """
+        Discard all cached derived data (face normals, edges, valence).
+
+        The cache is invalidated automatically whenever the vertices_zyx or faces
+        attributes are assigned, but not if those arrays are modified in-place.
+        If you modify them in-place, call this function afterwards.
+        (recompute_normals() and drop_degenerate_faces() always compute the face normals anew.)
+        """
+        self._cache.clear()
+
+    def _cached(self, key, compute):
+        """
+        Return the cached item for the given key,
+        or compute it (via ``compute()``) and cache it.
+        Cached arrays are made read-only, since they may be shared by several callers.
+        """
+        try:
+            return self._cache[key]
+        except KeyError:
+            value = compute()
+            value.flags.writeable = False
+            self._cache[key] = value
+            return value
+
+    def face_normals(self, normalize=False):
+        """
+        Return the normal vector of each face, as an array (M,3).
+        The result is cached until the vertices or faces are changed.
+
+        Args:
+            normalize:
+                If True, return unit vectors.
+                Otherwise, the magnitudes are proportional to the face areas.
+                (Degenerate faces have a normal of [0,0,0] either way.)
+
+        Returns:
+            ndarray (M,3), float32 (read-only)
+        """
+        face_normals = self._cached('face_normals', lambda: compute_face_normals(self.vertices_zyx, self.faces))
+        if not normalize:
+            return face_normals
+
+        magnitudes = np.linalg.norm(face_normals, axis=1)
+        nz = (magnitudes != 0)
+        face_normals = face_normals.copy()
+        face_normals[nz] /= magnitudes[nz, None]
+        return face_normals
+
+    def unique_edges(self):
+        """
+        Return the unique (undirected) edges of this mesh's faces,
+        as an array (E,2), with the lower vertex ID in the first column.
+        The result is cached until the faces are changed.
+
+        Returns:
+            ndarray (E,2) (read-only)
+        """
+        return self._cached('edges', lambda: unique_edges(self.faces))
+
+    def vertex_valence(self):
+        """
+        Return the number of neighbors (i.e. edges) of each vertex.
+        Vertices that aren't referenced by any face have a valence of 0.
+        The result is cached until the faces are changed.
+
+        Returns:
+            ndarray (N,), int (read-only)
+        """
+        return self._cached('valence', lambda: np.bincount(self.unique_edges().ravel(), minlength=len(self.vertices_zyx)))
+
     def sort_vertices(self):
         """
         Sort the vertex list lexicographically,
@@ -697,7 +966,7 @@ class Mesh:
         ranks[order] = np.arange(len(order), dtype=np.uint32)
         self.faces = ranks[self.faces]
 
-    def stitch_adjacent_faces(self):
+    def stitch_adjacent_faces(self, block_boxes=None, method='sort', tolerance=None, preserve_order=True):
         """
         Identify duplicate vertices and remove them.
         Update the vertex references in self.faces as needed
@@ -707,10 +976,51 @@ class Mesh:
 
         Note: Normals are recomputed iff they were present originally.
 
+        Args:
+            block_boxes:
+                Optional.  If this mesh was assembled from meshes that were computed
+                in blocks (e.g. via ``from_binary_blocks()``), you may provide the
+                blocks' bounding boxes (in the mesh's coordinate system).
+                In that case, duplicates can only exist where the blocks overlap,
+                so only the vertices on the seams between blocks are examined.
+                The remaining vertices are not re-sorted; their order is preserved.
+                Also, the order of the faces is preserved.
+
+            method:
+                How to find the duplicate vertices (if block_boxes isn't given). Choices are:
+
+                - 'sort': Sort the vertices, and find duplicates among adjacent rows.
+                  The resulting vertices are in sorted order.
+                - 'hash': Weld the vertices via hashing, in linear time.
+                  (Much faster than sorting for large meshes.  Uses pandas if available;
+                  otherwise it falls back to sorting, via numpy.)
+                  The welded vertices retain the order of their first occurrence,
+                  and so do the remaining faces.
+
+            tolerance:
+                Only valid for method='hash'.
+                If given, vertices are considered duplicates if they fall into the same
+                cell of a grid with this spacing, i.e. if ``np.round(v / tolerance)`` is equal.
+                Each welded vertex takes the coordinates of its first occurrence.
+                By default, vertices must match exactly.
+
+            preserve_order:
+                Only used with method='hash'.
+                If False, sort the vertices afterwards (like method='sort' does).
+
         Returns:
             True if any vertices were dropped (due to stitching),
             or False otherwise (no stitching needed).
         """
+        assert method in ('sort', 'hash'), f"Invalid stitch method: {method}"
+        assert tolerance is None or method == 'hash', "tolerance is only supported for method='hash'"
+        if block_boxes is not None:
+            assert method == 'sort', "block_boxes can't be combined with method='hash'"
+            return self._stitch_block_seams(block_boxes)
+
+        if method == 'hash':
+            return self._stitch_hashed(tolerance, preserve_order)
+
         # If we sort the vertices, finding duplicates is easy with np.diff
         self.sort_vertices()
         v = self.vertices_zyx
@@ -746,6 +1056,125 @@ class Mesh:
 
         return True
 
+    def _stitch_hashed(self, tolerance, preserve_order):
+        """
+        Implementation of stitch_adjacent_faces(method='hash')
+        """
+        vertices_zyx = self.vertices_zyx
+        if tolerance:
+            keys = np.round(vertices_zyx / tolerance).astype(np.int64)
+        else:
+            # Adding zero normalizes -0.0 to 0.0, so their bit patterns match.
+            keys = vertices_zyx + vertices_zyx.dtype.type(0)
+
+        codes, first_indexes = factorize_rows(keys)
+        del keys
+
+        # Drop duplicates, and also vertices that were never referenced in the first place
+        faces = codes[self.faces]
+        reference_flags = np.zeros(len(first_indexes), bool)
+        reference_flags[faces.ravel()] = True
+        keep = first_indexes[reference_flags]
+
+        if len(keep) < len(vertices_zyx):
+            new_ids = (np.cumsum(reference_flags) - 1).astype(np.uint32)
+            self.faces = new_ids[faces]
+            self.vertices_zyx = vertices_zyx[keep]
+            if len(self.normals_zyx) > 0:
+                self.normals_zyx = self.normals_zyx[keep]
+        del faces
+
+        # Deduplicating vertices might reveal duplicated faces
+        if len(self.faces) > 0:
+            _, first_faces = factorize_rows(np.sort(self.faces, axis=1))
+            if len(first_faces) < len(self.faces):
+                self.faces = self.faces[first_faces]
+
+        if not preserve_order:
+            self.sort_vertices()
+
+        if len(keep) == len(vertices_zyx):
+            return False
+
+        if len(self.normals_zyx) > 0:
+            self.recompute_normals(True)
+
+        return True
+
+    def _stitch_block_seams(self, block_boxes):
+        """
+        Implementation of stitch_adjacent_faces(block_boxes=...)
+        """
+        block_boxes = np.asarray(block_boxes)
+        if len(np.unique(block_boxes.reshape(-1, 6), axis=0)) < len(block_boxes):
+            # Duplicated blocks can have duplicate vertices anywhere.
+            return self.stitch_adjacent_faces()
+
+        vertices_zyx = self.vertices_zyx
+        faces = self.faces
+
+        # Find duplicates among the seam vertices (preferring the first occurrence of each)
+        seam_vertices = _seam_vertex_mask(vertices_zyx, block_boxes).nonzero()[0]
+        seam_coords = vertices_zyx[seam_vertices]
+        order = np.lexsort(seam_coords.T[::-1])
+        sorted_coords = seam_coords[order]
+        new_group = np.ones(len(order), bool)
+        new_group[1:] = (sorted_coords[1:] != sorted_coords[:-1]).any(axis=1)
+        group_ids = np.cumsum(new_group) - 1
+        group_reps = np.full(new_group.sum(), len(vertices_zyx), np.int64)
+        np.minimum.at(group_reps, group_ids, seam_vertices[order])
+        del seam_coords, sorted_coords, new_group
+
+        remap = np.arange(len(vertices_zyx))
+        remap[seam_vertices[order]] = group_reps[group_ids]
+        del group_ids, group_reps
+
+        # Drop duplicates, and also vertices that were never referenced in the first place
+        keep_vertices = (remap == np.arange(len(vertices_zyx)))
+        reference_flags = np.zeros(len(vertices_zyx), bool)
+        reference_flags[faces.ravel()] = True
+        keep_vertices &= reference_flags
+        del reference_flags
+
+        if keep_vertices.all():
+            self._drop_duplicate_seam_faces(seam_vertices)
+            return False
+
+        new_ids = (np.cumsum(keep_vertices) - 1).astype(np.uint32)
+        self.faces = new_ids[remap[faces]]
+        self.vertices_zyx = vertices_zyx[keep_vertices]
+        if len(self.normals_zyx) > 0:
+            self.normals_zyx = self.normals_zyx[keep_vertices]
+
+        # Deduplicating vertices might reveal duplicated faces (only on the seams)
+        seam_vertices = new_ids[seam_vertices[keep_vertices[seam_vertices]]]
+        self._drop_duplicate_seam_faces(seam_vertices)
+
+        if len(self.normals_zyx) > 0:
+            self.recompute_normals(True)
+
+        return True
+
+    def _drop_duplicate_seam_faces(self, seam_vertices):
+        """
+        Drop duplicate faces, but only consider faces whose
+        corners are all in the given list of (seam) vertices.
+        The order of the remaining faces is preserved.
+        """
+        in_seam = np.zeros(len(self.vertices_zyx), bool)
+        in_seam[seam_vertices] = True
+        candidates = in_seam[self.faces].all(axis=1).nonzero()[0]
+
+        f = np.sort(self.faces[candidates], axis=1)
+        order = np.lexsort(f.T[::-1])
+        f = f[order]
+        dup = np.zeros(len(f), bool)
+        dup[1:] = (f[1:] == f[:-1]).all(axis=1)
+        if dup.any():
+            keep_faces = np.ones(len(self.faces), bool)
+            keep_faces[candidates[order][dup]] = False
+            self.faces = self.faces[keep_faces]
+
     def drop_duplicate_faces(self):
         # Normalize face vertex order before checking for duplicates.
         # Technically, this means we don't distinguish
@@ -757,10 +1186,39 @@ class Mesh:
         not_dup = np.diff(f, axis=0, prepend=(f[:1] + 1)).any(axis=1)
         self.faces = self.faces[order][not_dup]
 
+    def drop_degenerate_faces(self):
+        """
+        Remove faces with no area (i.e. just lines).
+
+        (Technically, we might be left with unused vertices after this,
+        but removing them requires relabeling the faces.
+        Call stitch_adjacent_faces() if you want to remove them.)
+
+        Returns:
+            The number of faces that were removed.
+        """
+        if len(self.faces) == 0:
+            return 0
+
+        # Degenerate faces have a normal of 0,0,0.
+        # The face normals are always computed anew (in case the vertices were modified in-place),
+        # and the face normals of the remaining faces are cached.
+        self._cache.pop('face_normals', None)
+        face_normals = self.face_normals()
+        good_faces = face_normals.any(axis=1)
+        num_dropped = len(good_faces) - int(good_faces.sum())
+        if num_dropped:
+            self.faces = self.faces[good_faces, :]
+            self._cached('face_normals', lambda: face_normals[good_faces, :])
+        return num_dropped
+
     def recompute_normals(self, remove_degenerate_faces=True):
         """
         Compute the normals for this mesh.
 
+        The face normals are always computed anew (not read from the cache),
+        so this is correct even if the vertices or faces were modified in-place.
+
         remove_degenerate_faces:
             If True, faces with no area (i.e. just lines) will be removed.
             (They have no effect on the vertex normals either way.)
@@ -769,18 +1227,12 @@ class Mesh:
             self._normals_zyx = np.zeros((0,3), dtype=np.int32)
             return
 
-        face_normals = compute_face_normals(self.vertices_zyx, self.faces)
-
+        # Don't trust the cached face normals: the vertices or faces may have been modified in-place.
+        # (The freshly computed face normals are cached again.)
+        self._cache.pop('face_normals', None)
         if remove_degenerate_faces:
-            # Degenerate faces ended up with a normal of 0,0,0.  Remove those faces.
-            # (Technically, we might be left with unused vertices after this,
-            #  but removing them requires relabeling the faces.
-            #  Call stitch_adjacent_faces() if you want to remove them.)
-            good_faces = face_normals.any(axis=1)
-            if not good_faces.all():
-                self.faces = self.faces[good_faces, :]
-                face_normals = face_normals[good_faces, :]
-            del good_faces
+            self.drop_degenerate_faces()
+        face_normals = self.face_normals()
 
         if len(self.faces) == 0:
             # No faces left. Discard all remaining vertices and normals.
@@ -789,38 +1241,122 @@ class Mesh:
         else:
             self.normals_zyx = compute_vertex_normals(self.vertices_zyx, self.faces, face_normals=face_normals)
 
-    def simplify(self, fraction, **kwargs):
+    def simplify(self, fraction, backend='local', executor=None, compute_normals=True, **kwargs):
+        """
+        Simplify this mesh in-place, by the given fraction (of the original face count).
+        Uses pyfqmr to perform the decimation.
+
+        Args:
+            fraction:
+                The target face count, as a fraction of the current face count.
+            backend:
+                Either 'local' or 'process'.
+                Since pyfqmr is not thread-safe, only one mesh at a time can be decimated
+                in this process.  With backend='process', the decimation is performed in a
+                worker process instead (the arrays are transferred via shared memory),
+                so several threads can decimate their meshes concurrently.
+            executor:
+                For backend='process', an optional ``ProcessPoolExecutor`` to use.
+                By default, a module-wide pool is used.
+                See ``vol2mesh.simplify.simplify_arrays_in_subprocess()``.
+            compute_normals:
+                If False, the simplified mesh will have no normals.
+                (Useful if you're going to modify the mesh further anyway.)
+                Degenerate faces are discarded either way.
+            kwargs:
+                Passed to ``pyfqmr.Simplify.simplify_mesh()``.
+        """
         if fraction is None or fraction == 1.0:
             return
 
-        # Claude discovered that pyfqmr is not thread-safe (as of v0.3.0),
-        # as it stores vertexes and faces in a global variable.
-        with PYFQMR_LOCK:
-            simplifier = pyfqmr.Simplify()
-            simplifier.setMesh(self.vertices_zyx, self.faces)
-            target_face_count = int(fraction * len(self.faces))
+        assert backend in ('local', 'process'), f"Invalid simplify backend: {backend}"
+        target_face_count = int(fraction * len(self.faces))
+        if backend == 'process':
+            vertices_zyx, faces = simplify_arrays_in_subprocess(
+                self.vertices_zyx, self.faces, target_face_count, executor, **kwargs)
+        else:
+            vertices_zyx, faces = simplify_arrays(self.vertices_zyx, self.faces, target_face_count, **kwargs)
+
+        self._set_simplified(vertices_zyx, faces, compute_normals)
+
+    def build_lod_pyramid(self, fractions, path=None, compute_normals=True, **kwargs):
+        """
+        Produce several decimated versions ("levels of detail") of this mesh.
+
+        Each level is decimated from the previous level (rather than from this mesh),
+        so the total cost is not much more than the cost of computing the first level alone.
+        This mesh is not modified.
+
+        Args:
+            fractions:
+                A list of decreasing fractions, e.g. [1.0, 0.5, 0.25, 0.1].
+                Each is the target face count of its level, relative to this mesh's face count.
+                (A fraction of 1.0 produces an undecimated copy.)
+            path:
+                Optional.  If provided, write each level to a file,
+                according to the given path pattern, which must contain ``{lod}``,
+                e.g. ``/path/to/mesh-{lod}.drc``.  The format is determined by the extension.
+                (The LOD index is used, not the fraction.)
+            compute_normals:
+                If False, the returned levels will have no normals.
+            kwargs:
+                Passed to ``pyfqmr.Simplify.simplify_mesh()``.
+
+        Returns:
+            list of Mesh, one per fraction.
+        """
+        fractions = list(fractions)
+        assert all(0 < f <= 1.0 for f in fractions), f"Invalid fractions: {fractions}"
+        assert all(a >= b for a, b in zip(fractions[:-1], fractions[1:])), \
+            f"fractions must be listed in decreasing order: {fractions}"
+        assert path is None or '{lod}' in path, "path must contain '{lod}'"
+
+        full_face_count = len(self.faces)
+        vertices_zyx, faces = self.vertices_zyx, self.faces
+        levels = []
+        for fraction in fractions:
+            target_face_count = int(fraction * full_face_count)
+            if target_face_count < len(faces):
+                vertices_zyx, faces = simplify_arrays(vertices_zyx, faces, target_face_count, **kwargs)
+                mesh = Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32), box=self.box.copy(),
+                            pickle_compression_method=self.pickle_compression_method)
+                mesh._set_simplified(vertices_zyx, faces, compute_normals)
+                vertices_zyx, faces = mesh.vertices_zyx, mesh.faces
+            else:
+                # No decimation needed; just copy the previous level (or this mesh)
+                source = levels[-1] if levels else self
+                normals_zyx = source.normals_zyx.copy() if compute_normals else None
+                mesh = Mesh(vertices_zyx.copy(), faces.copy(), normals_zyx, box=self.box.copy(),
+                            pickle_compression_method=self.pickle_compression_method)
+                if compute_normals and len(mesh.normals_zyx) == 0:
+                    mesh.recompute_normals(True)
+            levels.append(mesh)
 
-            _kwargs = {
-                'aggressiveness': 7,
-                'preserve_border': True,
-                'lossless': False
-            }
-            _kwargs.update(kwargs)
+        if path is not None:
+            for lod, mesh in enumerate(levels):
+                mesh.serialize(path.format(lod=lod))
 
-            simplifier.simplify_mesh(target_face_count, **_kwargs)
-            vertices_zyx, faces, _face_normals = simplifier.getMesh()
+        return levels
 
+    def _set_simplified(self, vertices_zyx, faces, compute_normals=True):
+        """
+        Replace this mesh's vertices and faces with the results from pyfqmr.
+        """
         bad_faces = (faces >= len(vertices_zyx)).any(axis=1)
         if bad_faces.any():
             logger.warning(f"Simplification produced {bad_faces.sum()} faces that reference non-existent vertices! Dropping them.")
             faces = faces[~bad_faces]
 
-        self.vertices_zyx = vertices_zyx.astype(np.float32)
-        self.faces = faces.astype(np.int32)
+        self.vertices_zyx = vertices_zyx.astype(np.float32, copy=False)
+        self.faces = faces.astype(np.int32, copy=False)
 
-        # Force normal recomputation to eliminate possible degenerate faces
-        # (Can decimation produce degenerate faces?)
-        self.recompute_normals(True)
+        if compute_normals:
+            # Force normal recomputation to eliminate possible degenerate faces
+            # (Can decimation produce degenerate faces?)
+            self.recompute_normals(True)
+        else:
+            self.drop_degenerate_faces()
+            self.normals_zyx = np.zeros((0,3), np.float32)
 
     def simplify_openmesh(self, fraction):
         """
@@ -877,7 +1413,8 @@ class Mesh:
         self.recompute_normals(True)
 
 
-    def laplacian_smooth(self, iterations=1, constrain_exterior=None, constraint_mode='fixed'):
+    def laplacian_smooth(self, iterations=1, constrain_exterior=None, constraint_mode='fixed', engine='auto',
+                         mode='laplacian', step_sizes=None, compute_normals=True):
         """
         Smooth the mesh in-place.
 
@@ -888,22 +1425,44 @@ class Mesh:
         Disadvantage: Results in overall shrinkage of the mesh, especially for many iterations.
                       (But nearly all smoothing techniques cause at least some shrinkage.)
 
-        Normals are automatically recomputed, and 'degenerate' faces after smoothing are discarded.
+        Normals are automatically recomputed (unless compute_normals=False),
+        and 'degenerate' faces after smoothing are discarded.
 
         Args:
             iterations:
                 How many passes to take over the data.
                 More iterations results in a smoother mesh, but more shrinkage (and more CPU time).
 
+            engine:
+                How to compute each smoothing pass. Choices are 'auto', 'numba', 'csr', or 'add.at'.
+                The vertex adjacency is computed once, and then applied in each pass via either
+                a parallel numba kernel or a scipy sparse matrix.
+                ('add.at' is the original (slow) pure-numpy implementation.)
+                See ``vol2mesh.smoothing`` for details.
+
+            mode:
+                Which variant of Laplacian smoothing to use:
+
+                - 'laplacian': The plain technique described above.
+                - 'taubin': Alternate between 'push' and 'pull' steps to avoid shrinkage.
+                - 'cotangent': Weight each neighbor by the cotangents of the angles opposite the shared edge.
+
+            step_sizes:
+                For the 'taubin' and 'cotangent' modes, the sequence of step sizes to take in each iteration.
+                For 'taubin', the default is (0.5, -0.53).  For 'cotangent', the default is (0.5,).
+                See ``vol2mesh.smoothing.laplacian_smooth()`` for details.
+
+            compute_normals:
+                If False, the smoothed mesh will have no normals.
+                (Degenerate faces are discarded regardless.)
+                Useful if you're going to modify the mesh further anyway.
+
         TODO: Variations of this technique can give refined results.
             - Try weighting the influence of each neighbor by it's distance to the center vertex.
-            - Try smaller displacement steps for each iteration
-            - Try switching between 'push' and 'pull' iterations to avoid shrinkage
             - Try smoothing "boundary" meshes independently from the rest of the mesh (less shrinkage)
-            - Try "Cotangent Laplacian Smoothing"
         """
         if iterations == 0:
-            if self.normals_zyx.shape[0] == 0:
+            if compute_normals and self.normals_zyx.shape[0] == 0:
                 self.recompute_normals(True)
             return
 
@@ -917,53 +1476,16 @@ class Mesh:
         # Always discard old normals
         self.normals_zyx = np.zeros((0,3), np.float32)
 
-        # Compute the list of all unique vertex adjacencies
-        edges = np.concatenate( [self.faces[:, (0,1)],
-                                 self.faces[:, (1,2)],
-                                 self.faces[:, (2,0)]] )
-
-        # Drop duplicates
-        edges.sort(axis=1)
-        edges = edges[np.lexsort(edges.T)]
-        non_dups = np.diff(edges, axis=0, prepend=(edges[:1] + 1)).any(axis=1)
-        edges = edges[non_dups]
-
-        # How many neighbors for each vertex == how many times it is mentioned in the edge list
-        neighbor_counts = np.bincount(edges.ravel(), minlength=len(self.vertices_zyx))
-
+        frozen_coords = None
         if constrain_exterior is not None:
             frozen_coords = (self.vertices_zyx <= constrain_exterior[0])
             frozen_coords |= (self.vertices_zyx >= constrain_exterior[1]-1)
             if constraint_mode == 'fixed':
                 frozen_coords = frozen_coords.any(axis=1)
 
-        new_vertices_zyx = np.empty_like(self.vertices_zyx)
-        for _ in range(iterations):
-            new_vertices_zyx[:] = self.vertices_zyx
-
-            # For the complete edge index list, accumulate (sum) the vertexes on
-            # the right side of the list into the left side's address and vice-versa.
-            #
-            ## We want something like this:
-            # v1_indexes, v2_indexes = df['v1_id'], df['v2_id']
-            # new_vertices_zyx[v1_indexes] += self.vertices_zyx[v2_indexes]
-            # new_vertices_zyx[v2_indexes] += self.vertices_zyx[v1_indexes]
-            #
-            # ...but that doesn't work because v1_indexes will contain repeats,
-            #    and "fancy indexing" behavior is undefined in that case.
-            #
-            # Instead, it turns out that np.ufunc.at() works (it's an "unbuffered" operation)
-            np.add.at(new_vertices_zyx, edges[:, 0], self.vertices_zyx[edges[:, 1], :])
-            np.add.at(new_vertices_zyx, edges[:, 1], self.vertices_zyx[edges[:, 0], :])
-
-            # Here, '+1' because each point itself is included in the sum
-            new_vertices_zyx[:] /= (neighbor_counts[:, None] + 1)
-
-            if constrain_exterior is not None:
-                new_vertices_zyx[frozen_coords] = self.vertices_zyx[frozen_coords]
-
-            # Swap (save RAM allocation overhead by reusing the new_vertices_zyx array between iterations)
-            self.vertices_zyx, new_vertices_zyx = new_vertices_zyx, self.vertices_zyx
+        # The edges are cached, so they needn't be recomputed if this mesh is smoothed again.
+        self.vertices_zyx = laplacian_smooth(self.vertices_zyx, self.faces, iterations, frozen_coords,
+                                             engine, mode, step_sizes, self.unique_edges())
 
         # Smoothing can cause degenerate faces,
         # particularly in some small special cases like this:
@@ -976,8 +1498,11 @@ class Mesh:
         #
         # Detecting and removing such degenerate faces is easy if we recompute the normals.
         # (If we don't remove them, draco chokes on them.)
-        self.recompute_normals(True)
-        assert self.normals_zyx.shape == self.vertices_zyx.shape
+        if compute_normals:
+            self.recompute_normals(True)
+            assert self.normals_zyx.shape == self.vertices_zyx.shape
+        else:
+            self.drop_degenerate_faces()
 
 
     def serialize(self, path=None, fmt=None):
@@ -1052,11 +1577,376 @@ class Mesh:
         return concatenate_meshes(meshes, keep_normals)
 
 
+def _mesh_from_label_subvol(label_subvol_box, resolution, fullres_offset, method, kwargs):
+    """
+    Helper for Mesh.from_label_volume().
+    Compute the mesh for a single label from the given subvolume,
+    and scale/translate it into full-res coordinates.
+    (Defined at module scope so it can be sent to a process pool.)
+    """
+    label, subvol, subvol_box = label_subvol_box
+    subvol_mask = (subvol == label)
+    mesh = Mesh.from_binary_vol(subvol_mask, subvol_box, method, **kwargs)
+
+    # Upscale and translate the mesh into place
+    mesh.vertices_zyx[:] *= resolution
+    mesh.vertices_zyx[:] += fullres_offset
+    mesh.invalidate_caches()
+    return mesh
+
+
+def _decode_tar_member(name_ext_buf):
+    """
+    Helper for Mesh.from_tarfile().
+    Decode a single mesh file, returning (name, mesh),
+    or (name, None) if the file could not be decoded.
+    (Defined at module scope so it can be sent to a process pool.)
+    """
+    name, ext, buf = name_ext_buf
+    try:
+        return name, Mesh.from_buffer(buf, ext)
+    except:
+        logger.error(f"Could not decode {name} ({len(buf)} bytes). Skipping!")
+        return name, None
+
+
+def _mesh_from_block(block_box, method, ensure_halo):
+    """
+    Helper for Mesh.from_binary_blocks().
+    (Defined at module scope so it can be sent to a process pool.)
+    """
+    binary_vol, fullres_box_zyx = block_box
+    return Mesh.from_binary_vol(binary_vol, fullres_box_zyx, method, ensure_halo)
+
+
+def _stitch_block_meshes_streaming(block_meshes, boxes):
+    """
+    Helper for Mesh.from_binary_blocks(..., stitch='streaming').
+
+    Combine the given block meshes into a single mesh, deduplicating the vertices
+    (and faces) in the overlapping regions between neighboring blocks as we go.
+
+    Duplicates can only exist where two blocks' boxes overlap, so for each block,
+    we keep a table of the vertices (and faces) that lie within its overlap with
+    any subsequent neighbor.  When the neighbor's mesh arrives, only those regions
+    are compared.  Each table is discarded once all of the block's neighbors are done.
+
+    Args:
+        block_meshes:
+            iterable of Mesh, in the same order as boxes
+        boxes:
+            array (N, 2, 3), the full-res box of each block
+
+    Returns:
+        Mesh
+    """
+    boxes = np.asarray(boxes)
+    block_neighbors = _box_neighbors(boxes)
+
+    # For each block, the index of its last neighbor, after which its seam table can be dropped.
+    last_neighbors = np.array([n[-1] for n in block_neighbors], dtype=int)
+
+    all_vertices = []
+    all_faces = []
+    num_vertices = 0
+    any_normals = False
+    seam_tables = {}
+
+    MAX_INT = np.iinfo(np.int32).max
+    total_box = np.array([[MAX_INT]*3, [-MAX_INT]*3])
+
+    for i, mesh in enumerate(block_meshes):
+        total_box[0] = np.minimum(total_box[0], mesh.box[0])
+        total_box[1] = np.maximum(total_box[1], mesh.box[1])
+
+        vertices_zyx = mesh.vertices_zyx
+        faces = mesh.faces
+        any_normals |= len(mesh.normals_zyx) > 0
+        del mesh
+
+        # Like the global stitch, drop vertices that were never referenced in the first place
+        reference_flags = np.zeros(len(vertices_zyx), bool)
+        reference_flags[faces.ravel()] = True
+        if not reference_flags.all():
+            vertices_zyx = vertices_zyx[reference_flags]
+            faces = (np.cumsum(reference_flags) - 1)[faces]
+        del reference_flags
+
+        neighbors = block_neighbors[i]
+        prev_neighbors = neighbors[neighbors < i]
+        next_neighbors = neighbors[neighbors > i]
+
+        # Match this block's vertices to those of previous blocks.
+        vertex_ids = np.full(len(vertices_zyx), -1, np.int64)
+        for j in prev_neighbors:
+            table_vertices, table_ids, _ = seam_tables[j]
+            candidates = ((vertices_zyx >= np.maximum(boxes[i, 0], boxes[j, 0])).all(axis=1)
+                          & (vertices_zyx <= np.minimum(boxes[i, 1], boxes[j, 1])).all(axis=1)
+                          & (vertex_ids == -1)).nonzero()[0]
+            matches = _match_rows(vertices_zyx[candidates], table_vertices)
+            vertex_ids[candidates[matches != -1]] = table_ids[matches[matches != -1]]
+
+        # Append the new (unmatched) vertices.
+        new_vertices = (vertex_ids == -1)
+        vertex_ids[new_vertices] = num_vertices + np.arange(new_vertices.sum())
+        num_vertices += new_vertices.sum()
+        all_vertices.append(vertices_zyx[new_vertices])
+
+        # Drop faces which are duplicated within this block (keeping the first one),
+        # or which duplicate faces from previous blocks.
+        # (Only faces whose vertices were all matched can be duplicates of previous faces.)
+        global_faces = vertex_ids[faces]
+        sorted_faces = np.sort(global_faces, axis=1)
+        keep_faces = np.zeros(len(global_faces), bool)
+        keep_faces[np.unique(sorted_faces, axis=0, return_index=True)[1]] = True
+        candidates = (keep_faces & ~new_vertices[faces].any(axis=1)).nonzero()[0]
+        for j in prev_neighbors:
+            _, _, table_faces = seam_tables[j]
+            matches = _match_rows(sorted_faces[candidates], table_faces)
+            keep_faces[candidates[matches != -1]] = False
+        all_faces.append(global_faces[keep_faces])
+
+        # Save this block's seam vertices and faces for the benefit of subsequent neighbors.
+        if len(next_neighbors) > 0:
+            in_seam = np.zeros(len(vertices_zyx), bool)
+            for j in next_neighbors:
+                in_seam |= ((vertices_zyx >= np.maximum(boxes[i, 0], boxes[j, 0])).all(axis=1)
+                            & (vertices_zyx <= np.minimum(boxes[i, 1], boxes[j, 1])).all(axis=1))
+            seam_faces = sorted_faces[keep_faces & in_seam[faces].all(axis=1)]
+            seam_tables[i] = (vertices_zyx[in_seam], vertex_ids[in_seam], seam_faces)
+
+        # Discard the tables we no longer need.
+        for j in [*prev_neighbors, i]:
+            if last_neighbors[j] <= i:
+                seam_tables.pop(j, None)
+
+    if len(all_vertices) == 0:
+        return Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32))
+
+    vertices_zyx = np.concatenate(all_vertices)
+    del all_vertices
+    faces = np.concatenate(all_faces)
+    del all_faces
+
+    mesh = Mesh(vertices_zyx, faces, box=total_box)
+    if any_normals:
+        mesh.recompute_normals(True)
+    return mesh
+
+
+def _box_neighbors(boxes):
+    """
+    Helper for _stitch_block_meshes_streaming().
+
+    For each box, find the boxes which touch or overlap it (including the box itself).
+    Rather than comparing all pairs of boxes, the boxes are sorted by their starting Z coordinate,
+    so only the boxes whose starts fall within reach along Z are compared.
+
+    Args:
+        boxes:
+            array (N, 2, 3)
+
+    Returns:
+        list of N sorted arrays of box indexes
+    """
+    boxes = np.asarray(boxes)
+    if len(boxes) == 0:
+        return []
+
+    order = np.argsort(boxes[:, 0, 0], kind='stable')
+    starts = boxes[order, 0, 0]
+    max_depth = (boxes[:, 1, 0] - boxes[:, 0, 0]).max()
+
+    neighbors = []
+    for box in boxes:
+        # Any box that touches this one must start within [box_start - max_depth, box_stop]
+        lo = np.searchsorted(starts, box[0, 0] - max_depth, 'left')
+        hi = np.searchsorted(starts, box[1, 0], 'right')
+        candidates = order[lo:hi]
+        c_boxes = boxes[candidates]
+        touching = (c_boxes[:, 0] <= box[1]).all(axis=1) & (box[0] <= c_boxes[:, 1]).all(axis=1)
+        neighbors.append(np.sort(candidates[touching]))
+    return neighbors
+
+
+def _seam_vertex_mask(vertices_zyx, block_boxes):
+    """
+    Helper for Mesh.stitch_adjacent_faces(block_boxes=...)
+
+    Return a mask indicating which vertices might lie in the overlap between
+    two (distinct) blocks.  Any two distinct blocks must differ in their
+    extents along at least one axis, so their overlap is contained within
+    the overlap of their (distinct) intervals along that axis.
+    For each axis, we find all such "seam intervals", and flag the vertices within them.
+
+    For a regular grid of blocks, the seam intervals are just narrow slabs
+    around the grid planes.
+    """
+    mask = np.zeros(len(vertices_zyx), bool)
+    for axis in range(3):
+        intervals = np.unique(block_boxes[:, :, axis], axis=0)
+        starts = np.maximum(intervals[:, None, 0], intervals[None, :, 0])
+        stops = np.minimum(intervals[:, None, 1], intervals[None, :, 1])
+        overlapping = (starts <= stops)
+        np.fill_diagonal(overlapping, False)
+        starts = starts[overlapping]
+        stops = stops[overlapping]
+        if len(starts) == 0:
+            continue
+
+        # Merge the seam intervals, so we can search them with searchsorted()
+        order = np.argsort(starts)
+        starts = starts[order]
+        stops = np.maximum.accumulate(stops[order])
+        new_interval = np.ones(len(starts), bool)
+        new_interval[1:] = starts[1:] > stops[:-1]
+        merged_starts = starts[new_interval]
+        merged_stops = stops[np.append(np.flatnonzero(new_interval)[1:] - 1, len(stops) - 1)]
+
+        coords = vertices_zyx[:, axis]
+        i = np.searchsorted(merged_starts, coords, 'right') - 1
+        mask |= (i >= 0) & (coords <= merged_stops[np.maximum(i, 0)])
+    return mask
+
+
+def _match_rows(queries, table):
+    """
+    For each row in queries, find the index of an identical row in table, or -1 if there is none.
+    """
+    matches = np.full(len(queries), -1, np.int64)
+    if len(queries) == 0 or len(table) == 0:
+        return matches
+
+    # Sort the table and queries together.
+    # Since lexsort is stable, within each group of identical rows,
+    # the table's rows come before the queries.
+    combined = np.concatenate((table, queries))
+    order = np.lexsort(combined.T[::-1])
+    sorted_rows = combined[order]
+    new_group = np.ones(len(order), bool)
+    new_group[1:] = (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)
+    group_firsts = order[new_group][np.cumsum(new_group) - 1]
+
+    is_query = (order >= len(table))
+    first_is_table = (group_firsts < len(table))
+    query_rows = order[is_query] - len(table)
+    matches[query_rows] = np.where(first_is_table[is_query], group_firsts[is_query], -1)
+    return matches
+
+
+def simplify_meshes(meshes, fraction, workers=None, executor=None, backend=None,
+                    batch_faces=100_000, compute_normals=True, **kwargs):
+    """
+    Simplify many meshes in-place, via pyfqmr.
+
+    Equivalent to calling ``mesh.simplify(fraction, **kwargs)`` on each mesh,
+    but the meshes are processed in batches to amortize the per-call overhead
+    (small meshes are grouped together until a batch contains at least
+    ``batch_faces`` faces), and the largest meshes are processed first,
+    so that a few huge meshes don't end up as stragglers at the end.
+
+    Args:
+        meshes:
+            A list of Mesh objects, or a dict of them.
+        fraction:
+            The target face count for each mesh, as a fraction of its current face count.
+        workers:
+            How many batches to process at once.
+            For backend='process', the default is the size of the process pool.
+        executor:
+            For backend='process', an optional ``ProcessPoolExecutor`` in which to run pyfqmr.
+            See ``Mesh.simplify()``.
+        backend:
+            Either 'local' or 'process'.  (See ``Mesh.simplify()``.)
+            With the 'local' backend, the decimation itself can't run in parallel,
+            but the subsequent normal computation can.
+            By default, use 'process' if an executor was given or workers > 1, otherwise 'local'.
+        batch_faces:
+            The minimum number of faces per batch.
+        compute_normals:
+            If False, don't compute the normals of the simplified meshes
+            (the meshes are left with no normals).
+        kwargs:
+            Passed to ``pyfqmr.Simplify.simplify_mesh()``.
+
+    Returns:
+        pd.DataFrame with columns ['faces_before', 'faces_after'],
+        indexed by the position (or dict key) of each mesh.
+    """
+    import pandas as pd
+
+    if isinstance(meshes, dict):
+        keys, meshes = list(meshes.keys()), list(meshes.values())
+    else:
+        meshes = list(meshes)
+        keys = range(len(meshes))
+
+    if backend is None:
+        backend = 'process' if (executor is not None or (workers or 0) > 1) else 'local'
+    assert backend in ('local', 'process'), f"Invalid simplify backend: {backend}"
+    if backend == 'process' and workers is None:
+        pool = executor or default_simplify_pool()
+        workers = getattr(pool, '_max_workers', None) or os.cpu_count()
+
+    faces_before = np.fromiter((len(m.faces) for m in meshes), np.int64, len(meshes))
+    if fraction is None or fraction == 1.0:
+        return pd.DataFrame({'faces_before': faces_before, 'faces_after': faces_before}, index=keys)
+
+    # Largest meshes first, grouped into batches of at least batch_faces each.
+    order = np.argsort(-faces_before, kind='stable')
+    batches = []
+    batch = []
+    batch_size = 0
+    for i in order:
+        batch.append(i)
+        batch_size += faces_before[i]
+        if batch_size >= batch_faces:
+            batches.append(batch)
+            batch = []
+            batch_size = 0
+    if batch:
+        batches.append(batch)
+
+    process_batch = functools.partial(_simplify_mesh_batch, fraction=fraction, backend=backend,
+                                      executor=executor, compute_normals=compute_normals, kwargs=kwargs)
+
+    with executor_for(workers) as ex:
+        batch_meshes = ([meshes[i] for i in batch] for batch in batches)
+        for _ in imap_ordered(process_batch, batch_meshes, ex):
+            pass
+
+    faces_after = np.fromiter((len(m.faces) for m in meshes), np.int64, len(meshes))
+    return pd.DataFrame({'faces_before': faces_before, 'faces_after': faces_after}, index=keys)
+
+
+def _simplify_mesh_batch(meshes, fraction, backend, executor, compute_normals, kwargs):
+    """
+    Helper for simplify_meshes()
+    """
+    arrays = [(m.vertices_zyx, m.faces) for m in meshes]
+    targets = [int(fraction * len(f)) for (_, f) in arrays]
+    if backend == 'process':
+        results = simplify_batch_in_subprocess(arrays, targets, executor, **kwargs)
+    else:
+        results = simplify_batch(arrays, targets, **kwargs)
+    del arrays
+
+    for mesh, (vertices_zyx, faces) in zip(meshes, results):
+        mesh._set_simplified(vertices_zyx, faces, compute_normals)
+
+
 def concatenate_meshes(meshes, keep_normals=True):
     """
     Combine the given list of Mesh objects into a single Mesh object,
     renumbering the face vertices as needed, and expanding the bounding box
     to encompass the union of the meshes.
+
+    The mesh data is written directly into the output arrays, in a single pass
+    over the input meshes.  If ``meshes`` is a list (or tuple), the output arrays
+    are allocated up-front.  Otherwise (e.g. a generator), the meshes are consumed
+    one at a time, and the output arrays are grown as needed.
+    Inputs which are compressed with lz4 are decompressed exactly once,
+    and remain compressed afterwards.
     
     Args:
         meshes:
@@ -1070,32 +1960,46 @@ def concatenate_meshes(meshes, keep_normals=True):
     Returns:
         Mesh
     """
-    if not isinstance(meshes, list):
-        meshes = list(meshes)
+    if isinstance(meshes, (list, tuple)):
+        return _concatenate_mesh_list(meshes, keep_normals)
+    return _concatenate_mesh_stream(meshes, keep_normals)
 
-    vertex_counts = np.fromiter((len(mesh.vertices_zyx) for mesh in meshes), np.int64, len(meshes))
-    face_counts = np.fromiter((len(mesh.faces) for mesh in meshes), np.int64, len(meshes))
+
+def _concatenate_mesh_list(meshes, keep_normals):
+    """
+    Helper for concatenate_meshes().
+    Since the meshes are given as a list, we can allocate the output arrays exactly.
+    """
+    counts = np.array([mesh._array_counts() for mesh in meshes], np.int64).reshape(-1, 3)
+    vertex_counts, normals_counts, face_counts = counts.transpose()
 
     if keep_normals:
-        _verify_concatenate_inputs(meshes, vertex_counts)
-        concatenated_normals = np.concatenate( [mesh.normals_zyx for mesh in meshes] )
-    else:
-        concatenated_normals = None
+        _verify_concatenate_inputs(meshes, vertex_counts, normals_counts)
+        keep_normals = normals_counts.any()
 
-    # vertices and normals are simply concatenated
-    concatenated_vertices = np.concatenate( [mesh.vertices_zyx for mesh in meshes] )
-    
-    # Faces need to be renumbered so that they refer to the correct vertices in the combined list.
-    concatenated_faces = np.ndarray((face_counts.sum(), 3), np.uint32)
+    concatenated_vertices = np.empty((vertex_counts.sum(), 3), np.float32)
+    concatenated_normals = np.empty((vertex_counts.sum() if keep_normals else 0, 3), np.float32)
+    concatenated_faces = np.empty((face_counts.sum(), 3), np.uint32)
 
-    vertex_offsets = np.add.accumulate(vertex_counts[:-1])
-    vertex_offsets = np.insert(vertex_offsets, 0, [0])
+    vertex_offset = face_offset = 0
+    for mesh, vertex_count, face_count in zip(meshes, vertex_counts, face_counts):
+        vertices_zyx, normals_zyx, faces = mesh._uncompressed_arrays()
+        next_vertex_offset = vertex_offset + vertex_count
+        next_face_offset = face_offset + face_count
 
-    face_offsets = np.add.accumulate(face_counts[:-1])
-    face_offsets = np.insert(face_offsets, 0, [0])
-    
-    for faces, face_offset, vertex_offset in zip((mesh.faces for mesh in meshes), face_offsets, vertex_offsets):
-        concatenated_faces[face_offset:face_offset+len(faces)] = faces + vertex_offset
+        # vertices and normals are simply concatenated
+        concatenated_vertices[vertex_offset:next_vertex_offset] = vertices_zyx
+        if keep_normals:
+            concatenated_normals[vertex_offset:next_vertex_offset] = normals_zyx
+
+        # Faces need to be renumbered so that they refer to the correct vertices in the combined list.
+        np.add(faces, vertex_offset, out=concatenated_faces[face_offset:next_face_offset], casting='unsafe')
+
+        vertex_offset, face_offset = next_vertex_offset, next_face_offset
+        del vertices_zyx, normals_zyx, faces
+
+    if len(meshes) == 0:
+        return Mesh(concatenated_vertices, concatenated_faces, concatenated_normals)
 
     # bounding box is just the min/max of all bounding coordinates.
     all_boxes = np.stack([mesh.box for mesh in meshes])
@@ -1105,8 +2009,337 @@ def concatenate_meshes(meshes, keep_normals=True):
     return Mesh( concatenated_vertices, concatenated_faces, concatenated_normals, total_box )
 
 
-def _verify_concatenate_inputs(meshes, vertex_counts):
-    normals_counts = np.fromiter((len(mesh.normals_zyx) for mesh in meshes), np.int64, len(meshes))
+def _concatenate_mesh_stream(meshes, keep_normals):
+    """
+    Helper for concatenate_meshes().
+    Consume the meshes one at a time, growing the output arrays as needed.
+    """
+    concatenated_vertices = np.empty((0, 3), np.float32)
+    concatenated_normals = np.empty((0, 3), np.float32)
+    concatenated_faces = np.empty((0, 3), np.uint32)
+    vertex_offset = face_offset = 0
+
+    # Whether or not the meshes have normals is determined by the first non-empty mesh.
+    has_normals = None
+    total_box = None
+
+    for i, mesh in enumerate(meshes):
+        vertices_zyx, normals_zyx, faces = mesh._uncompressed_arrays()
+
+        if keep_normals:
+            has_normals = _check_streamed_normals(i, vertices_zyx, normals_zyx, has_normals)
+
+        next_vertex_offset = vertex_offset + len(vertices_zyx)
+        next_face_offset = face_offset + len(faces)
+
+        concatenated_vertices = _reserve_rows(concatenated_vertices, vertex_offset, next_vertex_offset)
+        concatenated_vertices[vertex_offset:next_vertex_offset] = vertices_zyx
+        if keep_normals and has_normals:
+            concatenated_normals = _reserve_rows(concatenated_normals, vertex_offset, next_vertex_offset)
+            concatenated_normals[vertex_offset:next_vertex_offset] = normals_zyx
+
+        concatenated_faces = _reserve_rows(concatenated_faces, face_offset, next_face_offset)
+        np.add(faces, vertex_offset, out=concatenated_faces[face_offset:next_face_offset], casting='unsafe')
+
+        if total_box is None:
+            total_box = np.array(mesh.box)
+        else:
+            total_box = np.array( [ np.minimum(total_box[0], mesh.box[0]),
+                                    np.maximum(total_box[1], mesh.box[1]) ] )
+
+        vertex_offset, face_offset = next_vertex_offset, next_face_offset
+        del mesh, vertices_zyx, normals_zyx, faces
+
+    # Trim the unused capacity (in-place)
+    concatenated_vertices.resize((vertex_offset, 3), refcheck=False)
+    concatenated_faces.resize((face_offset, 3), refcheck=False)
+    if keep_normals and has_normals:
+        concatenated_normals.resize((vertex_offset, 3), refcheck=False)
+
+    return Mesh( concatenated_vertices, concatenated_faces, concatenated_normals, total_box )
+
+
+def _check_streamed_normals(i, vertices_zyx, normals_zyx, has_normals):
+    """
+    When concatenating a stream of meshes, verify that the i-th mesh has normals
+    if (and only if) the preceding meshes had normals.
+
+    Args:
+        has_normals:
+            Whether or not the preceding meshes had normals,
+            or None if all preceding meshes were empty.
+    Returns:
+        The new value of ``has_normals``.
+    """
+    if len(vertices_zyx) == 0:
+        return has_normals
+
+    mesh_has_normals = (len(normals_zyx) > 0)
+    if has_normals is None:
+        has_normals = mesh_has_normals
+    if len(normals_zyx) not in (0, len(vertices_zyx)) or mesh_has_normals != has_normals:
+        raise RuntimeError(
+            "Mesh normals do not correspond to vertices.\n"
+            "(Either exclude all normals, more make sure they match the vertices in every mesh.)\n"
+            f"Mesh {i} has {len(vertices_zyx)} vertices and {len(normals_zyx)} normals, "
+            f"but the preceding meshes {'had' if has_normals else 'did not have'} normals.")
+    return has_normals
+
+
+def concatenate_meshes_to_disk(meshes, path, keep_normals=True, fmt=None):
+    """
+    Like ``concatenate_meshes()``, but write the combined mesh to disk
+    instead of constructing it in memory.
+
+    The meshes are consumed one at a time (e.g. from a generator),
+    and each one is written to disk before the next is requested,
+    so the combined mesh may be larger than the available RAM.
+    Sections of the output which must be written after the vertices
+    (e.g. the faces) are spooled to temporary files in the output directory
+    and appended to the output at the end.
+
+    Args:
+        meshes:
+            iterable of Mesh objects
+        path:
+            Output path. Either an .ngmesh file, an .obj file,
+            or a directory, into which .npy files will be written:
+            ``vertices_zyx.npy``, ``faces.npy``, and (if there are normals) ``normals_zyx.npy``
+        keep_normals:
+            See ``concatenate_meshes()``.
+            (Normals are never written to .ngmesh files.)
+        fmt:
+            Either 'ngmesh', 'obj', or 'npy'.
+            By default, the format is determined by the extension of the output path,
+            and 'npy' is used if the path has no recognized extension.
+
+    Returns:
+        For 'ngmesh' and 'npy', a ``Mesh`` whose arrays are (copy-on-write) memory-mapped
+        views of the output files, so they are only loaded from disk as needed.
+        For 'obj', None.
+    """
+    if fmt is None:
+        fmt = os.path.splitext(path)[1][1:]
+        if fmt not in ('ngmesh', 'obj'):
+            fmt = 'npy'
+    assert fmt in ('ngmesh', 'obj', 'npy'), f"Unsupported format: {fmt}"
+
+    if fmt == 'npy':
+        os.makedirs(path, exist_ok=True)
+        spool_dir = path
+    else:
+        spool_dir = os.path.dirname(os.path.abspath(path))
+
+    if fmt == 'ngmesh':
+        total_box = _concatenate_meshes_to_ngmesh(meshes, path, spool_dir)
+        vertices_xyz, faces = read_ngmesh(path, mmap=True)
+        return Mesh(vertices_xyz[:,::-1], faces, box=total_box)
+
+    if fmt == 'obj':
+        _concatenate_meshes_to_obj(meshes, path, keep_normals, spool_dir)
+        return None
+
+    has_normals, total_box = _concatenate_meshes_to_npy(meshes, path, keep_normals)
+    vertices_zyx = _mmap_npy(f'{path}/vertices_zyx.npy')
+    faces = _mmap_npy(f'{path}/faces.npy')
+    normals_zyx = None
+    if has_normals:
+        normals_zyx = _mmap_npy(f'{path}/normals_zyx.npy')
+    return Mesh(vertices_zyx, faces, normals_zyx, total_box)
+
+
+def _iter_offset_mesh_arrays(meshes, keep_normals):
+    """
+    Helper for concatenate_meshes_to_disk().
+    For each mesh, yield its vertices, normals (if keeping normals), and faces,
+    with the faces renumbered to refer to the concatenated vertex list.
+    Also yield the running bounding box and whether or not the meshes have normals.
+    """
+    vertex_offset = 0
+    has_normals = None
+    total_box = None
+    for i, mesh in enumerate(meshes):
+        vertices_zyx, normals_zyx, faces = mesh._uncompressed_arrays()
+        if keep_normals:
+            has_normals = _check_streamed_normals(i, vertices_zyx, normals_zyx, has_normals)
+
+        if total_box is None:
+            total_box = np.array(mesh.box)
+        else:
+            total_box = np.array( [ np.minimum(total_box[0], mesh.box[0]),
+                                    np.maximum(total_box[1], mesh.box[1]) ] )
+
+        assert vertex_offset + len(vertices_zyx) <= np.iinfo(np.uint32).max, \
+            "Too many vertices to store in a single mesh"
+        offset_faces = np.add(faces, vertex_offset, dtype=np.uint32, casting='unsafe')
+        vertex_offset += len(vertices_zyx)
+        yield vertices_zyx, normals_zyx, offset_faces, bool(has_normals), total_box
+
+
+def _concatenate_meshes_to_ngmesh(meshes, path, spool_dir):
+    """
+    Helper for concatenate_meshes_to_disk().
+    Write the vertices directly to the output file, and spool the faces
+    to a temporary file, which is appended to the output at the end.
+
+    Returns:
+        The bounding box of the combined mesh.
+    """
+    total_box = None
+    num_vertices = 0
+    with open(path, 'wb') as f, tempfile.TemporaryFile(dir=spool_dir) as faces_file:
+        # Placeholder for the vertex count, which is written at the end.
+        f.write(np.uint32(0))
+        for vertices_zyx, _, faces, _, total_box in _iter_offset_mesh_arrays(meshes, False):
+            f.write(np.ascontiguousarray(vertices_zyx[:,::-1], np.float32))
+            faces_file.write(faces)
+            num_vertices += len(vertices_zyx)
+
+        faces_file.seek(0)
+        shutil.copyfileobj(faces_file, f, 64 * 2**20)
+        f.seek(0)
+        f.write(np.uint32(num_vertices))
+    return total_box
+
+
+def _concatenate_meshes_to_obj(meshes, path, keep_normals, spool_dir):
+    """
+    Helper for concatenate_meshes_to_disk().
+    Write the vertices directly to the output file, and spool the normals and faces
+    to temporary files, which are appended to the output at the end.
+    The output is identical to ``concatenate_meshes(meshes).serialize(path)``.
+    """
+    num_vertices = 0
+    with open(path, 'wb') as f, \
+            tempfile.TemporaryFile(dir=spool_dir) as normals_file, \
+            tempfile.TemporaryFile(dir=spool_dir) as faces_file:
+        f.write(b"# OBJ file\n")
+        for vertices_zyx, normals_zyx, faces, has_normals, _ in _iter_offset_mesh_arrays(meshes, keep_normals):
+            _write_obj_chunks(f, "v {:.7g} {:.7g} {:.7g}\n", vertices_zyx[:,::-1], OBJ_WRITE_CHUNK_SIZE)
+            if has_normals:
+                _write_obj_chunks(normals_file, "vn {:.7g} {:.7g} {:.7g}\n", normals_zyx[:,::-1], OBJ_WRITE_CHUNK_SIZE)
+                _write_obj_chunks(faces_file, "f {}//{} {}//{} {}//{}\n", faces, OBJ_WRITE_CHUNK_SIZE, offset=1, repeat=2)
+            else:
+                _write_obj_chunks(faces_file, "f {} {} {}\n", faces, OBJ_WRITE_CHUNK_SIZE, offset=1)
+            num_vertices += len(vertices_zyx)
+
+        for spool_file in (normals_file, faces_file):
+            spool_file.seek(0)
+            shutil.copyfileobj(spool_file, f, 64 * 2**20)
+
+        # By convention, empty meshes are written as empty files.
+        if num_vertices == 0:
+            f.truncate(0)
+
+
+def _concatenate_meshes_to_npy(meshes, directory, keep_normals):
+    """
+    Helper for concatenate_meshes_to_disk().
+    Write the vertices, faces, and normals to separate .npy files.
+    Since the array shapes aren't known in advance, space is reserved for each file's
+    header, which is written at the end.
+
+    Returns:
+        (has_normals, total_box)
+    """
+    has_normals = False
+    total_box = None
+    num_vertices = num_faces = 0
+    normals_path = f'{directory}/normals_zyx.npy'
+    with open(f'{directory}/vertices_zyx.npy', 'wb') as vertices_file, \
+            open(f'{directory}/faces.npy', 'wb') as faces_file, \
+            open(normals_path, 'wb') as normals_file:
+
+        for f in (vertices_file, faces_file, normals_file):
+            f.write(b'\0' * _NPY_HEADER_SIZE)
+
+        for vertices_zyx, normals_zyx, faces, has_normals, total_box in _iter_offset_mesh_arrays(meshes, keep_normals):
+            vertices_file.write(np.ascontiguousarray(vertices_zyx, np.float32))
+            faces_file.write(faces)
+            if has_normals:
+                normals_file.write(np.ascontiguousarray(normals_zyx, np.float32))
+            num_vertices += len(vertices_zyx)
+            num_faces += len(faces)
+
+        _write_npy_header(vertices_file, np.float32, (num_vertices, 3))
+        _write_npy_header(faces_file, np.uint32, (num_faces, 3))
+        _write_npy_header(normals_file, np.float32, (num_vertices if has_normals else 0, 3))
+
+    if not has_normals:
+        os.unlink(normals_path)
+    return has_normals, total_box
+
+
+# Space reserved for .npy headers which are written after the data.
+# (The header for a 2D array is well under 128 bytes, regardless of its shape.)
+_NPY_HEADER_SIZE = 128
+
+
+def _write_npy_header(f, dtype, shape):
+    """
+    Overwrite the first _NPY_HEADER_SIZE bytes of the given
+    file with a .npy (version 1.0) header, padded with spaces.
+    """
+    header = repr({'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                   'fortran_order': False,
+                   'shape': tuple(map(int, shape))})
+    header_len = _NPY_HEADER_SIZE - len(np.lib.format.MAGIC_PREFIX) - 4
+    header = header.ljust(header_len - 1) + '\n'
+    assert len(header) == header_len
+
+    f.seek(0)
+    f.write(np.lib.format.MAGIC_PREFIX + bytes([1, 0]))
+    f.write(np.uint16(header_len).astype('<u2').tobytes())
+    f.write(header.encode('latin1'))
+    f.seek(0, os.SEEK_END)
+
+
+def _mmap_npy(path):
+    """
+    Memory-map the given .npy file in copy-on-write mode.
+    (Empty arrays can't be memory-mapped, so they are simply loaded.)
+    """
+    if os.path.getsize(path) == _NPY_HEADER_SIZE:
+        return np.load(path)
+    return np.load(path, mmap_mode='c')
+
+
+def _reserve_rows(a, used_rows, required_rows):
+    """
+    Return the given (N,3) array if it has at least ``required_rows`` rows.
+    Otherwise, return a larger array (at least double the size), containing a copy of its first ``used_rows``.
+    """
+    if len(a) >= required_rows:
+        return a
+    new_a = np.empty((max(required_rows, 2*len(a)), 3), a.dtype)
+    new_a[:used_rows] = a[:used_rows]
+    return new_a
+
+
+def _decompress_lz4_items(lz4_items):
+    """
+    Decompress the vertices, normals, and faces arrays that were compressed by ``Mesh._compress_as_lz4()``.
+    """
+    # Note: data was compressed twice, so uncompress twice
+    uncompressed = list(map(lz4.frame.decompress, lz4_items))
+
+    decompress = lambda b: lz4.frame.decompress(b, return_bytearray=True)
+    uncompressed = list(map(decompress, uncompressed))
+    vertices_buf, normals_buf, faces_buf = uncompressed
+    del uncompressed
+
+    vertices_zyx = np.frombuffer(vertices_buf, np.float32).reshape((-1,3))
+    normals_zyx = np.frombuffer(normals_buf, np.float32).reshape((-1,3))
+    faces = np.frombuffer(faces_buf, np.uint32).reshape((-1,3))
+
+    # Should be writeable already
+    vertices_zyx.flags['WRITEABLE'] = True
+    normals_zyx.flags['WRITEABLE'] = True
+    faces.flags['WRITEABLE'] = True
+    return vertices_zyx, normals_zyx, faces
+
+
+def _verify_concatenate_inputs(meshes, vertex_counts, normals_counts):
     if not normals_counts.any() or (vertex_counts == normals_counts).all():
         # Looks good
         return
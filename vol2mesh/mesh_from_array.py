@@ -1,5 +1,6 @@
 import numpy as np
 from .mesh import Mesh
+from .pipeline import Pipeline
 
 def mesh_from_array(volume_zyx,
                     global_offset_zyx=(0,0,0),
@@ -51,17 +52,14 @@ def mesh_from_array(volume_zyx,
 
     mesh = Mesh.from_binary_vol(volume_zyx, box, 'ilastik')
 
+    # The pipeline discards the marching cubes normals,
+    # and computes new ones (if requested) only once, at the end.
+    stages = [('smooth', {'iterations': smoothing_rounds}),
+              ('simplify', {'fraction': simplify_ratio})]
     if compute_normals:
-        # Explicitly discard any normals the mesh had.
-        mesh.normals_zyx = np.zeros( (0,3), dtype=np.float32 )
+        stages.append('normals')
 
-    mesh.laplacian_smooth(smoothing_rounds)
-    mesh.simplify( simplify_ratio )
-    
-    if compute_normals:
-        mesh.recompute_normals()
-
-    serialized_bytes = mesh.serialize(fmt=output_format)
+    serialized_bytes = Pipeline(stages, fmt=output_format)(mesh)
 
     if return_vertex_count:
         return serialized_bytes, len(mesh.vertices_zyx)
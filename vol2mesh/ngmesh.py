@@ -27,7 +27,7 @@ face <uint32>,<uint32>,<uint32>
 import io
 import numpy as np
 
-def read_ngmesh(f, mutable=False):
+def read_ngmesh(f, mutable=False, mmap=False):
     """
     Read vertices and faces from the given binary file object,
     which is in ngmesh format as described above.
@@ -35,13 +35,24 @@ def read_ngmesh(f, mutable=False):
     Args:
         f:
             An open binary file object
+            (or, if mmap=True, a file path is also permitted).
         mutable:
             If True, return mutable arrays (requires an extra copy)
-        
+            Not used if mmap=True.
+        mmap:
+            If True, don't read the file.  Instead, memory-map it,
+            and return arrays which are views of the mapped file.
+            The arrays are mapped in copy-on-write mode: They may be modified,
+            but modifications are never written back to the file.
+            (Only the modified pages are copied into memory.)
+
     Returns:
         (vertices_xyz, faces)
         where vertices_xyz is a 2D array (N,3), in XYZ order.
     """
+    if mmap:
+        return _mmap_ngmesh(f)
+
     num_vertices = np.frombuffer(f.read(4), np.uint32)[0]
     vertices_xyz = np.frombuffer(f.read(int(3*4*num_vertices)), np.float32).reshape(-1, 3)
     faces = np.frombuffer(f.read(), np.uint32).reshape(-1, 3)
@@ -52,6 +63,38 @@ def read_ngmesh(f, mutable=False):
         return vertices_xyz, faces
 
 
+def _mmap_ngmesh(f):
+    """
+    Implementation of read_ngmesh(..., mmap=True)
+    """
+    if isinstance(f, str):
+        with open(f, 'rb') as f:
+            return _mmap_ngmesh(f)
+
+    f.seek(0, io.SEEK_END)
+    file_size = f.tell()
+    f.seek(0)
+
+    num_vertices = int(np.frombuffer(f.read(4), np.uint32)[0])
+    vertices_size = 3*4*num_vertices
+    num_faces = (file_size - 4 - vertices_size) // (3*4)
+    assert num_faces >= 0 and (file_size - 4 - vertices_size) % (3*4) == 0, \
+        "File size is not consistent with the ngmesh format"
+
+    # np.memmap can't map zero-length regions
+    if num_vertices == 0:
+        vertices_xyz = np.zeros((0,3), np.float32)
+    else:
+        vertices_xyz = np.memmap(f, np.float32, 'c', 4, (num_vertices, 3))
+
+    if num_faces == 0:
+        faces = np.zeros((0,3), np.uint32)
+    else:
+        faces = np.memmap(f, np.uint32, 'c', 4 + vertices_size, (num_faces, 3))
+
+    return vertices_xyz, faces
+
+
 def write_ngmesh(vertices_xyz, faces, f_out=None):
     """
     Write the given vertices and faces to the given output path/file,
@@ -98,7 +141,7 @@ def _write_ngmesh(vertices_xyz, faces, f_out):
     f_out.write( faces.astype(np.uint32, 'C', copy=False) )
 
 
-def concatenate_ngmesh_files(paths, output_path):
+def concatenate_ngmesh_files(paths, output_path, streaming=True, chunk_bytes=64 * 2**20):
     """
     Concatenate the ngmesh files into a single, combined file.
 
@@ -111,7 +154,19 @@ def concatenate_ngmesh_files(paths, output_path):
             A list of file paths to .ngmesh files (format described above)
         output_path:
             Where to write the combined .ngmesh file
+        streaming:
+            If True, never load an entire input file into memory.
+            Instead, read only the file headers in a first pass (to determine
+            the vertex counts), then copy the vertex data from each file,
+            followed by the (offset) face data from each file, one chunk at a time.
+            Memory usage is bounded by chunk_bytes, regardless of the input sizes.
+            If False, load all files into memory and write the result all at once.
+        chunk_bytes:
+            In streaming mode, the maximum amount of data to read at once.
     """
+    if streaming:
+        return _concatenate_ngmesh_files_streaming(paths, output_path, chunk_bytes)
+
     all_verts = []
     all_faces = []
     
@@ -130,3 +185,64 @@ def concatenate_ngmesh_files(paths, output_path):
     final_faces = np.concatenate(all_faces)
     
     write_ngmesh(final_verts, final_faces, output_path)
+
+
+def _concatenate_ngmesh_files_streaming(paths, output_path, chunk_bytes):
+    """
+    Implementation of concatenate_ngmesh_files(..., streaming=True)
+    """
+    paths = list(paths)
+
+    # First pass: Read the headers only.
+    vertex_counts = []
+    face_counts = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            header = f.read(4)
+            f.seek(0, io.SEEK_END)
+            file_size = f.tell()
+
+        # By convention, empty files are permitted (as empty meshes)
+        if file_size == 0:
+            vertex_counts.append(0)
+            face_counts.append(0)
+            continue
+
+        num_vertices = int(np.frombuffer(header, np.uint32)[0])
+        face_bytes = file_size - 4 - 12*num_vertices
+        assert face_bytes >= 0 and face_bytes % 12 == 0, f"File is not in ngmesh format: {path}"
+        vertex_counts.append(num_vertices)
+        face_counts.append(face_bytes // 12)
+
+    vertex_offsets = np.cumsum([0, *vertex_counts])
+    assert vertex_offsets[-1] < 2**32, "Too many vertices for the ngmesh format"
+
+    # Read at least one row at a time
+    rows_per_chunk = max(1, chunk_bytes // 12)
+
+    with open(output_path, 'wb') as f_out:
+        f_out.write(np.uint32(vertex_offsets[-1]).tobytes())
+
+        # Vertexes are copied verbatim
+        for path, num_vertices in zip(paths, vertex_counts):
+            if num_vertices == 0:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(4)
+                remaining = 12*num_vertices
+                while remaining:
+                    buf = f.read(min(remaining, 12*rows_per_chunk))
+                    assert buf, f"Unexpected end of file: {path}"
+                    f_out.write(buf)
+                    remaining -= len(buf)
+
+        # Faces must be offset
+        for path, num_vertices, num_faces, vertex_offset in zip(paths, vertex_counts, face_counts, vertex_offsets):
+            if num_faces == 0:
+                continue
+            with open(path, 'rb') as f:
+                f.seek(4 + 12*num_vertices)
+                for start in range(0, num_faces, rows_per_chunk):
+                    count = min(rows_per_chunk, num_faces - start)
+                    faces = np.frombuffer(f.read(12*count), np.uint32) + np.uint32(vertex_offset)
+                    f_out.write(faces.tobytes())
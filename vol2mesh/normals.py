@@ -4,9 +4,17 @@ This file contains functions to compute face normals and vertex normals.
 It contains two versions of each function, one based on numpy, and another based on numba.
 It turns out face normals are faster to compute with plain numpy,
 but vertex normals are faster to compute with numba, IFF you have already computed the face normals.
+(Without numba, vertex normals are accumulated with np.bincount(), which is nearly as fast.)
+
+If numba is available, the default functions use the "parallel" numba kernels at the bottom of this file.
+They use scalar arithmetic (no temporary arrays), release the GIL, and are run in chunks on several threads.
+Each vertex normal is computed by gathering the normals of its adjacent faces
+(via a vertex-to-face index), so the chunks never write to the same vertex.
 """
 import numpy as np
 
+from .util import run_kernel_chunks
+
 try:
     import numba
     _numba_available = True
@@ -43,16 +51,12 @@ def compute_vertex_normals(vertices_zyx, faces, weight_by_face_area=False, face_
     
     Returns: Numpy array (N,3)
     """
+    if _numba_available:
+        return compute_vertex_normals_parallel(vertices_zyx, faces, weight_by_face_area, face_normals)
+
     if face_normals is None:
         face_normals = compute_face_normals_numpy_chunked(vertices_zyx, faces, not weight_by_face_area)
-
-    # numba is slightly faster for vertex normals, but not face normals
-    if _numba_available:
-        assert vertices_zyx.dtype == np.float32, \
-            f"Our numba implementation requires float32 vertices, not {vertices_zyx.dtype}"
-        return compute_vertex_normals_numba(vertices_zyx, faces, weight_by_face_area, face_normals)
-    else:
-        return compute_vertex_normals_numpy(vertices_zyx, faces, weight_by_face_area, face_normals)
+    return compute_vertex_normals_numpy(vertices_zyx, faces, weight_by_face_area, face_normals)
 
 
 def compute_face_normals(vertices_zyx, faces, normalize=False):
@@ -68,8 +72,10 @@ def compute_face_normals(vertices_zyx, faces, normalize=False):
      
     Faces with zero width will be given a normal of [0.0, 0.0, 0.0], regardless of the 'normalize' setting.
     """
-    # numpy is faster than numba for face normals.
-    # Always use numpy.
+    # numpy is faster than the naive numba implementation for face normals,
+    # but not the parallel one.
+    if _numba_available:
+        return compute_face_normals_parallel(vertices_zyx, faces, normalize)
     return compute_face_normals_numpy_chunked(vertices_zyx, faces, normalize)
 
 
@@ -103,6 +109,9 @@ def compute_face_normals_numpy_chunked(vertices_zyx, faces, normalize=False, chu
     """
     Same as compute_face_normals_numpy(), but internally computes the result in chunks to save RAM.
     """
+    if len(faces) <= chunksize:
+        return compute_face_normals_numpy(vertices_zyx, faces, normalize)
+
     normals = []
     for i in range(0, len(faces), chunksize):
         n = compute_face_normals_numpy(vertices_zyx, faces[i:i+chunksize], normalize)
@@ -112,12 +121,40 @@ def compute_face_normals_numpy_chunked(vertices_zyx, faces, normalize=False, chu
 
 def compute_vertex_normals_numpy(vertices_zyx, faces, weight_by_face_area=False, face_normals=None):
     if face_normals is None:
-        face_normals = compute_face_normals_numpy(vertices_zyx, faces, not weight_by_face_area)
+        face_normals = compute_face_normals_numpy_chunked(vertices_zyx, faces, not weight_by_face_area)
 
     # Each vertex normal is the average of the normals from its N adjacent faces.
     # But an easier way to write this is to realize that each face normal contributes
     # to exactly three vertex normals.  So just sum up each face's contributions
     # to its neighboring vertex normals.
+    #
+    # np.bincount() computes such sums much faster than np.add.at(),
+    # but only for one 1D array of weights at a time.
+    # So we call it once for each (corner, component) pair, and accumulate in float64.
+    num_vertices = len(vertices_zyx)
+    face_normals = np.ascontiguousarray(face_normals.T, dtype=np.float64)
+    vertex_normals = np.zeros((3, num_vertices), np.float64)
+    for corners in faces.T:
+        corners = corners.astype(np.intp)
+        for axis in range(3):
+            vertex_normals[axis] += np.bincount(corners, face_normals[axis], minlength=num_vertices)
+    vertex_normals = vertex_normals.T.astype(np.float32, order='C')
+
+    magnitudes = np.linalg.norm(vertex_normals, axis=-1)
+    nonzero_mags = magnitudes != 0
+    vertex_normals[nonzero_mags, :] /= magnitudes[nonzero_mags, None]
+
+    return vertex_normals
+
+
+def compute_vertex_normals_numpy_add_at(vertices_zyx, faces, weight_by_face_area=False, face_normals=None):
+    """
+    Same as compute_vertex_normals_numpy(), but accumulates the face normals with np.add.at().
+    This was the original implementation; it's much slower, but simple.
+    """
+    if face_normals is None:
+        face_normals = compute_face_normals_numpy(vertices_zyx, faces, not weight_by_face_area)
+
     vertex_normals = np.zeros(vertices_zyx.shape, np.float32)
     np.add.at(vertex_normals, faces[:, 0], face_normals)
     np.add.at(vertex_normals, faces[:, 1], face_normals)
@@ -215,3 +252,142 @@ if _numba_available:
                 vn[:] /= magnitude
         
         return vertex_normals
+
+
+    def compute_face_normals_parallel(vertices_zyx, faces, normalize=False):
+        """
+        Same as compute_face_normals_numpy(), but computed in parallel threads (via numba),
+        without allocating any temporary arrays.
+        """
+        face_normals = np.empty(faces.shape, np.float32)
+        run_kernel_chunks(_face_normals_range, len(faces), (vertices_zyx, faces, normalize, face_normals))
+        return face_normals
+
+
+    def compute_vertex_normals_parallel(vertices_zyx, faces, weight_by_face_area=False, face_normals=None, fused=False):
+        """
+        Same as compute_vertex_normals_numpy(), but computed in parallel threads (via numba).
+
+        Each vertex normal is computed by summing the normals of the faces it belongs to.
+
+        If fused=True (and face_normals are not provided), the face normals are computed on-the-fly
+        in the same parallel loop, so no face normal array is allocated at all.
+        That saves RAM, but it's somewhat slower, since each face normal is computed three times.
+        """
+        vertex_normals = np.empty((len(vertices_zyx), 3), np.float32)
+        if len(vertices_zyx) == 0:
+            return vertex_normals
+
+        if face_normals is None and not fused:
+            face_normals = compute_face_normals_parallel(vertices_zyx, faces, not weight_by_face_area)
+
+        offsets, vertex_faces = _vertex_face_index(faces, len(vertices_zyx))
+        if face_normals is None:
+            args = (vertices_zyx, faces, not weight_by_face_area, offsets, vertex_faces, vertex_normals)
+            run_kernel_chunks(_vertex_normals_fused_range, len(vertices_zyx), args)
+        else:
+            args = (face_normals, offsets, vertex_faces, vertex_normals)
+            run_kernel_chunks(_vertex_normals_gathered_range, len(vertices_zyx), args)
+        return vertex_normals
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _face_normal(vertices_zyx, faces, i, normalize):
+        """
+        Compute the normal of face i, as three scalars.
+        """
+        a, b, c = faces[i, 0], faces[i, 1], faces[i, 2]
+        u1 = vertices_zyx[b, 0] - vertices_zyx[a, 0]
+        u2 = vertices_zyx[b, 1] - vertices_zyx[a, 1]
+        u3 = vertices_zyx[b, 2] - vertices_zyx[a, 2]
+        v1 = vertices_zyx[c, 0] - vertices_zyx[a, 0]
+        v2 = vertices_zyx[c, 1] - vertices_zyx[a, 1]
+        v3 = vertices_zyx[c, 2] - vertices_zyx[a, 2]
+
+        # Same as cross(v, u), as in compute_face_normals_numba()
+        n1 = v2*u3 - v3*u2
+        n2 = v3*u1 - v1*u3
+        n3 = v1*u2 - v2*u1
+
+        if normalize:
+            magnitude = np.sqrt(n1*n1 + n2*n2 + n3*n3)
+            if magnitude != 0.0:
+                n1 /= magnitude
+                n2 /= magnitude
+                n3 /= magnitude
+        return n1, n2, n3
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _store_normalized(vertex_normals, v, n1, n2, n3):
+        magnitude = np.sqrt(n1*n1 + n2*n2 + n3*n3)
+        if magnitude != 0.0:
+            n1 /= magnitude
+            n2 /= magnitude
+            n3 /= magnitude
+        vertex_normals[v, 0] = n1
+        vertex_normals[v, 1] = n2
+        vertex_normals[v, 2] = n3
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _vertex_face_index(faces, num_vertices):
+        """
+        Build a CSR-style index of the faces that each vertex belongs to:
+        The faces of vertex v are listed in vertex_faces[offsets[v]:offsets[v+1]]
+        (in increasing order).
+        """
+        offsets = np.zeros(num_vertices + 1, np.int64)
+        for i in range(len(faces)):
+            for j in range(3):
+                offsets[faces[i, j] + 1] += 1
+
+        for v in range(num_vertices):
+            offsets[v+1] += offsets[v]
+
+        positions = offsets[:-1].copy()
+        vertex_faces = np.empty(offsets[-1], np.int64)
+        for i in range(len(faces)):
+            for j in range(3):
+                v = faces[i, j]
+                vertex_faces[positions[v]] = i
+                positions[v] += 1
+
+        return offsets, vertex_faces
+
+    #
+    # The kernels below process a range of faces (or vertices),
+    # so they can be run in parallel threads via run_kernel_chunks().
+    #
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _face_normals_range(vertices_zyx, faces, normalize, face_normals, start, stop):
+        for i in range(start, stop):
+            n1, n2, n3 = _face_normal(vertices_zyx, faces, i, normalize)
+            face_normals[i, 0] = n1
+            face_normals[i, 1] = n2
+            face_normals[i, 2] = n3
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _vertex_normals_gathered_range(face_normals, offsets, vertex_faces, vertex_normals, start, stop):
+        for v in range(start, stop):
+            n1 = n2 = n3 = 0.0
+            for k in range(offsets[v], offsets[v+1]):
+                f = vertex_faces[k]
+                n1 += face_normals[f, 0]
+                n2 += face_normals[f, 1]
+                n3 += face_normals[f, 2]
+            _store_normalized(vertex_normals, v, n1, n2, n3)
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _vertex_normals_fused_range(vertices_zyx, faces, normalize_faces, offsets, vertex_faces, vertex_normals, start, stop):
+        for v in range(start, stop):
+            n1 = n2 = n3 = 0.0
+            for k in range(offsets[v], offsets[v+1]):
+                f1, f2, f3 = _face_normal(vertices_zyx, faces, vertex_faces[k], normalize_faces)
+                n1 += f1
+                n2 += f2
+                n3 += f3
+            _store_normalized(vertex_normals, v, n1, n2, n3)
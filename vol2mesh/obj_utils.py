@@ -2,9 +2,18 @@ import re
 from io import BytesIO
 from pathlib import Path
 import numpy as np
-from numpy.lib.stride_tricks import as_strided
 import pandas as pd
 
+try:
+    import numba
+    _numba_available = True
+except ImportError:
+    _numba_available = False
+
+# How many vertices/normals/faces to format at a time when writing OBJ files.
+OBJ_WRITE_CHUNK_SIZE = 100_000
+
+
 def write_obj(vertices_xyz, faces, normals_xyz=None, output_file=None):
     """
     Generate an OBJ file from the given (binary) data and write it to the given byte stream or file path.
@@ -40,13 +49,14 @@ def write_obj(vertices_xyz, faces, normals_xyz=None, output_file=None):
         if need_close:
             mesh_bytestream.close()
 
-def _write_obj(vertices_xyz, faces, normals_xyz, mesh_bytestream):
+def _write_obj(vertices_xyz, faces, normals_xyz, mesh_bytestream, chunk_size=OBJ_WRITE_CHUNK_SIZE):
     """
     Given lists of vertices and faces, write them to the given stream in .obj format.
     
     vertices_xyz: np.ndarray, shape=(N,3), dtype=float
     faces: np.ndarray, shape=(N,3), dtype=int
     normals_xyz: np.ndarray, shape=(N,3), dtype=float
+    chunk_size: How many elements (rows) to format and write at a time.
     
     Note: Each 'face' consists of 3 indexes, which correspond to indexes in the vertices_xyz.
           The indexes should be 0-based. (They will be converted to 1-based in the OBJ)
@@ -62,21 +72,52 @@ def _write_obj(vertices_xyz, faces, normals_xyz, mesh_bytestream):
 
     # Tips for faster exports
     # https://github.com/mikedh/trimesh/blob/main/trimesh/exchange/README.md
+    #
+    # The elements are formatted in chunks, to avoid expanding the whole mesh into
+    # Python objects (and one giant string) at once.  Converting each chunk via tolist()
+    # is also faster than unpacking the numpy scalars into format() one-by-one.
 
-    mesh_bytestream.write(("v {:.7g} {:.7g} {:.7g}\n" * len(vertices_xyz)).format(*vertices_xyz.ravel()).encode('utf-8'))
+    _write_obj_chunks(mesh_bytestream, "v {:.7g} {:.7g} {:.7g}\n", vertices_xyz, chunk_size)
     if len(normals_xyz) > 0:
-        mesh_bytestream.write(("vn {:.7g} {:.7g} {:.7g}\n" * len(normals_xyz)).format(*normals_xyz.ravel()).encode('utf-8'))
+        _write_obj_chunks(mesh_bytestream, "vn {:.7g} {:.7g} {:.7g}\n", normals_xyz, chunk_size)
 
     # OBJ format: Faces start at index 1 (not 0)
-    faces = faces + 1
     if len(normals_xyz) > 0:
-        faces = as_strided(faces, faces.shape + (2,), faces.strides + (0,), writeable=False)
-        mesh_bytestream.write(("f {}//{} {}//{} {}//{}\n" * len(faces)).format(*faces.flat).encode('utf-8'))
+        # Each vertex index is also used as its normal index.
+        _write_obj_chunks(mesh_bytestream, "f {}//{} {}//{} {}//{}\n", faces, chunk_size, offset=1, repeat=2)
     else:
-        mesh_bytestream.write(("f {} {} {}\n" * len(faces)).format(*faces.ravel()).encode('utf-8'))
+        _write_obj_chunks(mesh_bytestream, "f {} {} {}\n", faces, chunk_size, offset=1)
+
+
+def _write_obj_chunks(mesh_bytestream, line_format, elements, chunk_size, offset=0, repeat=1):
+    """
+    Write the given (N,3) array to the stream, one line per row,
+    formatting at most chunk_size rows at a time.
+
+    Args:
+        line_format:
+            Format string for a single line.
+        offset:
+            Added to each element before formatting (e.g. 1, for face indexes)
+        repeat:
+            How many times each element should be repeated in the line.
+    """
+    full_chunk_format = line_format * chunk_size
+    for start in range(0, len(elements), chunk_size):
+        chunk = elements[start:start+chunk_size]
+        if offset:
+            chunk = chunk + offset
+        if repeat > 1:
+            chunk = np.repeat(chunk, repeat, axis=1)
+
+        if len(chunk) == chunk_size:
+            chunk_format = full_chunk_format
+        else:
+            chunk_format = line_format * len(chunk)
+        mesh_bytestream.write(chunk_format.format(*chunk.ravel().tolist()).encode('utf-8'))
 
 
-def read_obj(mesh_bytestream):
+def read_obj(mesh_bytestream, engine='auto'):
     """
     Read the OBJ file from the given file stream and return the vertexes/faces/normals as numpy arrays.
     
@@ -88,20 +129,56 @@ def read_obj(mesh_bytestream):
         f 20//20 30//30 40//40     # <-- OK
         f 20/1/20 30/2/30 40/3/40  # <-- OK, but texture coordinates will be discarded
         f 20//1 30//2 40//3        # <-- NOT SUPPORTED (out-of-order vertex normals)
-    
+
+        The 'numba' engine is more permissive: It ignores comments and unsupported
+        elements (such as vt lines), supports negative (relative) indices, and splits
+        polygonal faces into triangles (as a "fan").
+        But it is stricter about malformed numbers (and missing coordinates),
+        which are reported as errors rather than parsed as NaN.
+
+    Args:
+        mesh_bytestream:
+            bytes, a file path, or a readable file object
+        engine:
+            Either 'numba' (a compiled single-pass scanner, which is much faster and uses
+            much less RAM) or 'pandas'.  By default, use numba if it's available.
+
     Returns:
         vertices_xyz, faces, normals_xyz
         
         Note that the 'faces' indexes are 0-based
         (python conventions, not OBJ conventions, which start with 1)
     """
+    assert engine in ('auto', 'numba', 'pandas'), f"Invalid engine: {engine}"
+    if engine == 'auto':
+        engine = 'numba' if _numba_available else 'pandas'
+    if engine == 'numba' and not _numba_available:
+        raise RuntimeError("Can't use the 'numba' OBJ engine: numba is not installed.")
+
     if isinstance(mesh_bytestream, bytes):
         mesh_bytes = mesh_bytestream
     elif isinstance(mesh_bytestream, (str, Path)):
-        mesh_bytes = open(mesh_bytestream, 'rb').read()
+        with open(mesh_bytestream, 'rb') as f:
+            mesh_bytes = f.read()
     else:
         mesh_bytes = mesh_bytestream.read()
 
+    if engine == 'numba':
+        vertices_xyz, faces, normals_xyz = _read_obj_numba(mesh_bytes)
+    else:
+        vertices_xyz, faces, normals_xyz = _read_obj_pandas(mesh_bytes)
+
+    if len(faces) > 0 and (faces.max() >= len(vertices_xyz) or faces.min() < 0):
+        bad_index = faces.max() if faces.max() >= len(vertices_xyz) else faces.min()
+        raise RuntimeError(f"Unexpected format: A face referenced vertex {bad_index}, which is out-of-bounds for the vertex list.")
+
+    return vertices_xyz, faces, normals_xyz
+
+
+def _read_obj_pandas(mesh_bytes):
+    """
+    Parse OBJ data via regular expressions and pandas.read_csv()
+    """
     # For faces, remove everything but the vertex index
     mesh_bytes = re.sub(rb'(\d+)/\S+', rb'\1', mesh_bytes)
 
@@ -113,8 +190,267 @@ def read_obj(mesh_bytestream):
 
     # In OBJ, indices start at index 1 (not 0), but we want to use numpy conventions
     faces -= 1
+    return vertices_xyz, faces, normals_xyz
 
-    if len(faces) > 0 and faces.max() >= len(vertices_xyz):
-        raise RuntimeError(f"Unexpected format: A face referenced vertex {faces.max()}, which is out-of-bounds for the vertex list.")
 
+def _read_obj_numba(mesh_bytes):
+    """
+    Parse OBJ data with a compiled scanner:
+    One pass to count the elements, and another to parse them into preallocated arrays.
+    """
+    buf = np.frombuffer(mesh_bytes, np.uint8)
+    nv, nn, nf = _count_obj_elements(buf)
+    vertices_xyz = np.empty((nv, 3), np.float32)
+    normals_xyz = np.empty((nn, 3), np.float32)
+    faces = np.empty((nf, 3), np.int32)
+    bad_pos = _parse_obj_elements(buf, vertices_xyz, normals_xyz, faces)
+    if bad_pos >= 0:
+        line_start = mesh_bytes.rfind(b'\n', 0, bad_pos) + 1
+        line_end = mesh_bytes.find(b'\n', bad_pos)
+        line = mesh_bytes[line_start:line_end if line_end >= 0 else len(mesh_bytes)]
+        line_number = mesh_bytes.count(b'\n', 0, bad_pos) + 1
+        raise RuntimeError(f"Unexpected format: Could not parse line {line_number}: {line.decode('utf-8', 'replace').rstrip()!r}")
     return vertices_xyz, faces, normals_xyz
+
+
+if _numba_available:
+    # Character codes
+    _SPACE, _TAB, _CR, _NL = ord(' '), ord('\t'), ord('\r'), ord('\n')
+    _SLASH, _DOT, _MINUS, _PLUS = ord('/'), ord('.'), ord('-'), ord('+')
+    _ZERO, _NINE, _LOWER_E, _UPPER_E = ord('0'), ord('9'), ord('e'), ord('E')
+    _V, _N, _F = ord('v'), ord('n'), ord('f')
+    _NAN = np.frombuffer(b'nan', np.uint8)
+    _INF = np.frombuffer(b'inf', np.uint8)
+    _INFINITY = np.frombuffer(b'infinity', np.uint8)
+
+    _POWERS_OF_TEN = 10.0 ** np.arange(23)
+
+    @numba.jit(nopython=True, cache=True)
+    def _skip_blanks(buf, i):
+        while i < len(buf) and (buf[i] == _SPACE or buf[i] == _TAB):
+            i += 1
+        return i
+
+    @numba.jit(nopython=True, cache=True)
+    def _skip_line(buf, i):
+        while i < len(buf) and buf[i] != _NL:
+            i += 1
+        return i + 1
+
+    @numba.jit(nopython=True, cache=True)
+    def _is_blank(buf, i):
+        """True if position i is the end of a token (or the end of the buffer)."""
+        return i >= len(buf) or buf[i] == _SPACE or buf[i] == _TAB or buf[i] == _CR or buf[i] == _NL
+
+    @numba.jit(nopython=True, cache=True)
+    def _element_type(buf, i):
+        """
+        Identify the element at position i (the start of a line, after leading blanks).
+        Returns 1 for 'v', 2 for 'vn', 3 for 'f', or 0 for anything else.
+        """
+        if i >= len(buf):
+            return 0
+        if buf[i] == _V:
+            if _is_blank(buf, i+1):
+                return 1
+            if i+1 < len(buf) and buf[i+1] == _N and _is_blank(buf, i+2):
+                return 2
+        elif buf[i] == _F and _is_blank(buf, i+1):
+            return 3
+        return 0
+
+    @numba.jit(nopython=True, cache=True)
+    def _count_obj_elements(buf):
+        nv = nn = nf = 0
+        i = 0
+        while i < len(buf):
+            i = _skip_blanks(buf, i)
+            kind = _element_type(buf, i)
+            if kind == 1:
+                nv += 1
+            elif kind == 2:
+                nn += 1
+            elif kind == 3:
+                # Count the face's corners
+                i += 1
+                corners = 0
+                while True:
+                    i = _skip_blanks(buf, i)
+                    if i >= len(buf) or buf[i] == _CR or buf[i] == _NL:
+                        break
+                    corners += 1
+                    while not _is_blank(buf, i):
+                        i += 1
+                nf += max(corners - 2, 0)
+            i = _skip_line(buf, i)
+        return nv, nn, nf
+
+    @numba.jit(nopython=True, cache=True)
+    def _matches_word(buf, i, word):
+        """True if the (case-insensitive) word is found at position i, followed by a blank."""
+        if i + len(word) > len(buf):
+            return False
+        for k in range(len(word)):
+            # (Setting bit 5 converts ASCII letters to lowercase.)
+            if (buf[i+k] | 0x20) != word[k]:
+                return False
+        return _is_blank(buf, i + len(word))
+
+    @numba.jit(nopython=True, cache=True)
+    def _parse_float(buf, i):
+        """
+        Parse the float at position i (after leading blanks).
+        Returns (value, new_position, ok).
+        If the token is not a valid number (or it's missing), ok is False.
+        Like float(), 'nan', 'inf' and 'infinity' are accepted.
+        """
+        i = _skip_blanks(buf, i)
+        sign = 1.0
+        if i < len(buf) and buf[i] == _MINUS:
+            sign = -1.0
+            i += 1
+        elif i < len(buf) and buf[i] == _PLUS:
+            i += 1
+
+        if _matches_word(buf, i, _NAN):
+            return np.nan, i + len(_NAN), True
+        if _matches_word(buf, i, _INF):
+            return sign * np.inf, i + len(_INF), True
+        if _matches_word(buf, i, _INFINITY):
+            return sign * np.inf, i + len(_INFINITY), True
+
+        mantissa = 0
+        digits = 0
+        any_digits = False
+        exponent = 0
+        while i < len(buf) and _ZERO <= buf[i] <= _NINE:
+            if digits < 18:
+                mantissa = mantissa * 10 + (buf[i] - _ZERO)
+                digits += (mantissa > 0)
+            else:
+                exponent += 1
+            any_digits = True
+            i += 1
+
+        if i < len(buf) and buf[i] == _DOT:
+            i += 1
+            while i < len(buf) and _ZERO <= buf[i] <= _NINE:
+                if digits < 18:
+                    mantissa = mantissa * 10 + (buf[i] - _ZERO)
+                    digits += (mantissa > 0)
+                    exponent -= 1
+                any_digits = True
+                i += 1
+
+        if not any_digits:
+            return 0.0, i, False
+
+        if i < len(buf) and (buf[i] == _LOWER_E or buf[i] == _UPPER_E):
+            i += 1
+            exp_sign = 1
+            if i < len(buf) and buf[i] == _MINUS:
+                exp_sign = -1
+                i += 1
+            elif i < len(buf) and buf[i] == _PLUS:
+                i += 1
+            if i >= len(buf) or not (_ZERO <= buf[i] <= _NINE):
+                return 0.0, i, False
+            e = 0
+            while i < len(buf) and _ZERO <= buf[i] <= _NINE:
+                e = e * 10 + (buf[i] - _ZERO)
+                i += 1
+            exponent += exp_sign * e
+
+        value = float(mantissa)
+        if exponent > 0:
+            while exponent > 22:
+                value *= 1e22
+                exponent -= 22
+            value *= _POWERS_OF_TEN[exponent]
+        elif exponent < 0:
+            exponent = -exponent
+            while exponent > 22:
+                value /= 1e22
+                exponent -= 22
+            value /= _POWERS_OF_TEN[exponent]
+
+        # The whole token must have been consumed
+        return sign * value, i, _is_blank(buf, i)
+
+    @numba.jit(nopython=True, cache=True)
+    def _parse_index(buf, i, num_vertices):
+        """
+        Parse the vertex index of the face corner at position i (after leading blanks),
+        discarding any texture/normal indices (e.g. 10/20/30).
+        Returns (0-based index, new_position, ok).
+        If the vertex index is not a valid integer, ok is False.
+        """
+        sign = 1
+        if buf[i] == _MINUS:
+            sign = -1
+            i += 1
+        index = 0
+        start = i
+        while i < len(buf) and _ZERO <= buf[i] <= _NINE:
+            index = index * 10 + (buf[i] - _ZERO)
+            i += 1
+        if i == start or not (_is_blank(buf, i) or buf[i] == _SLASH):
+            return 0, i, False
+        while not _is_blank(buf, i):
+            i += 1
+
+        # Negative indices are relative to the end of the vertex list (so far).
+        if sign < 0:
+            return num_vertices - index, i, True
+        return index - 1, i, True
+
+    @numba.jit(nopython=True, cache=True)
+    def _parse_obj_elements(buf, vertices_xyz, normals_xyz, faces):
+        """
+        Parse the elements into the given (preallocated) arrays.
+        Returns the position of the first invalid token, or -1 if there were no errors.
+        """
+        v = n = f = 0
+        i = 0
+        while i < len(buf):
+            i = _skip_blanks(buf, i)
+            kind = _element_type(buf, i)
+            if kind == 1 or kind == 2:
+                i += kind
+                for k in range(3):
+                    token_start = _skip_blanks(buf, i)
+                    value, i, ok = _parse_float(buf, i)
+                    if not ok:
+                        return token_start
+                    if kind == 1:
+                        vertices_xyz[v, k] = value
+                    else:
+                        normals_xyz[n, k] = value
+                if kind == 1:
+                    v += 1
+                else:
+                    n += 1
+            elif kind == 3:
+                i += 1
+                corners = 0
+                first = prev = 0
+                while True:
+                    i = _skip_blanks(buf, i)
+                    if i >= len(buf) or buf[i] == _CR or buf[i] == _NL:
+                        break
+                    index, end, ok = _parse_index(buf, i, v)
+                    if not ok:
+                        return i
+                    i = end
+                    if corners == 0:
+                        first = index
+                    elif corners >= 2:
+                        # Triangulate polygons as a fan
+                        faces[f, 0] = first
+                        faces[f, 1] = prev
+                        faces[f, 2] = index
+                        f += 1
+                    prev = index
+                    corners += 1
+            i = _skip_line(buf, i)
+        return -1
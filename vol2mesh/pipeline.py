@@ -0,0 +1,208 @@
+"""
+A declarative chain of mesh processing stages, such as the typical recipe:
+
+    stitch -> smooth -> simplify -> normals -> serialize
+
+Running the stages one by one (via the Mesh methods) does some redundant work:
+``laplacian_smooth()`` and ``simplify()`` each recompute the normals,
+only for the next stage to throw them away.  A Pipeline looks at the whole
+chain up-front, so normals are computed at most once, after the last stage
+that changes the mesh geometry.
+
+Each run records the time (and optionally, the peak memory) of every stage.
+
+Example:
+
+    >>> pipeline = Pipeline([('smooth', {'iterations': 2}),
+    ...                      ('simplify', {'fraction': 0.2}),
+    ...                      'normals'], fmt='drc')
+    >>> drc_bytes = pipeline(mesh)
+    >>> print(pipeline.report())
+"""
+import time
+import logging
+import tracemalloc
+
+from .mesh import Mesh
+
+logger = logging.getLogger(__name__)
+
+#: Stage name -> Mesh method
+PIPELINE_STAGES = {
+    'stitch': 'stitch_adjacent_faces',
+    'smooth': 'laplacian_smooth',
+    'simplify': 'simplify',
+    'normals': 'recompute_normals',
+}
+
+# Stages that change the vertices or faces,
+# which invalidates any normals computed before them.
+_GEOMETRY_STAGES = ('stitch', 'smooth', 'simplify')
+
+# Stages that compute normals unless told otherwise.
+_NORMALS_KWARG_STAGES = ('smooth', 'simplify')
+
+
+class Pipeline:
+    """
+    A chain of in-place mesh processing stages,
+    optionally followed by serialization.
+
+    The result has normals if (and only if) the stages include 'normals',
+    or if the output format requires them (i.e. 'drc').
+    The 'normals' stage is run only once, after the geometry stages,
+    no matter where it appears in the list.
+
+    After each run, per-stage statistics are available in ``Pipeline.stats``
+    (a list of dicts) and via ``Pipeline.report()``.
+    """
+
+    def __init__(self, stages, fmt=None, trace_memory=False):
+        """
+        Args:
+            stages:
+                A list of stage names, or (name, kwargs) pairs.
+                The kwargs are passed to the corresponding Mesh method:
+
+                - 'stitch': ``Mesh.stitch_adjacent_faces()``
+                - 'smooth': ``Mesh.laplacian_smooth()``
+                - 'simplify': ``Mesh.simplify()``
+                - 'normals': ``Mesh.recompute_normals()``
+
+            fmt:
+                If given, serialize the result in this format (see ``Mesh.MESH_FORMATS``)
+                and return the serialized bytes instead of the mesh.
+
+            trace_memory:
+                If True, record the peak memory usage of each stage, via ``tracemalloc``.
+                (Tracing makes the pipeline somewhat slower.)
+        """
+        assert fmt is None or fmt in Mesh.MESH_FORMATS, f"Unknown format: {fmt}"
+        self.stages = []
+        for stage in stages:
+            if isinstance(stage, str):
+                name, kwargs = stage, {}
+            else:
+                name, kwargs = stage
+            assert name in PIPELINE_STAGES, \
+                f"Unknown pipeline stage: {name}.  Choices are: {list(PIPELINE_STAGES)}"
+            assert name not in _NORMALS_KWARG_STAGES or 'compute_normals' not in kwargs, \
+                "Don't pass compute_normals to pipeline stages. Use a 'normals' stage instead."
+            self.stages.append((name, dict(kwargs)))
+
+        self.fmt = fmt
+        self.trace_memory = trace_memory
+        self.plan = self._plan()
+        self.stats = []
+
+    def _plan(self):
+        """
+        Return the list of (name, kwargs) that will actually be executed:
+        The geometry stages (which won't compute normals),
+        followed by a single 'normals' stage (if any were requested).
+        """
+        plan = []
+        normals_kwargs = None
+        for name, kwargs in self.stages:
+            if name == 'normals':
+                # Deferred until after all geometry stages.
+                # (If there are several, the last one's kwargs win.)
+                normals_kwargs = kwargs
+            elif name in _NORMALS_KWARG_STAGES:
+                plan.append((name, {**kwargs, 'compute_normals': False}))
+            else:
+                plan.append((name, kwargs))
+
+        if normals_kwargs is not None:
+            plan.append(('normals', normals_kwargs))
+        return plan
+
+    def __call__(self, mesh, path=None):
+        """
+        Run the pipeline on the given mesh, which is modified in-place.
+
+        Args:
+            mesh:
+                A Mesh
+            path:
+                Optional.  If given, write the result to this file,
+                in the format given by the file extension (rather than self.fmt).
+
+        Returns:
+            The serialized mesh if the pipeline has a fmt (and no path was given),
+            otherwise the mesh.
+        """
+        self.stats = []
+
+        # Any normals we start with would be invalidated (or needlessly updated)
+        # by the first geometry stage.
+        if any(name in _GEOMETRY_STAGES for name, _ in self.plan):
+            mesh.drop_normals()
+
+        started_tracing = False
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+
+        try:
+            for name, kwargs in self.plan:
+                method = getattr(mesh, PIPELINE_STAGES[name])
+                self._run_stage(name, mesh, method, **kwargs)
+
+            if path is not None:
+                self._run_stage('serialize', mesh, mesh.serialize, path)
+                return mesh
+            if self.fmt is not None:
+                return self._run_stage('serialize', mesh, mesh.serialize, fmt=self.fmt)
+            return mesh
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+
+    def _run_stage(self, name, mesh, f, *args, **kwargs):
+        """
+        Call f(*args, **kwargs), record its statistics, and return its result.
+        """
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        result = f(*args, **kwargs)
+        seconds = time.perf_counter() - start
+
+        peak_bytes = None
+        if self.trace_memory:
+            peak_bytes = tracemalloc.get_traced_memory()[1] - start_bytes
+
+        stats = {
+            'stage': name,
+            'seconds': seconds,
+            'vertices': len(mesh.vertices_zyx),
+            'faces': len(mesh.faces),
+            'array_bytes': mesh.uncompressed_size(),
+            'peak_bytes': peak_bytes,
+        }
+        if name == 'serialize' and isinstance(result, bytes):
+            stats['output_bytes'] = len(result)
+
+        self.stats.append(stats)
+        logger.debug(f"Pipeline stage '{name}' took {seconds:.3f}s "
+                     f"({stats['vertices']} vertices, {stats['faces']} faces)")
+        return result
+
+    def report(self):
+        """
+        Return a table (as a string) of the statistics from the most recent run.
+        The memory columns are in MiB.  The 'peak' column is the peak memory
+        allocated during each stage (beyond what was allocated beforehand),
+        which is only available if trace_memory=True.
+        """
+        lines = [f"{'stage':>10} {'seconds':>8} {'vertices':>10} {'faces':>10} {'arrays':>8} {'peak':>8}"]
+        for s in self.stats:
+            peak = '' if s['peak_bytes'] is None else f"{s['peak_bytes'] / 2**20:.1f}"
+            lines.append(f"{s['stage']:>10} {s['seconds']:8.3f} {s['vertices']:10d} {s['faces']:10d} "
+                         f"{s['array_bytes'] / 2**20:8.1f} {peak:>8}")
+        total = sum(s['seconds'] for s in self.stats)
+        lines.append(f"{'total':>10} {total:8.3f}")
+        return '\n'.join(lines)
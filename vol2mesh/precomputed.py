@@ -0,0 +1,443 @@
+"""
+Functions to write meshes in neuroglancer's "precomputed" multi-resolution format
+(``neuroglancer_multilod_draco``), in which each level of detail (LOD) is divided into
+fragments on an octree grid, so that neuroglancer only needs to fetch the fragments in view,
+at the resolution it needs.
+
+For each segment, two files are written:
+
+- ``<segment_id>.index``: The manifest, which lists the fragments of each LOD and their sizes.
+- ``<segment_id>``: The concatenated fragment data, in the same order as the manifest.
+
+Additionally, the directory must contain an ``info`` file, which specifies the
+vertex quantization bits (shared by all segments).  See ``write_precomputed_info()``.
+
+Each fragment is a Draco-encoded mesh whose vertex positions are integers in the
+range ``[0, 2**vertex_quantization_bits - 1]``, relative to the fragment's grid cell.
+For lod ``L``, the grid cells have shape ``chunk_shape * 2**L``.
+
+Note:
+    Neuroglancer uses XYZ order, but (as elsewhere in vol2mesh),
+    the arguments to these functions (chunk_shape_zyx, grid_origin_zyx) are given in ZYX order.
+
+Format reference:
+    https://github.com/google/neuroglancer/blob/master/src/datasource/precomputed/meshes.md
+
+Requires DracoPy.
+"""
+import os
+import json
+
+import numpy as np
+
+try:
+    import DracoPy
+    _dracopy_available = True
+except ImportError:
+    _dracopy_available = False
+
+from .util import factorize_rows
+
+
+def write_precomputed_info(directory, vertex_quantization_bits=10, transform=None, lod_scale_multiplier=1.0):
+    """
+    Write the ``info`` file for a directory of multi-resolution meshes.
+
+    Args:
+        directory:
+            Where to write the info file.
+        vertex_quantization_bits:
+            Either 10 or 16.  Must match the value used to encode the meshes.
+        transform:
+            Optional 3x4 matrix (XYZ order), which maps the stored mesh coordinates
+            to the viewer's coordinate space.  By default, the identity.
+        lod_scale_multiplier:
+            Scales the ``lod_scales`` of every mesh in the directory.
+    """
+    if transform is None:
+        transform = np.eye(3, 4)
+    transform = np.asarray(transform, np.float64)
+    assert transform.shape == (3, 4)
+
+    info = {
+        "@type": "neuroglancer_multilod_draco",
+        "vertex_quantization_bits": int(vertex_quantization_bits),
+        "transform": transform.ravel().tolist(),
+        "lod_scale_multiplier": float(lod_scale_multiplier),
+    }
+    os.makedirs(directory, exist_ok=True)
+    with open(f"{directory}/info", 'w') as f:
+        json.dump(info, f, indent=2)
+
+
+def write_precomputed_multires(meshes, directory, segment_id, lod_fractions=None, chunk_shape_zyx=None,
+                               grid_origin_zyx=None, vertex_quantization_bits=10, lod_scales=None,
+                               compression_level=1, write_info=None):
+    """
+    Write the given mesh (or list of LOD meshes) to the given directory
+    in neuroglancer's multi-resolution format.
+
+    Args:
+        meshes, lod_fractions, chunk_shape_zyx, grid_origin_zyx, vertex_quantization_bits, lod_scales, compression_level:
+            See ``encode_precomputed_multires()``.
+        directory:
+            Where to write the manifest and fragment data.
+        segment_id:
+            The segment ID, which determines the file names.
+        write_info:
+            Whether or not to write the directory's ``info`` file (with an identity transform).
+            By default, write it only if it doesn't exist yet.
+    """
+    manifest, data = encode_precomputed_multires(
+        meshes, lod_fractions, chunk_shape_zyx, grid_origin_zyx,
+        vertex_quantization_bits, lod_scales, compression_level)
+
+    os.makedirs(directory, exist_ok=True)
+    if write_info or (write_info is None and not os.path.exists(f"{directory}/info")):
+        write_precomputed_info(directory, vertex_quantization_bits)
+
+    with open(f"{directory}/{segment_id}", 'wb') as f:
+        f.write(data)
+    with open(f"{directory}/{segment_id}.index", 'wb') as f:
+        f.write(manifest)
+
+
+def encode_precomputed_multires(meshes, lod_fractions=None, chunk_shape_zyx=None, grid_origin_zyx=None,
+                                vertex_quantization_bits=10, lod_scales=None, compression_level=1):
+    """
+    Encode the given mesh (or list of LOD meshes) in neuroglancer's multi-resolution format.
+
+    Args:
+        meshes:
+            Either a single Mesh or a list of Meshes (one per LOD, finest first).
+        lod_fractions:
+            If a single Mesh is given, it can be decimated into multiple LODs via
+            ``Mesh.build_lod_pyramid(lod_fractions)``, e.g. ``[1.0, 0.25, 0.05]``.
+            Otherwise, the mesh is written as a single LOD.
+        chunk_shape_zyx:
+            The shape of the fragment grid cells at lod 0.
+            By default, the cell shape is chosen such that the coarsest LOD
+            consists of a single fragment that encompasses the entire mesh.
+        grid_origin_zyx:
+            The origin of the fragment grid.
+            By default, the lower corner of the meshes' bounding box.
+        vertex_quantization_bits:
+            Either 10 or 16.
+        lod_scales:
+            The scale at which neuroglancer should switch to each LOD.
+            By default, ``2**lod``.
+        compression_level:
+            The Draco compression level (0-10).
+
+    Returns:
+        (manifest_bytes, data_bytes)
+    """
+    assert _dracopy_available, "Can't encode multi-resolution meshes: DracoPy is not installed."
+    assert vertex_quantization_bits in (10, 16)
+
+    if not isinstance(meshes, (list, tuple)):
+        if lod_fractions is None:
+            meshes = [meshes]
+        else:
+            meshes = meshes.build_lod_pyramid(lod_fractions, compute_normals=False)
+
+    num_lods = len(meshes)
+    assert num_lods > 0
+    if lod_scales is None:
+        lod_scales = 2.0 ** np.arange(num_lods)
+    lod_scales = np.asarray(lod_scales, np.float32)
+    assert lod_scales.shape == (num_lods,)
+
+    vertices_xyz = [m.vertices_zyx[:, ::-1] for m in meshes]
+    grid_origin_xyz, chunk_shape_xyz = _default_grid(vertices_xyz, grid_origin_zyx, chunk_shape_zyx)
+
+    positions = []
+    fragments = []
+    for lod, (v, mesh) in enumerate(zip(vertices_xyz, meshes)):
+        cell_shape = chunk_shape_xyz * 2**lod
+        lod_fragments = fragment_mesh(v, mesh.faces, grid_origin_xyz, cell_shape, vertex_quantization_bits)
+        positions.append(np.array([p for p, _, _ in lod_fragments], np.uint32).reshape(-1, 3))
+        fragments.append({tuple(p): (q, f) for p, q, f in lod_fragments})
+
+    positions = _add_parent_positions(positions)
+
+    qrange = 2**vertex_quantization_bits - 1
+    data = []
+    fragment_sizes = []
+    for lod in range(num_lods):
+        sizes = []
+        for p in positions[lod]:
+            try:
+                q, f = fragments[lod][tuple(p)]
+            except KeyError:
+                # Empty fragment (only present as a parent of finer fragments)
+                sizes.append(0)
+                continue
+            buf = DracoPy.encode(q.astype(np.float32), f, quantization_bits=vertex_quantization_bits,
+                                 quantization_range=qrange, quantization_origin=[0, 0, 0],
+                                 compression_level=compression_level)
+            data.append(buf)
+            sizes.append(len(buf))
+        fragment_sizes.append(np.array(sizes, np.uint32))
+
+    manifest = _encode_manifest(chunk_shape_xyz, grid_origin_xyz, lod_scales, positions, fragment_sizes)
+    return manifest, b''.join(data)
+
+
+def fragment_mesh(vertices_xyz, faces, grid_origin_xyz, cell_shape_xyz, vertex_quantization_bits=10):
+    """
+    Divide the given mesh into fragments, according to the given grid.
+    Faces which cross the grid planes are split along the planes.
+
+    Args:
+        vertices_xyz:
+            Array (N,3)
+        faces:
+            Array (M,3)
+        grid_origin_xyz:
+            The grid origin
+        cell_shape_xyz:
+            The grid cell shape
+        vertex_quantization_bits:
+            How many bits to use for the quantized vertex positions.
+
+    Returns:
+        List of (position_xyz, quantized_vertices_xyz, faces), one for each non-empty fragment,
+        in Morton order.  The quantized vertices are integers in the range [0, 2**bits - 1],
+        relative to the fragment's grid cell.
+    """
+    grid_origin_xyz = np.asarray(grid_origin_xyz, np.float64)
+    cell_shape_xyz = np.asarray(cell_shape_xyz, np.float64)
+    vertices_xyz = np.asarray(vertices_xyz, np.float64)
+    faces = np.asarray(faces, np.int64)
+    if len(faces) == 0:
+        return []
+
+    for axis in range(3):
+        vertices_xyz, faces = _split_faces_along_axis(vertices_xyz, faces, axis,
+                                                      grid_origin_xyz[axis], cell_shape_xyz[axis])
+
+    # Weld the new vertices and drop the degenerate faces produced during splitting.
+    codes, first_indexes = factorize_rows(vertices_xyz)
+    vertices_xyz = vertices_xyz[first_indexes]
+    faces = codes[faces]
+    faces = faces[(faces[:, 0] != faces[:, 1]) & (faces[:, 1] != faces[:, 2]) & (faces[:, 2] != faces[:, 0])]
+    if len(faces) == 0:
+        return []
+
+    rel = (vertices_xyz - grid_origin_xyz) / cell_shape_xyz
+    cells = np.floor(rel[faces].mean(axis=1)).astype(np.int64)
+    assert (cells >= 0).all(), "Mesh extends below the grid origin"
+
+    codes = morton_codes(cells)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    faces = faces[order]
+    cells = cells[order]
+    group_starts = np.flatnonzero(np.diff(codes, prepend=-1))
+    group_stops = np.append(group_starts[1:], len(codes))
+
+    qrange = 2**vertex_quantization_bits - 1
+    fragments = []
+    for start, stop in zip(group_starts, group_stops):
+        cell = cells[start]
+        vertex_ids, local_faces = np.unique(faces[start:stop], return_inverse=True)
+        q = np.round((rel[vertex_ids] - cell) * qrange)
+        q = np.clip(q, 0, qrange).astype(np.uint32)
+        fragments.append((cell.astype(np.uint32), q, local_faces.reshape(-1, 3).astype(np.uint32)))
+    return fragments
+
+
+def morton_codes(positions):
+    """
+    Compute the Morton (Z-order) code for each of the given 3D (XYZ) grid positions.
+    X occupies the least significant bit of each triplet.
+    """
+    positions = np.asarray(positions, np.uint64)
+    assert positions.max(initial=0) < 2**21
+    codes = np.zeros(len(positions), np.uint64)
+    for bit in range(21):
+        for axis in range(3):
+            b = (positions[:, axis] >> np.uint64(bit)) & np.uint64(1)
+            codes |= b << np.uint64(3 * bit + axis)
+    return codes
+
+
+def _default_grid(vertices_xyz, grid_origin_zyx, chunk_shape_zyx):
+    num_lods = len(vertices_xyz)
+    nonempty = [v for v in vertices_xyz if len(v)]
+    if nonempty:
+        lo = np.min([v.min(axis=0) for v in nonempty], axis=0).astype(np.float64)
+        hi = np.max([v.max(axis=0) for v in nonempty], axis=0).astype(np.float64)
+    else:
+        lo = hi = np.zeros(3)
+
+    if grid_origin_zyx is None:
+        grid_origin_xyz = lo
+    else:
+        grid_origin_xyz = np.asarray(grid_origin_zyx, np.float64)[::-1]
+
+    if chunk_shape_zyx is None:
+        # Pad slightly, so that no vertices lie exactly on the upper edge of the coarsest cell.
+        extent = np.maximum(hi - grid_origin_xyz, 1.0) * (1 + 1e-6)
+        chunk_shape_xyz = extent / 2**(num_lods - 1)
+    else:
+        chunk_shape_xyz = np.asarray(chunk_shape_zyx, np.float64)[::-1]
+
+    # Use float32 values throughout, since that's what the manifest will contain.
+    return grid_origin_xyz.astype(np.float32).astype(np.float64), chunk_shape_xyz.astype(np.float32).astype(np.float64)
+
+
+def _split_faces_along_axis(vertices, faces, axis, origin, cell_size, max_passes=1000):
+    """
+    Split the faces that cross any grid planes along the given axis,
+    so that every face lies within a single grid cell (along this axis).
+
+    Each pass splits each crossing face at one plane, into three faces,
+    some of which may be degenerate if a vertex happened to lie on the plane.
+    Two new vertices are appended for each split face.
+    """
+    eps = 1e-6
+    for _ in range(max_passes):
+        rel = (vertices[:, axis] - origin) / cell_size
+        corners = rel[faces]
+        cells = np.floor(corners.mean(axis=1))
+        below = corners.min(axis=1) < cells - eps
+        above = corners.max(axis=1) > cells + 1 + eps
+        crossing = (below | above).nonzero()[0]
+        if len(crossing) == 0:
+            break
+
+        planes = np.where(below[crossing], cells[crossing], cells[crossing] + 1)
+        d = corners[crossing] - planes[:, None]
+
+        # Rotate each face so that its first corner is alone on its side of the plane.
+        neg = (d < 0)
+        lone = np.where(neg.sum(axis=1) == 1, neg.argmax(axis=1), neg.argmin(axis=1))
+        rotation = (lone[:, None] + np.arange(3)) % 3
+        a, b, c = np.take_along_axis(faces[crossing], rotation, axis=1).T
+
+        plane_coords = origin + planes * cell_size
+        p_ab = _edge_plane_intersection(vertices, a, b, rel, planes, axis, plane_coords)
+        p_ac = _edge_plane_intersection(vertices, a, c, rel, planes, axis, plane_coords)
+
+        n = len(vertices)
+        k = len(crossing)
+        ab = np.arange(n, n + k)
+        ac = np.arange(n + k, n + 2*k)
+        vertices = np.concatenate((vertices, p_ab, p_ac))
+
+        new_faces = np.concatenate((np.stack((a, ab, ac), axis=1),
+                                    np.stack((ab, b, c), axis=1),
+                                    np.stack((ab, c, ac), axis=1)))
+        keep = np.ones(len(faces), bool)
+        keep[crossing] = False
+        faces = np.concatenate((faces[keep], new_faces))
+    else:
+        raise RuntimeError("Failed to split mesh faces along grid planes")
+
+    return vertices, faces
+
+
+def _edge_plane_intersection(vertices, i, j, rel, planes, axis, plane_coords):
+    """
+    Compute the points at which the given edges (i,j) cross the given planes.
+    The endpoints are ordered by vertex ID, so that the two faces
+    which share an edge compute exactly the same intersection point.
+    """
+    lo = np.minimum(i, j)
+    hi = np.maximum(i, j)
+    d_lo = rel[lo] - planes
+    d_hi = rel[hi] - planes
+    t = d_lo / (d_lo - d_hi)
+    points = vertices[lo] + t[:, None] * (vertices[hi] - vertices[lo])
+    points[:, axis] = plane_coords
+    return points
+
+
+def _add_parent_positions(positions):
+    """
+    Neuroglancer requires that each fragment's parent (in the next LOD)
+    is listed in the manifest, even if it has no data.
+    Add the missing parents, and sort each LOD's positions in Morton order.
+    """
+    result = []
+    for lod, p in enumerate(positions):
+        if lod > 0:
+            p = np.concatenate((p, result[-1] // 2))
+        p = np.unique(p.reshape(-1, 3), axis=0).astype(np.uint32)
+        p = p[np.argsort(morton_codes(p), kind='stable')]
+        result.append(p)
+    return result
+
+
+def _encode_manifest(chunk_shape_xyz, grid_origin_xyz, lod_scales, positions, fragment_sizes):
+    """
+    Encode the manifest (.index file) for a multi-resolution mesh.
+
+    Layout (all little-endian):
+
+        chunk_shape: float32[3]
+        grid_origin: float32[3]
+        num_lods: uint32
+        lod_scales: float32[num_lods]
+        vertex_offsets: float32[num_lods, 3]
+        num_fragments_per_lod: uint32[num_lods]
+        for each lod:
+            fragment_positions: uint32[3, num_fragments]
+            fragment_offsets: uint32[num_fragments]  (The size of each fragment's data)
+    """
+    num_lods = len(positions)
+    parts = [
+        np.asarray(chunk_shape_xyz, '<f4').tobytes(),
+        np.asarray(grid_origin_xyz, '<f4').tobytes(),
+        np.uint32(num_lods).astype('<u4').tobytes(),
+        np.asarray(lod_scales, '<f4').tobytes(),
+        np.zeros((num_lods, 3), '<f4').tobytes(),
+        np.array([len(p) for p in positions], '<u4').tobytes(),
+    ]
+    for p, sizes in zip(positions, fragment_sizes):
+        parts.append(np.ascontiguousarray(p.T, '<u4').tobytes())
+        parts.append(np.asarray(sizes, '<u4').tobytes())
+    return b''.join(parts)
+
+
+def decode_manifest(manifest):
+    """
+    Decode a multi-resolution mesh manifest (.index file), as encoded by ``_encode_manifest()``.
+
+    Returns:
+        dict with keys: chunk_shape, grid_origin, lod_scales, vertex_offsets,
+        fragment_positions (list of arrays, one per lod), and fragment_offsets (list of arrays)
+        (All in XYZ order.)
+    """
+    buf = memoryview(manifest)
+    chunk_shape = np.frombuffer(buf, '<f4', 3, 0)
+    grid_origin = np.frombuffer(buf, '<f4', 3, 12)
+    num_lods = int(np.frombuffer(buf, '<u4', 1, 24)[0])
+    offset = 28
+    lod_scales = np.frombuffer(buf, '<f4', num_lods, offset)
+    offset += 4 * num_lods
+    vertex_offsets = np.frombuffer(buf, '<f4', 3 * num_lods, offset).reshape(num_lods, 3)
+    offset += 12 * num_lods
+    num_fragments = np.frombuffer(buf, '<u4', num_lods, offset)
+    offset += 4 * num_lods
+
+    fragment_positions = []
+    fragment_offsets = []
+    for n in num_fragments:
+        n = int(n)
+        fragment_positions.append(np.frombuffer(buf, '<u4', 3 * n, offset).reshape(3, n).T)
+        offset += 12 * n
+        fragment_offsets.append(np.frombuffer(buf, '<u4', n, offset))
+        offset += 4 * n
+    assert offset == len(buf), "Manifest has unexpected trailing data"
+
+    return {
+        'chunk_shape': chunk_shape,
+        'grid_origin': grid_origin,
+        'lod_scales': lod_scales,
+        'vertex_offsets': vertex_offsets,
+        'fragment_positions': fragment_positions,
+        'fragment_offsets': fragment_offsets,
+    }
@@ -0,0 +1,234 @@
+"""
+Mesh decimation via pyfqmr.
+
+pyfqmr is not thread-safe (as of v0.3.0), since it stores the mesh vertices and faces
+in a global variable.  Within a single process, all decimation is serialized via ``PYFQMR_LOCK``.
+
+To decimate several meshes concurrently, use ``simplify_arrays_in_subprocess()``,
+which runs pyfqmr in a pool of worker processes.  The vertex and face arrays are handed
+to the worker via shared memory (rather than pickled), and the worker writes its results
+back into the same shared memory segment.  (Decimation never increases the number of
+vertices or faces, so the input segment is always large enough to hold the output.)
+"""
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pyfqmr
+
+PYFQMR_LOCK = threading.Lock()
+
+DEFAULT_PYFQMR_KWARGS = {
+    'aggressiveness': 7,
+    'preserve_border': True,
+    'lossless': False
+}
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def simplify_arrays(vertices_zyx, faces, target_face_count, **kwargs):
+    """
+    Decimate the given mesh (in this process) via pyfqmr.
+
+    Args:
+        vertices_zyx:
+            Array (N,3)
+        faces:
+            Array (M,3)
+        target_face_count:
+            How many faces the result should have (approximately).
+        kwargs:
+            Passed to ``pyfqmr.Simplify.simplify_mesh()``.
+            By default, we use aggressiveness=7, preserve_border=True, lossless=False.
+
+    Returns:
+        (vertices_zyx, faces), as returned by pyfqmr.
+    """
+    return simplify_batch([(vertices_zyx, faces)], [target_face_count], **kwargs)[0]
+
+
+def simplify_batch(arrays, target_face_counts, **kwargs):
+    """
+    Decimate several meshes (in this process) via pyfqmr.
+    Equivalent to calling ``simplify_arrays()`` for each mesh,
+    but the lock is acquired only once, and the pyfqmr simplifier is reused.
+
+    Args:
+        arrays:
+            A list of (vertices_zyx, faces) pairs
+        target_face_counts:
+            A list of target face counts, one per mesh.
+        kwargs:
+            See ``simplify_arrays()``
+
+    Returns:
+        A list of (vertices_zyx, faces) pairs.
+        (Meshes without any faces are returned as-is.)
+    """
+    _kwargs = {**DEFAULT_PYFQMR_KWARGS, **kwargs}
+    results = []
+    with PYFQMR_LOCK:
+        simplifier = pyfqmr.Simplify()
+        for (vertices_zyx, faces), target_face_count in zip(arrays, target_face_counts):
+            if len(faces) == 0:
+                results.append((vertices_zyx, faces))
+                continue
+            simplifier.setMesh(vertices_zyx, faces)
+            simplifier.simplify_mesh(target_face_count, **_kwargs)
+            vertices_zyx, faces, _face_normals = simplifier.getMesh()
+            results.append((vertices_zyx, faces))
+    return results
+
+
+def simplify_arrays_in_subprocess(vertices_zyx, faces, target_face_count, executor=None, **kwargs):
+    """
+    Same as ``simplify_arrays()``, but run pyfqmr in a worker process,
+    so that multiple meshes can be decimated concurrently.
+    (For example, call this function from several threads at once.)
+
+    Args:
+        vertices_zyx, faces, target_face_count, kwargs:
+            See ``simplify_arrays()``
+        executor:
+            A ``ProcessPoolExecutor`` to use.
+            By default, a module-wide pool of ``os.cpu_count()`` worker processes is used.
+            (It is created upon first use.)
+
+    Returns:
+        (vertices_zyx, faces), as float32 and int32, respectively.
+    """
+    return simplify_batch_in_subprocess([(vertices_zyx, faces)], [target_face_count], executor, **kwargs)[0]
+
+
+def simplify_batch_in_subprocess(arrays, target_face_counts, executor=None, **kwargs):
+    """
+    Same as ``simplify_batch()``, but run pyfqmr in a worker process.
+    All meshes in the batch are transferred via a single shared memory segment,
+    and decimated in a single task.
+
+    Args:
+        arrays, target_face_counts, kwargs:
+            See ``simplify_batch()``
+        executor:
+            See ``simplify_arrays_in_subprocess()``
+
+    Returns:
+        A list of (vertices_zyx, faces) pairs, as float32 and int32, respectively.
+    """
+    if executor is None:
+        executor = default_simplify_pool()
+
+    arrays = [(np.asarray(v, dtype=np.float32), np.asarray(f)) for v, f in arrays]
+    layout = []
+    offset = 0
+    for vertices_zyx, faces in arrays:
+        assert faces.dtype.itemsize == 4, f"Unsupported faces dtype: {faces.dtype}"
+        layout.append((offset, len(vertices_zyx), len(faces), faces.dtype.str))
+        offset += vertices_zyx.nbytes + faces.nbytes
+
+    if offset == 0:
+        return simplify_batch(arrays, target_face_counts, **kwargs)
+
+    shm = SharedMemory(create=True, size=offset)
+    try:
+        for (vertices_zyx, faces), (offset, nv, nf, faces_dtype) in zip(arrays, layout):
+            shared_vertices, shared_faces = _shared_arrays(shm, offset, nv, nf, faces_dtype)
+            shared_vertices[:] = vertices_zyx
+            shared_faces[:] = faces
+            del shared_vertices, shared_faces
+        del arrays
+
+        future = executor.submit(_simplify_shared, shm.name, layout, list(target_face_counts), kwargs)
+        new_counts = future.result()
+
+        results = []
+        for (offset, nv, nf, _), (new_nv, new_nf) in zip(layout, new_counts):
+            shared_vertices, shared_faces = _shared_arrays(shm, offset, nv, nf, np.int32)
+            results.append((shared_vertices[:new_nv].copy(), shared_faces[:new_nf].copy()))
+            del shared_vertices, shared_faces
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return results
+
+
+def default_simplify_pool():
+    """
+    Return the module-wide process pool used by ``simplify_arrays_in_subprocess()``,
+    creating it if necessary.
+
+    The pool uses the 'spawn' start method, since forking a process
+    that is running other threads is not safe.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            ctx = multiprocessing.get_context('spawn')
+            _default_pool = ProcessPoolExecutor(os.cpu_count() or 1, mp_context=ctx)
+        return _default_pool
+
+
+def _shared_arrays(shm, offset, nv, nf, faces_dtype):
+    """
+    Return the vertex and face arrays that are stored at the given offset in the given shared memory segment.
+    """
+    vertices_zyx = np.ndarray((nv, 3), np.float32, buffer=shm.buf, offset=offset)
+    faces = np.ndarray((nf, 3), faces_dtype, buffer=shm.buf, offset=offset + vertices_zyx.nbytes)
+    return vertices_zyx, faces
+
+
+def _simplify_shared(shm_name, layout, target_face_counts, kwargs):
+    """
+    Worker function for simplify_batch_in_subprocess().
+    Decimate the meshes in the given shared memory segment,
+    and overwrite the segment with the results.
+
+    Returns:
+        The new vertex and face counts for each mesh.
+    """
+    shm = _attach_shared_memory(shm_name)
+    try:
+        arrays = [_shared_arrays(shm, offset, nv, nf, faces_dtype) for (offset, nv, nf, faces_dtype) in layout]
+        results = simplify_batch(arrays, target_face_counts, **kwargs)
+        del arrays
+
+        new_counts = []
+        for (offset, nv, nf, _), (new_vertices, new_faces) in zip(layout, results):
+            assert len(new_vertices) <= nv and len(new_faces) <= nf
+            vertices_zyx, faces = _shared_arrays(shm, offset, nv, nf, np.int32)
+            vertices_zyx[:len(new_vertices)] = new_vertices
+            faces[:len(new_faces)] = new_faces
+            del vertices_zyx, faces
+            new_counts.append((len(new_vertices), len(new_faces)))
+        del results
+        return new_counts
+    finally:
+        shm.close()
+
+
+def _attach_shared_memory(name):
+    """
+    Attach to an existing shared memory segment, without registering it
+    with the resource tracker.  (The segment belongs to the parent process,
+    which is responsible for unlinking it.)
+    """
+    try:
+        return SharedMemory(name, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13, SharedMemory always registers the segment with the resource tracker,
+    # which would then unlink it (or complain about it) when the worker exits.
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return SharedMemory(name)
+    finally:
+        resource_tracker.register = register
@@ -0,0 +1,471 @@
+"""
+Laplacian mesh smoothing, and its shrink-resistant variants.
+
+Modes:
+
+- 'laplacian': Replace each vertex with the average of itself and its neighbors.
+- 'taubin': Alternate between a positive (shrinking) and negative (inflating) smoothing step,
+  which smooths the mesh without the overall shrinkage of plain Laplacian smoothing.
+  (Taubin, "A signal processing approach to fair surface design", SIGGRAPH 1995.)
+- 'cotangent': Weight each neighbor by the cotangent of the angles opposite the shared edge,
+  which (unlike uniform weights) doesn't drag vertices along the surface toward
+  densely-tessellated regions.  The weights are computed once per call, from the input geometry.
+
+The vertex adjacency is computed once (as a CSR structure: ``indptr``, ``indices``),
+and then applied in each iteration via one of several engines:
+
+- 'numba': A numba kernel that gathers each vertex's neighbors directly, run in parallel threads.
+- 'csr': A scipy sparse matrix that combines the adjacency and the averaging step into a single operator.
+- 'add.at': The original implementation, which scatters each edge's contribution via ``np.add.at()``.
+  Slow, but it has no dependencies beyond numpy.  Mostly useful as a reference.
+"""
+import numpy as np
+
+from .util import run_kernel_chunks
+
+try:
+    import numba
+    _numba_available = True
+except ImportError:
+    _numba_available = False
+
+try:
+    import scipy.sparse
+    _scipy_available = True
+except ImportError:
+    _scipy_available = False
+
+SMOOTHING_ENGINES = ('auto', 'numba', 'csr', 'add.at')
+
+
+SMOOTHING_MODES = ('laplacian', 'taubin', 'cotangent')
+
+# Taubin's "lambda" and "mu" factors
+DEFAULT_TAUBIN_STEPS = (0.5, -0.53)
+DEFAULT_COTANGENT_STEPS = (0.5,)
+
+
+def laplacian_smooth(vertices_zyx, faces, iterations=1, frozen_coords=None, engine='auto',
+                     mode='laplacian', step_sizes=None, edges=None):
+    """
+    Smooth the given mesh vertices via Laplacian smoothing,
+    i.e. repeatedly replace each vertex with the average of itself and its neighbors.
+
+    Args:
+        vertices_zyx:
+            Array (N,3), float32
+        faces:
+            Array (M,3), integer
+        iterations:
+            How many smoothing passes to apply.
+        frozen_coords:
+            Optional. Boolean array (N,) or (N,3), indicating which vertices
+            (or which individual vertex coordinates) must not be moved.
+        engine:
+            One of 'auto', 'numba', 'csr', 'add.at'.  (See module docs.)
+            By default, use numba if available, otherwise scipy.
+        mode:
+            One of 'laplacian', 'taubin', 'cotangent'.  (See module docs.)
+        step_sizes:
+            Only valid for the 'taubin' and 'cotangent' modes.
+            A sequence of step sizes to apply in each iteration, in turn.
+            Each step moves each vertex by the given fraction of the distance
+            to the (weighted) average of its neighbors.
+            For 'taubin', the default is (0.5, -0.53), i.e. each iteration consists of two passes.
+            For 'cotangent', the default is (0.5,).
+            (For cotangent smoothing without shrinkage, provide Taubin-style steps.)
+        edges:
+            Optional. The result of ``unique_edges(faces)``, if you've already got it.
+
+    Returns:
+        New vertex array (N,3). The input array is not modified.
+    """
+    engine = _resolve_engine(engine)
+    vertices_zyx = np.array(vertices_zyx, dtype=np.float32, order='C')
+    if iterations == 0 or len(vertices_zyx) == 0:
+        return vertices_zyx
+
+    if frozen_coords is not None:
+        frozen_coords = np.asarray(frozen_coords, dtype=bool)
+        if frozen_coords.ndim == 1:
+            frozen_coords = frozen_coords[:, None]
+        frozen_coords = np.ascontiguousarray(np.broadcast_to(frozen_coords, vertices_zyx.shape))
+        if not frozen_coords.any():
+            frozen_coords = None
+
+    assert mode in SMOOTHING_MODES, f"Invalid smoothing mode: {mode}"
+    if mode != 'laplacian':
+        if step_sizes is None:
+            step_sizes = DEFAULT_TAUBIN_STEPS if mode == 'taubin' else DEFAULT_COTANGENT_STEPS
+        return _smooth_weighted(vertices_zyx, faces, iterations, frozen_coords, engine, mode, step_sizes, edges)
+    assert step_sizes is None, "step_sizes can't be used with mode='laplacian'"
+
+    if engine == 'add.at':
+        return _smooth_add_at(vertices_zyx, faces, iterations, frozen_coords, edges)
+
+    indptr, indices = vertex_adjacency(faces, len(vertices_zyx), edges)
+
+    if engine == 'csr':
+        return _smooth_csr(vertices_zyx, indptr, indices, iterations, frozen_coords)
+
+    if frozen_coords is None:
+        frozen_coords = np.zeros((0,3), bool)
+
+    new_vertices_zyx = np.empty_like(vertices_zyx)
+    for _ in range(iterations):
+        _smooth_iteration_numba(vertices_zyx, indptr, indices, frozen_coords, new_vertices_zyx)
+        vertices_zyx, new_vertices_zyx = new_vertices_zyx, vertices_zyx
+    return vertices_zyx
+
+
+def _resolve_engine(engine):
+    assert engine in SMOOTHING_ENGINES, f"Invalid smoothing engine: {engine}"
+    if engine == 'auto':
+        if _numba_available:
+            return 'numba'
+        if _scipy_available:
+            return 'csr'
+        return 'add.at'
+
+    if engine == 'numba' and not _numba_available:
+        raise RuntimeError("Can't use the 'numba' smoothing engine: numba is not installed.")
+    if engine == 'csr' and not _scipy_available:
+        raise RuntimeError("Can't use the 'csr' smoothing engine: scipy is not installed.")
+    return engine
+
+
+def unique_edges(faces):
+    """
+    Return the list of all unique (undirected) edges in the given faces,
+    as an array (E,2), with the lower vertex ID in the first column.
+    """
+    starts = np.concatenate((faces[:, 0], faces[:, 1], faces[:, 2]))
+    stops = np.concatenate((faces[:, 1], faces[:, 2], faces[:, 0]))
+    edges = np.empty((len(starts), 2), faces.dtype)
+    np.minimum(starts, stops, out=edges[:, 0])
+    np.maximum(starts, stops, out=edges[:, 1])
+    del starts, stops
+
+    num_vertices = int(edges.max()) + 1 if len(edges) else 0
+    if num_vertices**2 >= 2**63:
+        # Drop duplicates via lexsort
+        edges = edges[np.lexsort(edges.T[::-1])]
+        non_dups = np.diff(edges, axis=0, prepend=(edges[:1] + 1)).any(axis=1)
+        return edges[non_dups]
+
+    # Sorting a single int64 key is much faster than lexsort
+    keys = edges[:, 0].astype(np.int64) * num_vertices + edges[:, 1]
+    del edges
+    keys.sort()
+    keys = keys[np.diff(keys, prepend=-1) != 0]
+    lo, hi = np.divmod(keys, num_vertices)
+    return np.stack((lo, hi), axis=1).astype(faces.dtype)
+
+
+def vertex_adjacency(faces, num_vertices, edges=None, return_edge_ids=False):
+    """
+    Compute the vertex adjacency of the given mesh faces in CSR form.
+
+    Args:
+        faces:
+            Array (M,3)
+        num_vertices:
+            The number of vertices in the mesh
+        edges:
+            Optional. The result of ``unique_edges(faces)``, if you've already got it.
+        return_edge_ids:
+            If True, also return the index (into ``edges``) of each CSR entry.
+
+    Returns:
+        (indptr, indices), such that the neighbors of vertex ``i`` are
+        given by ``indices[indptr[i]:indptr[i+1]]``.
+        If return_edge_ids is True, returns (indptr, indices, edge_ids).
+    """
+    if edges is None:
+        edges = unique_edges(faces)
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+
+    index_dtype = np.int32 if max(num_vertices, len(src)) < 2**31 else np.int64
+    order = np.argsort(src, kind='stable')
+    indices = dst[order].astype(index_dtype)
+
+    indptr = np.zeros(num_vertices+1, index_dtype)
+    np.cumsum(np.bincount(src, minlength=num_vertices), out=indptr[1:])
+
+    if return_edge_ids:
+        return indptr, indices, order % len(edges) if len(edges) else order
+    return indptr, indices
+
+
+def cotangent_weights(vertices_zyx, faces, edges):
+    """
+    Compute the cotangent weight for each of the given (unique) edges,
+    i.e. half the sum of the cotangents of the angles opposite each edge.
+    Negative weights (from obtuse angles) are clamped to 0.
+
+    Args:
+        vertices_zyx:
+            Array (N,3)
+        faces:
+            Array (M,3)
+        edges:
+            The result of ``unique_edges(faces)``.
+
+    Returns:
+        Array (E,), float32
+    """
+    N = len(vertices_zyx)
+    assert N**2 < 2**63, "Too many vertices for cotangent weights"
+    edge_keys = edges[:, 0].astype(np.int64) * N + edges[:, 1]
+
+    corners = [vertices_zyx[faces[:, i]] for i in range(3)]
+    weights = np.zeros(len(edges), np.float64)
+    for i, j, k in ((0, 1, 2), (1, 2, 0), (2, 0, 1)):
+        # Angle at corner k, opposite edge (i,j)
+        u = corners[i] - corners[k]
+        v = corners[j] - corners[k]
+        dots = (u * v).sum(axis=1)
+        cross_mags = np.linalg.norm(np.cross(u, v), axis=1)
+        del u, v
+
+        # Degenerate faces contribute nothing.
+        cotangents = np.zeros(len(faces), np.float64)
+        np.divide(dots, cross_mags, out=cotangents, where=(cross_mags > 0))
+
+        lo = np.minimum(faces[:, i], faces[:, j]).astype(np.int64)
+        hi = np.maximum(faces[:, i], faces[:, j]).astype(np.int64)
+        edge_ids = np.searchsorted(edge_keys, lo * N + hi)
+        weights += np.bincount(edge_ids, cotangents / 2, minlength=len(edges))
+
+    del corners
+    return np.maximum(weights, 0).astype(np.float32)
+
+
+def _smooth_weighted(vertices_zyx, faces, iterations, frozen_coords, engine, mode, step_sizes, edges=None):
+    """
+    Implementation of the 'taubin' and 'cotangent' smoothing modes.
+
+    Each step moves each vertex toward the weighted average of its neighbors:
+
+        v += step * (sum(w_j * v_j) / sum(w_j) - v)
+
+    (Vertices whose weights sum to zero aren't moved.)
+    """
+    step_sizes = np.asarray(step_sizes, np.float32).reshape(-1)
+
+    if edges is None:
+        edges = unique_edges(faces)
+    indptr, indices, edge_ids = vertex_adjacency(faces, len(vertices_zyx), edges, return_edge_ids=True)
+    if mode == 'cotangent':
+        weights = cotangent_weights(vertices_zyx, faces, edges)[edge_ids]
+    else:
+        weights = np.ones(len(indices), np.float32)
+    del edges, edge_ids
+
+    if engine == 'csr':
+        return _smooth_weighted_csr(vertices_zyx, indptr, indices, weights, iterations, frozen_coords, step_sizes)
+
+    if engine == 'add.at':
+        return _smooth_weighted_add_at(vertices_zyx, indptr, indices, weights, iterations, frozen_coords, step_sizes)
+
+    if frozen_coords is None:
+        frozen_coords = np.zeros((0,3), bool)
+
+    new_vertices_zyx = np.empty_like(vertices_zyx)
+    for _ in range(iterations):
+        for step in step_sizes:
+            _weighted_step_numba(vertices_zyx, indptr, indices, weights, step, frozen_coords, new_vertices_zyx)
+            vertices_zyx, new_vertices_zyx = new_vertices_zyx, vertices_zyx
+    return vertices_zyx
+
+
+def _smooth_weighted_csr(vertices_zyx, indptr, indices, weights, iterations, frozen_coords, step_sizes):
+    """
+    Weighted smoothing via sparse operators: M = (1-s) I + s D^-1 W
+    (One operator per distinct step size, constructed up-front.)
+    """
+    N = len(vertices_zyx)
+    rows = np.repeat(np.arange(N), np.diff(indptr))
+    row_sums = np.bincount(rows, weights, minlength=N)
+    del rows
+    movable = (row_sums > 0)
+    inv_sums = np.zeros(N, np.float32)
+    inv_sums[movable] = 1 / row_sums[movable]
+
+    normalized = weights * np.repeat(inv_sums, np.diff(indptr))
+    operators = {}
+    for step in np.unique(step_sizes):
+        w = scipy.sparse.csr_matrix((step * normalized, indices, indptr), shape=(N, N))
+        diag = scipy.sparse.diags((1 - step * movable).astype(np.float32), format='csr')
+        operators[step] = (w + diag).tocsr()
+    del normalized
+
+    if frozen_coords is not None:
+        frozen_values = vertices_zyx[frozen_coords]
+
+    for _ in range(iterations):
+        for step in step_sizes:
+            vertices_zyx = operators[step] @ vertices_zyx
+            if frozen_coords is not None:
+                vertices_zyx[frozen_coords] = frozen_values
+
+    return np.asarray(vertices_zyx, dtype=np.float32)
+
+
+def _smooth_weighted_add_at(vertices_zyx, indptr, indices, weights, iterations, frozen_coords, step_sizes):
+    """
+    Weighted smoothing via np.add.at() (slow, but requires only numpy).
+    """
+    rows = np.repeat(np.arange(len(vertices_zyx)), np.diff(indptr))
+    row_sums = np.bincount(rows, weights, minlength=len(vertices_zyx)).astype(np.float32)
+    movable = (row_sums > 0)
+
+    for _ in range(iterations):
+        for step in step_sizes:
+            averages = np.zeros_like(vertices_zyx)
+            np.add.at(averages, rows, weights[:, None] * vertices_zyx[indices])
+            averages[movable] /= row_sums[movable, None]
+
+            new_vertices_zyx = vertices_zyx.copy()
+            new_vertices_zyx[movable] += step * (averages[movable] - vertices_zyx[movable])
+            if frozen_coords is not None:
+                new_vertices_zyx[frozen_coords] = vertices_zyx[frozen_coords]
+            vertices_zyx = new_vertices_zyx
+
+    return vertices_zyx
+
+
+def _smooth_csr(vertices_zyx, indptr, indices, iterations, frozen_coords):
+    """
+    Smooth via a sparse operator M = D^-1 (A + I), where A is the adjacency
+    matrix and D is the diagonal matrix of neighbor counts (plus one).
+    """
+    N = len(vertices_zyx)
+    adjacency = scipy.sparse.csr_matrix((np.ones(len(indices), np.float32), indices, indptr), shape=(N, N))
+    operator = (adjacency + scipy.sparse.identity(N, np.float32, format='csr')).tocsr()
+    del adjacency
+
+    row_sizes = np.diff(operator.indptr)
+    operator.data /= np.repeat(row_sizes, row_sizes).astype(np.float32)
+
+    if frozen_coords is not None:
+        frozen_values = vertices_zyx[frozen_coords]
+
+    for _ in range(iterations):
+        vertices_zyx = operator @ vertices_zyx
+        if frozen_coords is not None:
+            vertices_zyx[frozen_coords] = frozen_values
+
+    return np.asarray(vertices_zyx, dtype=np.float32)
+
+
+def _smooth_add_at(vertices_zyx, faces, iterations, frozen_coords, edges=None):
+    """
+    The original (slow) implementation, via np.add.at().
+    """
+    if edges is None:
+        edges = unique_edges(faces)
+
+    # How many neighbors for each vertex == how many times it is mentioned in the edge list
+    neighbor_counts = np.bincount(edges.ravel(), minlength=len(vertices_zyx))
+
+    new_vertices_zyx = np.empty_like(vertices_zyx)
+    for _ in range(iterations):
+        new_vertices_zyx[:] = vertices_zyx
+
+        # For the complete edge index list, accumulate (sum) the vertexes on
+        # the right side of the list into the left side's address and vice-versa.
+        #
+        # (Plain fancy-indexing assignment doesn't work here because the
+        #  edge list contains repeats, but np.ufunc.at() is "unbuffered".)
+        np.add.at(new_vertices_zyx, edges[:, 0], vertices_zyx[edges[:, 1], :])
+        np.add.at(new_vertices_zyx, edges[:, 1], vertices_zyx[edges[:, 0], :])
+
+        # Here, '+1' because each point itself is included in the sum
+        new_vertices_zyx[:] /= (neighbor_counts[:, None] + 1)
+
+        if frozen_coords is not None:
+            new_vertices_zyx[frozen_coords] = vertices_zyx[frozen_coords]
+
+        # Swap (save RAM allocation overhead by reusing the new_vertices_zyx array between iterations)
+        vertices_zyx, new_vertices_zyx = new_vertices_zyx, vertices_zyx
+
+    return vertices_zyx
+
+
+if _numba_available:
+    def _smooth_iteration_numba(vertices_zyx, indptr, indices, frozen_coords, out):
+        """
+        One smoothing pass: Write the average of each vertex and its neighbors into ``out``.
+        If frozen_coords is non-empty, the frozen coordinates are copied unchanged.
+        """
+        args = (vertices_zyx, indptr, indices, frozen_coords, out)
+        run_kernel_chunks(_smooth_iteration_range, len(vertices_zyx), args)
+
+
+    def _weighted_step_numba(vertices_zyx, indptr, indices, weights, step, frozen_coords, out):
+        """
+        One weighted smoothing step:
+        Move each vertex toward the weighted average of its neighbors, writing the result into ``out``.
+        If frozen_coords is non-empty, the frozen coordinates are copied unchanged.
+        """
+        args = (vertices_zyx, indptr, indices, weights, step, frozen_coords, out)
+        run_kernel_chunks(_weighted_step_range, len(vertices_zyx), args)
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _smooth_iteration_range(vertices_zyx, indptr, indices, frozen_coords, out, start, stop):
+        has_frozen = (len(frozen_coords) > 0)
+        for i in range(start, stop):
+            neighbors_start = indptr[i]
+            neighbors_stop = indptr[i+1]
+            z = vertices_zyx[i, 0]
+            y = vertices_zyx[i, 1]
+            x = vertices_zyx[i, 2]
+            for j in range(neighbors_start, neighbors_stop):
+                n = indices[j]
+                z += vertices_zyx[n, 0]
+                y += vertices_zyx[n, 1]
+                x += vertices_zyx[n, 2]
+
+            count = np.float32(neighbors_stop - neighbors_start + 1)
+            out[i, 0] = z / count
+            out[i, 1] = y / count
+            out[i, 2] = x / count
+
+            if has_frozen:
+                for k in range(3):
+                    if frozen_coords[i, k]:
+                        out[i, k] = vertices_zyx[i, k]
+
+
+    @numba.jit(nopython=True, nogil=True, cache=True)
+    def _weighted_step_range(vertices_zyx, indptr, indices, weights, step, frozen_coords, out, start, stop):
+        has_frozen = (len(frozen_coords) > 0)
+        for i in range(start, stop):
+            total = np.float32(0)
+            z = np.float32(0)
+            y = np.float32(0)
+            x = np.float32(0)
+            for j in range(indptr[i], indptr[i+1]):
+                n = indices[j]
+                w = weights[j]
+                total += w
+                z += w * vertices_zyx[n, 0]
+                y += w * vertices_zyx[n, 1]
+                x += w * vertices_zyx[n, 2]
+
+            if total > 0:
+                out[i, 0] = vertices_zyx[i, 0] + step * (z / total - vertices_zyx[i, 0])
+                out[i, 1] = vertices_zyx[i, 1] + step * (y / total - vertices_zyx[i, 1])
+                out[i, 2] = vertices_zyx[i, 2] + step * (x / total - vertices_zyx[i, 2])
+            else:
+                out[i, 0] = vertices_zyx[i, 0]
+                out[i, 1] = vertices_zyx[i, 1]
+                out[i, 2] = vertices_zyx[i, 2]
+
+            if has_frozen:
+                for k in range(3):
+                    if frozen_coords[i, k]:
+                        out[i, k] = vertices_zyx[i, k]
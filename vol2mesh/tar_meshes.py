@@ -0,0 +1,132 @@
+"""
+A lazy, read-only ``{name : Mesh}`` mapping for the mesh files in a .tar file.
+
+Opening the tarfile only reads the member headers, to build an index of
+each member's data offset and size.  Listing the names is therefore cheap,
+and each mesh is read and decoded only when it is accessed.
+(Optionally, recently decoded meshes are kept in an LRU cache.)
+
+See ``Mesh.from_tarfile(..., lazy=True)``.
+"""
+import os
+import copy
+import tarfile
+import threading
+from io import BytesIO
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+class TarfileMeshes(Mapping):
+    """
+    Read-only mapping of ``{name : Mesh}`` for the mesh files in an uncompressed .tar file.
+
+    Example:
+
+        >>> meshes = Mesh.from_tarfile('1668443473.tar', concatenate=False, lazy=True)
+        >>> names = list(meshes.keys())   # no meshes are decoded
+        >>> mesh = meshes[names[0]]       # only this mesh is decoded
+    """
+
+    def __init__(self, path_or_bytes, decode, formats, cache_size=0):
+        """
+        Args:
+            path_or_bytes:
+                Either a path to a .tar file, or a bytes object
+                containing the contents of a .tar file.
+                The tarfile must not be compressed.
+            decode:
+                A function ``decode(buf, ext)`` that returns a decoded mesh,
+                e.g. ``Mesh.from_buffer``.
+            formats:
+                The file extensions to include (e.g. ``Mesh.MESH_FORMATS``).
+                Other members (and empty members) are not included in the mapping.
+            cache_size:
+                How many decoded meshes to keep in an LRU cache.
+                By default, no meshes are cached, so each access decodes the mesh anew.
+                Cached meshes are returned as shallow copies (via ``copy.copy()``),
+                so methods like ``simplify()`` or ``compress()`` don't alter the cached mesh.
+                But the copies share the cached arrays, so don't modify those in-place.
+        """
+        assert cache_size >= 0
+        if isinstance(path_or_bytes, (str, os.PathLike)):
+            self._path = os.fspath(path_or_bytes)
+            self._buffer = None
+            tar_stream = open(self._path, 'rb')
+        else:
+            self._path = None
+            self._buffer = memoryview(path_or_bytes)
+            tar_stream = BytesIO(self._buffer)
+
+        # Member data offsets are only meaningful if the tarfile is not compressed,
+        # so we explicitly open it in uncompressed mode.
+        try:
+            with tar_stream, tarfile.open(fileobj=tar_stream, mode='r:') as tf:
+                members = tf.getmembers()
+        except tarfile.ReadError as ex:
+            raise RuntimeError("Can't lazily read meshes from a compressed (or invalid) tarfile") from ex
+
+        # Sorted by name, for consistency with Mesh.from_tarfile()
+        self._index = {}
+        for member in sorted(members, key=lambda m: m.name):
+            ext = os.path.splitext(member.name)[1][1:]
+            if member.isfile() and ext in formats and member.size > 0:
+                self._index[member.name] = (member.offset_data, member.size, ext)
+
+        self._decode = decode
+        self._cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def __getitem__(self, name):
+        with self._cache_lock:
+            if name in self._cache:
+                self._cache.move_to_end(name)
+                return copy.copy(self._cache[name])
+
+        offset, size, ext = self._index[name]
+        mesh = self._decode(self.read_bytes(name), ext)
+
+        if self._cache_size > 0:
+            with self._cache_lock:
+                self._cache[name] = mesh
+                self._cache.move_to_end(name)
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            return copy.copy(mesh)
+        return mesh
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        source = self._path or f'<{len(self._buffer)} bytes>'
+        return f"TarfileMeshes({source!r}, {len(self)} meshes)"
+
+    def read_bytes(self, name):
+        """
+        Return the (undecoded) contents of the given member.
+        """
+        offset, size, _ext = self._index[name]
+        if self._buffer is not None:
+            return bytes(self._buffer[offset:offset+size])
+
+        with open(self._path, 'rb') as f:
+            f.seek(offset)
+            buf = f.read(size)
+        if len(buf) != size:
+            raise RuntimeError(f"Could not read {name} from {self._path}: the file is truncated.")
+        return buf
+
+    def clear_cache(self):
+        """
+        Discard all decoded meshes from the LRU cache.
+        """
+        with self._cache_lock:
+            self._cache.clear()
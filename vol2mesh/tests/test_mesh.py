@@ -1,5 +1,7 @@
+import os
 import pytest
 import copy
+import json
 from itertools import starmap
 import pickle
 import numpy as np
@@ -128,6 +130,228 @@ def test_blockwise(binary_vol_input):
 #         with open('/tmp/test-mesh-simplified.drc', 'wb') as f:
 #             f.write(mesh.serialize(fmt='drc'))
 
+def _face_coords(mesh):
+    """
+    Return the set of faces in the given mesh, each specified by its (sorted) vertex coordinates.
+    (Useful for comparing meshes whose vertices appear in different orders.)
+    """
+    corners = mesh.vertices_zyx[mesh.faces].tolist()
+    return sorted(tuple(sorted(map(tuple, face))) for face in corners)
+
+
+def test_blockwise_streaming(binary_vol_input):
+    binary_vol, data_box, nonzero_box = binary_vol_input
+    blocks = []
+    boxes = []
+    for z in range(0,100,20):
+        for y in range(0,100,20):
+            for x in range(0,100,20):
+                OVERLAP = 2
+                box = np.asarray([(z,y,x), (z+20, y+20, x+20)], dtype=int)
+                box[0] -= OVERLAP
+                box[1] += OVERLAP
+                box = np.maximum(box, 0)
+                box = np.minimum(box, data_box[1])
+
+                block = binary_vol[box_to_slicing(*box)]
+                if block.any():
+                    blocks.append(block)
+                    boxes.append( box )
+
+    global_mesh = Mesh.from_binary_blocks(blocks, boxes, stitch=True)
+    streamed_mesh = Mesh.from_binary_blocks(iter(blocks), boxes, stitch='streaming', workers=2)
+
+    assert (streamed_mesh.box == global_mesh.box).all()
+    assert streamed_mesh.normals_zyx.shape == streamed_mesh.vertices_zyx.shape
+    assert sorted(map(tuple, streamed_mesh.vertices_zyx.tolist())) == sorted(map(tuple, global_mesh.vertices_zyx.tolist()))
+    assert _face_coords(streamed_mesh) == _face_coords(global_mesh)
+
+    mesh_box = np.array([streamed_mesh.vertices_zyx.min(axis=0), streamed_mesh.vertices_zyx.max(axis=0)])
+    assert (mesh_box == nonzero_box).all(), f"{mesh_box.tolist()} != {nonzero_box.tolist()}"
+
+
+def test_streaming_stitch_cleanup():
+    """
+    Like the global stitch, the streaming stitch drops unreferenced vertices
+    and duplicate faces, even within a single block.
+    """
+    from vol2mesh.mesh import _stitch_block_meshes_streaming
+
+    boxes = np.array([[(0,0,0), (2,2,2)], [(1,0,0), (3,2,2)]])
+    vertices_a = np.array([[0,0,0], [1,0,0], [1,1,0], [0,1,1], [1,1,1]], np.float32)
+    faces_a = np.array([[0,1,2], [2,1,0], [1,2,4]], np.uint32)  # (vertex 3 is unused)
+    vertices_b = np.array([[1,0,0], [2,0,0], [1,1,0], [1,1,1]], np.float32)
+    faces_b = np.array([[0,1,2], [0,2,3], [3,2,0]], np.uint32)
+    meshes = [Mesh(vertices_a, faces_a, box=boxes[0]), Mesh(vertices_b, faces_b, box=boxes[1])]
+
+    expected = concatenate_meshes(copy.deepcopy(meshes))
+    expected.stitch_adjacent_faces()
+    streamed = _stitch_block_meshes_streaming(iter(meshes), boxes)
+
+    assert len(streamed.vertices_zyx) == len(expected.vertices_zyx) == 5
+    assert len(streamed.faces) == len(expected.faces) == 3
+    assert sorted(map(tuple, streamed.vertices_zyx.tolist())) == sorted(map(tuple, expected.vertices_zyx.tolist()))
+    assert _face_coords(streamed) == _face_coords(expected)
+
+
+def test_box_neighbors():
+    from vol2mesh.mesh import _box_neighbors
+
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 100, (200, 3))
+    boxes = np.stack((starts, starts + rng.integers(1, 20, (200, 3))), axis=1)
+    neighbors = _box_neighbors(boxes)
+    for i, box in enumerate(boxes):
+        touching = (boxes[:, 0] <= box[1]).all(axis=1) & (box[0] <= boxes[:, 1]).all(axis=1)
+        assert (neighbors[i] == touching.nonzero()[0]).all()
+
+
+def test_blockwise_seams(binary_vol_input):
+    binary_vol, data_box, nonzero_box = binary_vol_input
+    blocks = []
+    boxes = []
+    for z in range(0,100,20):
+        for y in range(0,100,20):
+            for x in range(0,100,20):
+                OVERLAP = 1
+                box = np.asarray([(z,y,x), (z+20, y+20, x+20)], dtype=int)
+                box[0] -= OVERLAP
+                box[1] += OVERLAP
+                box = np.maximum(box, 0)
+                box = np.minimum(box, data_box[1])
+
+                block = binary_vol[box_to_slicing(*box)]
+                if block.any():
+                    blocks.append(block)
+                    boxes.append( box )
+
+    global_mesh = Mesh.from_binary_blocks(blocks, boxes, stitch=True)
+    unstitched_mesh = Mesh.from_binary_blocks(blocks, boxes, stitch=False)
+    seams_mesh = Mesh.from_binary_blocks(blocks, boxes, stitch='seams')
+
+    assert len(seams_mesh.vertices_zyx) == len(global_mesh.vertices_zyx)
+    assert len(seams_mesh.faces) == len(global_mesh.faces)
+    assert sorted(map(tuple, seams_mesh.vertices_zyx.tolist())) == sorted(map(tuple, global_mesh.vertices_zyx.tolist()))
+    assert _face_coords(seams_mesh) == _face_coords(global_mesh)
+
+    # The surviving vertices retain their original relative order
+    unstitched_ids = {v: i for i, v in reversed(list(enumerate(map(tuple, unstitched_mesh.vertices_zyx.tolist()))))}
+    seam_order = [unstitched_ids[v] for v in map(tuple, seams_mesh.vertices_zyx.tolist())]
+    assert seam_order == sorted(seam_order)
+
+
+@pytest.fixture(scope='module')
+def label_vol_input():
+    """
+    A small label volume with a few adjacent objects (and one object that touches the volume edge).
+    """
+    label_vol = np.zeros((40,40,40), np.uint64)
+    label_vol[5:15, 5:15, 5:15] = 1
+    label_vol[15:25, 5:15, 5:15] = 2
+    label_vol[5:35, 20:30, 20:30] = 3
+    label_vol[0:10, 30:40, 30:40] = 12345678901
+    return label_vol
+
+
+@pytest.mark.skipif(not _skimage_available, reason="Skipping skimage-based tests")
+def test_from_label_volume_parallel(label_vol_input):
+    from concurrent.futures import ProcessPoolExecutor
+    label_vol = label_vol_input
+    box = [(0,0,0), (80,80,80)]
+    labels = [3, 12345678901, 1, 99, 2]
+
+    serial_meshes = Mesh.from_label_volume(label_vol, box, labels, method='skimage', progress=False)
+    assert list(serial_meshes.keys()) == labels
+    assert serial_meshes[99] is None
+
+    threaded_meshes = Mesh.from_label_volume(label_vol, box, labels, method='skimage', progress=False, workers=2)
+    with ProcessPoolExecutor(2) as executor:
+        process_meshes = Mesh.from_label_volume(label_vol, box, labels, method='skimage', progress=False, executor=executor)
+
+    for meshes in (threaded_meshes, process_meshes):
+        assert list(meshes.keys()) == labels
+        for label in labels:
+            if serial_meshes[label] is None:
+                assert meshes[label] is None
+                continue
+            assert (meshes[label].vertices_zyx == serial_meshes[label].vertices_zyx).all()
+            assert (meshes[label].faces == serial_meshes[label].faces).all()
+
+    # Label 3 spans z=5..35 in the downsampled volume, i.e. 10..70 at full-res.
+    v = serial_meshes[3].vertices_zyx
+    assert v[:, 0].min() == 10 and v[:, 0].max() == 70
+
+
+@pytest.mark.skipif(not _skimage_available, reason="Skipping skimage-based tests")
+def test_from_label_volume_multilabel(label_vol_input):
+    label_vol = label_vol_input
+    box = [(0,0,0), (80,80,80)]
+
+    skimage_meshes = Mesh.from_label_volume(label_vol, box, method='skimage', progress=False)
+    multilabel_meshes = Mesh.from_label_volume(label_vol, box, method='multilabel', workers=2)
+    assert list(multilabel_meshes.keys()) == list(skimage_meshes.keys()) == [1, 2, 3, 12345678901]
+
+    # For these simple shapes, marching cubes has no ambiguous cases,
+    # so the results should be identical (up to vertex/face order).
+    for label, mesh in multilabel_meshes.items():
+        expected = skimage_meshes[label]
+        assert sorted(map(tuple, mesh.vertices_zyx.tolist())) == sorted(map(tuple, expected.vertices_zyx.tolist()))
+        assert len(mesh.faces) == len(expected.faces)
+        assert mesh.normals_zyx.shape == mesh.vertices_zyx.shape
+
+    meshes = Mesh.from_label_volume(label_vol, box, [3, 99, 1], method='multilabel')
+    assert list(meshes.keys()) == [3, 99, 1]
+    assert meshes[99] is None
+
+
+def test_marching_cubes_labels_watertight():
+    """
+    Even for noisy label volumes with lots of ambiguous cubes,
+    every edge in every mesh should be shared by exactly two faces,
+    with opposite orientations.
+    """
+    from vol2mesh.label_mesh import marching_cubes_labels
+    label_vol = np.random.default_rng(0).integers(0, 4, (12,13,14)).astype(np.uint64)
+    label_vol = np.pad(label_vol, 1)
+
+    meshes = marching_cubes_labels(label_vol, slab_voxels=500)
+    assert sorted(meshes.keys()) == [1, 2, 3]
+    for vertices_zyx, faces in meshes.values():
+        assert faces.max() < len(vertices_zyx)
+        edges = np.concatenate((faces[:, (0,1)], faces[:, (1,2)], faces[:, (2,0)]))
+        _, directed_counts = np.unique(edges, axis=0, return_counts=True)
+        assert (directed_counts == 1).all()
+        edges.sort(axis=1)
+        _, undirected_counts = np.unique(edges, axis=0, return_counts=True)
+        assert (undirected_counts == 2).all()
+
+
+def test_label_boxes(label_vol_input):
+    from vol2mesh.util import compute_label_boxes, compute_nonzero_box
+    label_vol = label_vol_input
+    orig_vol = label_vol.copy()
+
+    # Use tiny slabs, to make sure boxes are combined across slabs correctly
+    box_labels, boxes = compute_label_boxes(label_vol, slab_voxels=3000)
+    assert (label_vol == orig_vol).all(), "Input volume should not be modified"
+    assert box_labels.tolist() == [1, 2, 3, 12345678901]
+    assert boxes.shape == (4, 2, 3)
+
+    for label, box in zip(box_labels, boxes):
+        assert (box == compute_nonzero_box(label_vol == label)).all()
+
+    box_labels, boxes = compute_label_boxes(label_vol, [12345678901, 2, 99])
+    assert box_labels.tolist() == [2, 12345678901]
+    assert boxes.tolist() == [[[15, 5, 5], [25, 15, 15]],
+                              [[0, 30, 30], [10, 40, 40]]]
+
+    # Empty volumes
+    for shape in [(0, 10, 10), (10, 0, 10), (10, 10, 0)]:
+        box_labels, boxes = compute_label_boxes(np.zeros(shape, np.uint64))
+        assert len(box_labels) == 0
+        assert boxes.shape == (0, 2, 3)
+
+
 def test_blockwise_simple():
     """
     Simple test case to manually explore the output
@@ -304,6 +528,464 @@ def test_smoothing_X(binary_vol_input):
     #mesh.serialize('/tmp/x-smoothed-simplified.obj')
 
 
+def _ball_mesh(radius=12, size=30):
+    ball = (np.indices((size,)*3) - size//2) ** 2
+    ball = (ball.sum(axis=0) < radius**2)
+    ball[:, :, :5] = 0
+    return Mesh.from_label_volume(ball.astype(np.uint64), [(0,0,0), (size,)*3], method='multilabel')[1]
+
+
+@pytest.mark.parametrize('mode', ['laplacian', 'taubin', 'cotangent'])
+@pytest.mark.parametrize('constraint_mode', [None, 'fixed', 'planar'])
+def test_smoothing_engines(constraint_mode, mode):
+    from vol2mesh.smoothing import _numba_available
+    mesh = _ball_mesh()
+
+    constrain_exterior = None
+    if constraint_mode:
+        constrain_exterior = [(0,0,5), (30,30,30)]
+
+    engines = ['add.at', 'csr']
+    if _numba_available:
+        engines.append('numba')
+
+    results = {}
+    for engine in engines:
+        m = copy.deepcopy(mesh)
+        m.laplacian_smooth(3, constrain_exterior, constraint_mode or 'fixed', engine=engine, mode=mode)
+        results[engine] = m.vertices_zyx
+
+    for engine in engines[1:]:
+        assert np.allclose(results[engine], results['add.at'], atol=1e-4), engine
+
+    if constraint_mode == 'fixed':
+        frozen = (mesh.vertices_zyx[:, 2] <= 5)
+        assert frozen.any()
+        assert (results['add.at'][frozen] == mesh.vertices_zyx[frozen]).all()
+
+
+def test_smoothing_shrinkage():
+    """
+    Taubin smoothing should shrink the mesh far less than plain Laplacian smoothing.
+    """
+    mesh = _ball_mesh()
+    center = mesh.vertices_zyx.mean(axis=0)
+    orig_radius = np.linalg.norm(mesh.vertices_zyx - center, axis=1).mean()
+
+    radii = {}
+    for mode in ('laplacian', 'taubin', 'cotangent'):
+        m = copy.deepcopy(mesh)
+        m.laplacian_smooth(10, mode=mode)
+        radii[mode] = np.linalg.norm(m.vertices_zyx - center, axis=1).mean()
+
+    assert radii['laplacian'] < radii['taubin'] < 1.02 * orig_radius
+    assert (orig_radius - radii['taubin']) < 0.25 * (orig_radius - radii['laplacian'])
+    assert radii['cotangent'] < orig_radius
+
+
+def test_cotangent_weights():
+    from vol2mesh.smoothing import cotangent_weights, unique_edges
+
+    # A unit square, split into two right triangles.
+    vertices = np.array([[0,0,0], [0,0,1], [0,1,0], [0,1,1]], np.float32)
+    faces = np.array([[0,1,2], [1,3,2]])
+    edges = unique_edges(faces)
+    weights = dict(zip(map(tuple, edges.tolist()), cotangent_weights(vertices, faces, edges)))
+
+    # The diagonal is opposite two right angles (cot = 0),
+    # and the other edges are each opposite one 45-degree angle (cot = 1).
+    assert np.isclose(weights[(1,2)], 0)
+    for e in [(0,1), (0,2), (1,3), (2,3)]:
+        assert np.isclose(weights[e], 0.5)
+
+
+def test_simplify_process_backend():
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    meshes = [_ball_mesh(r) for r in (8, 10, 12)]
+    expected = [copy.deepcopy(m) for m in meshes]
+    for m in expected:
+        m.simplify(0.2)
+
+    def simplify(mesh):
+        mesh.simplify(0.2, backend='process', executor=pool)
+        return mesh
+
+    with ProcessPoolExecutor(2) as pool, ThreadPoolExecutor(3) as threads:
+        results = list(threads.map(simplify, meshes))
+
+    for result, e in zip(results, expected):
+        assert (result.vertices_zyx == e.vertices_zyx).all()
+        assert (result.faces == e.faces).all()
+        assert result.normals_zyx.shape == result.vertices_zyx.shape
+
+
+@pytest.mark.parametrize('backend', ['local', 'process'])
+def test_simplify_meshes(backend):
+    from concurrent.futures import ProcessPoolExecutor
+    from vol2mesh import simplify_meshes
+
+    meshes = {r: _ball_mesh(r) for r in (5, 12, 8, 10)}
+    meshes['empty'] = Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32))
+    expected = {k: copy.deepcopy(m) for k, m in meshes.items()}
+    original_counts = {k: len(m.faces) for k, m in meshes.items()}
+    for m in expected.values():
+        m.simplify(0.2)
+
+    with ProcessPoolExecutor(2) as pool:
+        executor = pool if backend == 'process' else None
+        counts = simplify_meshes(meshes, 0.2, workers=2, executor=executor, backend=backend, batch_faces=3000)
+
+    assert counts.index.tolist() == list(meshes.keys())
+    for k, m in meshes.items():
+        assert counts.loc[k, 'faces_before'] == original_counts[k]
+        assert counts.loc[k, 'faces_after'] == len(m.faces)
+        assert (m.vertices_zyx == expected[k].vertices_zyx).all()
+        assert (m.faces == expected[k].faces).all()
+        assert (m.normals_zyx == expected[k].normals_zyx).all()
+
+    assert (counts['faces_after'] < counts['faces_before']).sum() == 4
+
+
+def test_build_lod_pyramid(tmpdir):
+    mesh = _ball_mesh(12)
+    orig_vertices = mesh.vertices_zyx.copy()
+    face_count = len(mesh.faces)
+
+    fractions = [1.0, 0.5, 0.25, 0.1]
+    path = f'{tmpdir}/mesh-{{lod}}.obj'
+    levels = mesh.build_lod_pyramid(fractions, path)
+
+    assert (mesh.vertices_zyx == orig_vertices).all()
+    assert len(levels) == len(fractions)
+    assert len(levels[0].faces) == face_count
+    assert all(not np.shares_memory(level.box, mesh.box) for level in levels)
+    for level, fraction in zip(levels[1:], fractions[1:]):
+        assert len(level.faces) <= int(fraction * face_count)
+        assert len(level.faces) >= 0.8 * int(fraction * face_count)
+        assert level.normals_zyx.shape == level.vertices_zyx.shape
+        assert (level.box == mesh.box).all()
+
+    for lod, level in enumerate(levels):
+        written = Mesh.from_file(f'{tmpdir}/mesh-{lod}.obj')
+        assert len(written.faces) == len(level.faces)
+
+
+def _surface_area(vertices, faces):
+    corners = vertices[faces]
+    return np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum() / 2
+
+
+def test_fragment_mesh():
+    from vol2mesh.precomputed import fragment_mesh
+
+    mesh = _ball_mesh(12)
+    vertices_xyz = mesh.vertices_zyx[:, ::-1]
+    origin = vertices_xyz.min(axis=0) - 0.5
+    fragments = fragment_mesh(vertices_xyz, mesh.faces, origin, [7.0, 7.0, 7.0], 16)
+    assert len(fragments) > 8
+
+    # Splitting faces along the grid planes must not change the surface
+    area = 0.0
+    for position, q, faces in fragments:
+        assert q.max() <= 2**16 - 1
+        v = origin + 7.0 * (position + q / (2**16 - 1))
+        area += _surface_area(v, faces)
+    assert np.isclose(area, _surface_area(vertices_xyz, mesh.faces), rtol=1e-3)
+
+
+def test_precomputed_multires(tmpdir):
+    DracoPy = pytest.importorskip('DracoPy')
+    from vol2mesh.precomputed import write_precomputed_multires, decode_manifest
+
+    mesh = _ball_mesh(12)
+    write_precomputed_multires(mesh, str(tmpdir), 123, lod_fractions=[1.0, 0.3, 0.1])
+
+    with open(f'{tmpdir}/info', 'r') as f:
+        assert json.load(f)['@type'] == 'neuroglancer_multilod_draco'
+
+    with open(f'{tmpdir}/123.index', 'rb') as f:
+        manifest = decode_manifest(f.read())
+    with open(f'{tmpdir}/123', 'rb') as f:
+        data = f.read()
+
+    positions = manifest['fragment_positions']
+    sizes = manifest['fragment_offsets']
+    assert len(positions) == 3
+    assert len(positions[2]) == 1
+    assert sum(s.sum() for s in sizes) == len(data)
+
+    # Every fragment's parent must be listed
+    for lod in (0, 1):
+        parents = {tuple(p) for p in positions[lod+1]}
+        assert all(tuple(p // 2) in parents for p in positions[lod])
+
+    # Reconstruct lod 0
+    qrange = 2**10 - 1
+    offset = 0
+    area = 0.0
+    for p, size in zip(positions[0], sizes[0]):
+        if size == 0:
+            continue
+        m = DracoPy.decode(data[offset:offset+size])
+        offset += size
+        v = manifest['grid_origin'] + manifest['chunk_shape'] * (p + np.asarray(m.points) / qrange)
+        area += _surface_area(v, np.asarray(m.faces))
+
+    assert np.isclose(area, _surface_area(mesh.vertices_zyx, mesh.faces), rtol=0.01)
+
+
+def test_from_file_mmap(tmpdir):
+    mesh = _ball_mesh(8)
+    path = f'{tmpdir}/ball.ngmesh'
+    mesh.serialize(path)
+    with open(path, 'rb') as f:
+        orig_bytes = f.read()
+
+    mapped = Mesh.from_file(path, mmap=True)
+    assert not mapped.vertices_zyx.flags['OWNDATA']
+    assert not mapped.faces.flags['OWNDATA']
+    assert (mapped.vertices_zyx == mesh.vertices_zyx).all()
+    assert (mapped.faces == mesh.faces).all()
+    assert (mapped.box == mesh.box).all()
+
+    # In-place modifications don't affect the file
+    mapped.vertices_zyx[:] += 1
+    mapped.faces[0] = 0
+    with open(path, 'rb') as f:
+        assert f.read() == orig_bytes
+
+    # Empty meshes are supported, too.
+    Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32)).serialize(path)
+    assert len(Mesh.from_file(path, mmap=True).vertices_zyx) == 0
+
+
+def test_concatenate_ngmesh_files(tmpdir):
+    from vol2mesh.ngmesh import concatenate_ngmesh_files
+
+    meshes = [_ball_mesh(r) for r in (5, 8, 6)]
+    paths = []
+    for i, mesh in enumerate(meshes):
+        paths.append(f'{tmpdir}/{i}.ngmesh')
+        mesh.serialize(paths[-1])
+
+    # Empty files are permitted
+    paths.insert(1, f'{tmpdir}/empty.ngmesh')
+    open(paths[1], 'wb').close()
+
+    expected = concatenate_meshes(meshes, keep_normals=False)
+
+    # Use a tiny chunk size to exercise the chunking logic
+    concatenate_ngmesh_files(paths, f'{tmpdir}/combined.ngmesh', chunk_bytes=1000)
+    combined = Mesh.from_file(f'{tmpdir}/combined.ngmesh')
+    assert (combined.vertices_zyx == expected.vertices_zyx).all()
+    assert (combined.faces == expected.faces).all()
+
+    concatenate_ngmesh_files(paths[:1] + paths[2:], f'{tmpdir}/combined-inmemory.ngmesh', streaming=False)
+    with open(f'{tmpdir}/combined.ngmesh', 'rb') as a, open(f'{tmpdir}/combined-inmemory.ngmesh', 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_read_obj_engines():
+    from vol2mesh.obj_utils import read_obj, _numba_available
+    if not _numba_available:
+        pytest.skip("numba is not available")
+
+    mesh = _ball_mesh(8)
+    mesh.recompute_normals()
+    obj = mesh.serialize(fmt='obj')
+
+    v1, f1, n1 = read_obj(obj, engine='pandas')
+    v2, f2, n2 = read_obj(obj, engine='numba')
+    assert (v1 == v2).all()
+    assert (f1 == f2).all()
+    assert (n1 == n2).all()
+
+    # Comments, texture coordinates, CRLF line endings,
+    # negative indices, and polygons (which are split into triangles)
+    obj = (b"# comment\r\n"
+           b"o thing\r\n"
+           b"v 1.5 -2 3e2\r\n"
+           b"v  0.25\t1e-3 -0.0\r\n"
+           b"vt 0.5 0.5\r\n"
+           b"v .5 +7 -12.5E-1\r\n"
+           b"v 0 0 0\r\n"
+           b"vn 0 0 1\r\n"
+           b"f 1/1/1 2/1/1 3/1/1\r\n"
+           b"f -1 -2 -3 1\r\n")
+    vertices, faces, normals = read_obj(obj, engine='numba')
+    assert (vertices == np.array([[1.5, -2, 300], [0.25, 1e-3, 0], [0.5, 7, -1.25], [0, 0, 0]], np.float32)).all()
+    assert (faces == [[0, 1, 2], [3, 2, 1], [3, 1, 0]]).all()
+    assert (normals == [[0, 0, 1]]).all()
+
+    with pytest.raises(RuntimeError):
+        read_obj(b"v 0 0 0\nf 1 2 3\n", engine='numba')
+
+    # Like pandas (i.e. float()), the numba engine accepts nan and inf
+    obj = b"v nan inf -inf\nv NaN -Infinity +INF\nv 0 0 1\nf 1 2 3\n"
+    v1, f1, _ = read_obj(obj, engine='pandas')
+    v2, f2, _ = read_obj(obj, engine='numba')
+    assert np.array_equal(v1, v2, equal_nan=True)
+    assert (f1 == f2).all()
+
+    # Malformed tokens are errors, not silently parsed as zeros
+    tail = b"v 1 2 3\nv 0 0 1\nf 1 2 3\n"
+    for bad_line in (b"v 1 2 x\n", b"v 1e 2 3\n", b"v . 2 3\n", b"v 1.5.2 2 3\n", b"vn 0 0 -\n", b"f 1 2 a\n"):
+        obj = b"v 0 0 0\n" + tail + bad_line
+        with pytest.raises(ValueError):
+            read_obj(obj, engine='pandas')
+        with pytest.raises(RuntimeError, match="line 5"):
+            read_obj(obj, engine='numba')
+
+    # A missing coordinate is an error, too (the pandas engine would return NaN)
+    with pytest.raises(RuntimeError, match="line 1"):
+        read_obj(b"v 1 2\n" + tail, engine='numba')
+
+
+def _write_obj_original(vertices_xyz, faces, normals_xyz):
+    """
+    The original (unchunked) implementation of obj_utils._write_obj(),
+    to verify that the chunked writer produces identical output.
+    """
+    from numpy.lib.stride_tricks import as_strided
+    if len(vertices_xyz) == 0:
+        return b""
+
+    obj = b"# OBJ file\n"
+    obj += ("v {:.7g} {:.7g} {:.7g}\n" * len(vertices_xyz)).format(*vertices_xyz.ravel()).encode('utf-8')
+    if len(normals_xyz) > 0:
+        obj += ("vn {:.7g} {:.7g} {:.7g}\n" * len(normals_xyz)).format(*normals_xyz.ravel()).encode('utf-8')
+
+    faces = faces + 1
+    if len(normals_xyz) > 0:
+        faces = as_strided(faces, faces.shape + (2,), faces.strides + (0,), writeable=False)
+        obj += ("f {}//{} {}//{} {}//{}\n" * len(faces)).format(*faces.flat).encode('utf-8')
+    else:
+        obj += ("f {} {} {}\n" * len(faces)).format(*faces.ravel()).encode('utf-8')
+    return obj
+
+
+def test_write_obj_chunks():
+    from io import BytesIO
+    from vol2mesh.obj_utils import write_obj, read_obj, _write_obj
+
+    mesh = _ball_mesh(8)
+    mesh.recompute_normals()
+    vertices_xyz, faces, normals_xyz = mesh.vertices_zyx[:, ::-1], mesh.faces, mesh.normals_zyx[:, ::-1]
+
+    # Awkward values, to exercise the number formatting
+    vertices_xyz = vertices_xyz * np.float32(1/3) - np.float32(1e-9)
+
+    for normals in (normals_xyz, np.zeros((0,3), np.float32)):
+        expected = write_obj(vertices_xyz, faces, normals)
+
+        # Identical to the original implementation's output
+        assert expected == _write_obj_original(vertices_xyz, faces, normals)
+
+        # A chunk size that doesn't evenly divide the element counts
+        stream = BytesIO()
+        _write_obj(vertices_xyz, faces, normals, stream, chunk_size=7)
+        assert stream.getvalue() == expected
+
+        v, f, n = read_obj(expected)
+        assert np.allclose(v, vertices_xyz)
+        assert (f == faces).all()
+        assert np.allclose(n, normals, atol=1e-6)
+
+    obj = write_obj(np.array([[0.1, 2, -3e-8]], np.float32), np.array([[0, 0, 0]], np.uint32), np.array([[0, 0, 1]], np.float32))
+    assert obj == b"# OBJ file\nv 0.1 2 -3e-08\nvn 0 0 1\nf 1//1 1//1 1//1\n"
+
+
+def _mesh_tarfile(meshes, fmt='obj'):
+    """
+    Return the bytes of a tarfile containing the given meshes,
+    stored in reverse name order, along with a corrupt mesh (with out-of-bounds
+    face indexes) and a non-mesh file.
+    """
+    import tarfile
+    from io import BytesIO
+
+    files = {f'{i:02d}.{fmt}': mesh.serialize(fmt=fmt) for i, mesh in enumerate(meshes)}
+    files[f'03-corrupt.{fmt}'] = b'v 0 0 0\nf 1 2 3\n'
+    files['README.txt'] = b'hello'
+
+    tar_stream = BytesIO()
+    with tarfile.open(fileobj=tar_stream, mode='w') as tf:
+        for name, buf in sorted(files.items(), reverse=True):
+            info = tarfile.TarInfo(name)
+            info.size = len(buf)
+            tf.addfile(info, BytesIO(buf))
+    return tar_stream.getvalue()
+
+
+def test_from_tarfile_workers():
+    meshes = [_ball_mesh(r) for r in (5, 8, 6, 7)]
+    tar_bytes = _mesh_tarfile(meshes)
+
+    serial = Mesh.from_tarfile(tar_bytes, concatenate=False)
+    assert list(serial.keys()) == ['00.obj', '01.obj', '02.obj', '03.obj']
+
+    parallel = Mesh.from_tarfile(tar_bytes, concatenate=False, workers=3)
+    assert list(parallel.keys()) == list(serial.keys())
+    for name in serial.keys():
+        assert (parallel[name].vertices_zyx == serial[name].vertices_zyx).all()
+        assert (parallel[name].faces == serial[name].faces).all()
+
+    combined_serial = Mesh.from_tarfile(tar_bytes)
+    combined_parallel = Mesh.from_tarfile(tar_bytes, workers=3)
+    assert (combined_parallel.vertices_zyx == combined_serial.vertices_zyx).all()
+    assert (combined_parallel.faces == combined_serial.faces).all()
+
+
+def test_from_tarfile_lazy(tmpdir):
+    from vol2mesh.tar_meshes import TarfileMeshes
+
+    meshes = [_ball_mesh(r) for r in (5, 8, 6, 7)]
+    tar_bytes = _mesh_tarfile(meshes)
+    eager = Mesh.from_tarfile(tar_bytes, concatenate=False)
+
+    tar_path = f'{tmpdir}/meshes.tar'
+    with open(tar_path, 'wb') as f:
+        f.write(tar_bytes)
+
+    for source in (tar_bytes, tar_path):
+        decoded = []
+        def decode(buf, ext):
+            decoded.append(buf)
+            return Mesh.from_buffer(buf, ext)
+
+        lazy = TarfileMeshes(source, decode, Mesh.MESH_FORMATS, cache_size=1)
+        assert list(lazy.keys()) == sorted([*eager.keys(), '03-corrupt.obj'])
+        assert '01.obj' in lazy and 'README.txt' not in lazy
+        assert len(decoded) == 0
+
+        mesh = lazy['01.obj']
+        assert (mesh.vertices_zyx == eager['01.obj'].vertices_zyx).all()
+        assert (mesh.faces == eager['01.obj'].faces).all()
+        assert len(decoded) == 1
+
+        # Cached meshes are returned as copies, which can be modified without affecting the cache
+        cached = lazy['01.obj']
+        assert cached is not mesh
+        assert cached.vertices_zyx is mesh.vertices_zyx
+        assert len(decoded) == 1
+        cached.faces = cached.faces[:10]
+        cached.compress('delta-lz4')
+        assert (lazy['01.obj'].faces == eager['01.obj'].faces).all()
+        assert len(decoded) == 1
+
+        # Evicted from the cache
+        lazy['02.obj']
+        lazy['01.obj']
+        assert len(decoded) == 3
+
+        with pytest.raises(RuntimeError):
+            lazy['03-corrupt.obj']
+
+    lazy = Mesh.from_tarfile(tar_path, concatenate=False, lazy=True)
+    assert (lazy['00.obj'].faces == eager['00.obj'].faces).all()
+
+
 def test_stitch():
     vertices = np.zeros( (10,3), np.float32 )
     vertices[:,0] = np.arange(10)
@@ -345,6 +1027,61 @@ def test_stitch():
     assert (mesh.vertices_zyx == reduced_vertices).all()
 
 
+def test_stitch_hash():
+    vertices = np.zeros( (10,3), np.float32 )
+    vertices[:,0] = np.arange(10)[::-1]
+    vertices[3] = vertices[2]
+    vertices[6] = vertices[4]
+    vertices[6, 1] = -0.0 # Must match +0.0
+
+    faces = [[0,1,2],
+             [3,4,5],
+             [6,7,8],
+             [7,8,4]] # duplicate face
+
+    expected = Mesh(vertices, faces)
+    expected.stitch_adjacent_faces()
+
+    mesh = Mesh(vertices, faces)
+    assert mesh.stitch_adjacent_faces(method='hash')
+
+    # Vertex order is preserved: [0,1,2,4,5,7,8]
+    assert (mesh.vertices_zyx == vertices[[0,1,2,4,5,7,8]]).all()
+    assert (mesh.faces == [[0,1,2], [2,3,4], [3,5,6]]).all()
+    assert _face_coords(mesh) == _face_coords(expected)
+
+    mesh = Mesh(vertices, faces)
+    mesh.stitch_adjacent_faces(method='hash', preserve_order=False)
+    assert (mesh.vertices_zyx == expected.vertices_zyx).all()
+    assert sorted(map(tuple, mesh.faces.tolist())) == sorted(map(tuple, expected.faces.tolist()))
+
+    # With a tolerance, nearby vertices are welded too.
+    jittered = vertices.copy()
+    jittered[3] += 0.01
+    mesh = Mesh(jittered, faces)
+    mesh.stitch_adjacent_faces(method='hash', tolerance=0.1)
+    assert (mesh.vertices_zyx == vertices[[0,1,2,4,5,7,8]]).all()
+    assert (mesh.faces == [[0,1,2], [2,3,4], [3,5,6]]).all()
+
+    mesh = Mesh(jittered, faces)
+    mesh.stitch_adjacent_faces(method='hash')
+    assert len(mesh.vertices_zyx) == 8
+
+
+def test_factorize_rows():
+    from vol2mesh.util import factorize_rows, _factorize_rows_numpy
+
+    a = np.random.RandomState(0).randint(0, 3, (1000, 3)).astype(np.float32)
+    codes, first_indexes = factorize_rows(a)
+    assert (a[first_indexes][codes] == a).all()
+    assert (np.diff(first_indexes) > 0).all()
+    assert len(first_indexes) == len(np.unique(a, axis=0))
+
+    codes_np, first_np = _factorize_rows_numpy(a)
+    assert (codes_np == codes).all()
+    assert (first_np == first_indexes).all()
+
+
 def test_pickling(binary_vol_input):
     binary_vol, _data_box, _nonzero_box = binary_vol_input
     mesh = Mesh.from_binary_vol( binary_vol )
@@ -395,6 +1132,242 @@ def test_normals_implementations(binary_vol_input):
     assert np.allclose(vertex_normals_numba, vertex_normals_numpy)
 
 
+def test_normals_parallel(monkeypatch):
+    """
+    Compare the parallel normals implementations to the numpy implementations.
+    """
+    from vol2mesh import util
+    from vol2mesh.normals import (_numba_available, compute_face_normals_numpy, compute_vertex_normals_numpy,
+                                  compute_vertex_normals_numba)
+    if not _numba_available:
+        pytest.skip("numba not installed")
+    from vol2mesh.normals import compute_face_normals_parallel, compute_vertex_normals_parallel
+
+    # Force the threaded code path, with several chunks
+    monkeypatch.setattr(util.os, 'cpu_count', lambda: 4)
+    monkeypatch.setattr(util, 'KERNEL_CHUNK_SIZE', 1000)
+
+    mesh = _ball_mesh()
+    vertices_zyx, faces = mesh.vertices_zyx, mesh.faces
+    assert len(faces) > 4000
+
+    for normalize in (True, False):
+        expected = compute_face_normals_numpy(vertices_zyx, faces, normalize)
+        assert np.allclose(compute_face_normals_parallel(vertices_zyx, faces, normalize), expected, atol=1e-6)
+
+    for weight_by_face_area in (True, False):
+        expected = compute_vertex_normals_numpy(vertices_zyx, faces, weight_by_face_area)
+        assert np.allclose(compute_vertex_normals_parallel(vertices_zyx, faces, weight_by_face_area), expected, atol=1e-5)
+        fused = compute_vertex_normals_parallel(vertices_zyx, faces, weight_by_face_area, fused=True)
+        assert np.allclose(fused, expected, atol=1e-5)
+
+        face_normals = compute_face_normals_numpy(vertices_zyx, faces, not weight_by_face_area)
+        gathered = compute_vertex_normals_parallel(vertices_zyx, faces, face_normals=face_normals)
+        assert np.allclose(gathered, expected, atol=1e-5)
+        assert np.allclose(gathered, compute_vertex_normals_numba(vertices_zyx, faces, face_normals=face_normals), atol=1e-5)
+
+
+def test_normals_numpy_bincount():
+    """
+    The bincount-based numpy vertex normals must match the np.add.at() implementation
+    and (if available) the numba implementations.
+    """
+    from vol2mesh.normals import (_numba_available, compute_face_normals_numpy, compute_vertex_normals_numpy,
+                                  compute_vertex_normals_numpy_add_at)
+
+    mesh = _ball_mesh()
+    vertices_zyx, faces = mesh.vertices_zyx, mesh.faces
+
+    # Include a vertex that isn't part of any face
+    vertices_zyx = np.concatenate((vertices_zyx, [[0, 0, 0]])).astype(np.float32)
+
+    for weight_by_face_area in (True, False):
+        vertex_normals = compute_vertex_normals_numpy(vertices_zyx, faces, weight_by_face_area)
+        assert vertex_normals.shape == vertices_zyx.shape
+        assert vertex_normals.dtype == np.float32
+        assert vertex_normals.flags['C_CONTIGUOUS']
+        assert (vertex_normals[-1] == 0).all()
+
+        expected = compute_vertex_normals_numpy_add_at(vertices_zyx, faces, weight_by_face_area)
+        assert np.allclose(vertex_normals, expected, atol=1e-5)
+
+        face_normals = compute_face_normals_numpy(vertices_zyx, faces, not weight_by_face_area)
+        assert np.allclose(compute_vertex_normals_numpy(vertices_zyx, faces, face_normals=face_normals), expected, atol=1e-5)
+
+        if _numba_available:
+            from vol2mesh.normals import compute_vertex_normals_numba, compute_vertex_normals_parallel
+            assert np.allclose(vertex_normals, compute_vertex_normals_numba(vertices_zyx, faces, weight_by_face_area), atol=1e-5)
+            assert np.allclose(vertex_normals, compute_vertex_normals_parallel(vertices_zyx, faces, weight_by_face_area), atol=1e-5)
+
+    # Empty mesh
+    empty = compute_vertex_normals_numpy(np.zeros((0, 3), np.float32), np.zeros((0, 3), np.uint32))
+    assert empty.shape == (0, 3)
+
+
+def test_derived_data_cache(monkeypatch):
+    """
+    Face normals, edges, and valence are cached until the vertices or faces change.
+    """
+    import vol2mesh.mesh
+    from vol2mesh.normals import compute_face_normals, compute_vertex_normals
+    from vol2mesh.smoothing import unique_edges
+
+    mesh = _ball_mesh()
+    face_normals = mesh.face_normals()
+    assert mesh.face_normals() is face_normals
+    assert not face_normals.flags['WRITEABLE']
+    assert np.allclose(face_normals, compute_face_normals(mesh.vertices_zyx, mesh.faces))
+
+    unit_normals = mesh.face_normals(normalize=True)
+    assert np.allclose(unit_normals, compute_face_normals(mesh.vertices_zyx, mesh.faces, normalize=True))
+
+    edges = mesh.unique_edges()
+    assert mesh.unique_edges() is edges
+    assert (edges == unique_edges(mesh.faces)).all()
+
+    valence = mesh.vertex_valence()
+    assert mesh.vertex_valence() is valence
+    assert len(valence) == len(mesh.vertices_zyx)
+    assert valence.sum() == 2 * len(edges)
+
+    # Moving the vertices invalidates the face normals, but not the topology
+    mesh.vertices_zyx = mesh.vertices_zyx * 2
+    assert mesh.face_normals() is not face_normals
+    assert np.allclose(mesh.face_normals(), 4 * face_normals)
+    assert mesh.unique_edges() is edges
+    assert mesh.vertex_valence() is valence
+
+    # Changing the faces invalidates everything
+    mesh.faces = mesh.faces[:len(mesh.faces) // 2]
+    assert mesh.unique_edges() is not edges
+    assert (mesh.unique_edges() == unique_edges(mesh.faces)).all()
+    assert len(mesh.face_normals()) == len(mesh.faces)
+
+    # In-place modifications must be followed by invalidate_caches()
+    face_normals = mesh.face_normals()
+    mesh.vertices_zyx[:] *= 2
+    assert mesh.face_normals() is face_normals
+    mesh.invalidate_caches()
+    assert np.allclose(mesh.face_normals(), 4 * face_normals)
+
+    # ...but recompute_normals() never uses stale face normals
+    mesh = _ball_mesh()
+    mesh.face_normals()
+    mesh.vertices_zyx[:] *= (8,1,1)
+    mesh.recompute_normals()
+    face_normals = compute_face_normals(mesh.vertices_zyx, mesh.faces)
+    assert np.allclose(mesh.face_normals(), face_normals)
+    assert np.allclose(mesh.normals_zyx, compute_vertex_normals(mesh.vertices_zyx, mesh.faces, face_normals=face_normals), atol=1e-6)
+
+    # Repeated smoothing doesn't recompute the edges
+    mesh = _ball_mesh()
+    edge_calls = []
+    def counted_unique_edges(faces):
+        edge_calls.append(len(faces))
+        return unique_edges(faces)
+    monkeypatch.setattr(vol2mesh.mesh, 'unique_edges', counted_unique_edges)
+
+    expected = copy.deepcopy(mesh)
+    expected.laplacian_smooth(2)
+    edge_calls.clear()
+    mesh.laplacian_smooth(1)
+    mesh.laplacian_smooth(1)
+    assert len(edge_calls) == 1
+    assert np.allclose(mesh.vertices_zyx, expected.vertices_zyx)
+    assert np.allclose(mesh.normals_zyx, expected.normals_zyx, atol=1e-5)
+    assert np.allclose(mesh.face_normals(), compute_face_normals(mesh.vertices_zyx, mesh.faces))
+
+    # Compression and pickling discard the cache
+    mesh.face_normals()
+    mesh.compress('lz4')
+    assert not mesh._cache
+    mesh.face_normals()
+    unpickled = pickle.loads(pickle.dumps(mesh))
+    assert not unpickled._cache
+    assert np.allclose(unpickled.face_normals(), mesh.face_normals())
+
+    mesh.destroy()
+    assert not mesh._cache
+
+
+def test_pipeline(monkeypatch, tmp_path):
+    """
+    A Pipeline produces the same result as the equivalent chain of Mesh methods,
+    but computes the vertex normals only once.
+    """
+    import vol2mesh.mesh
+    from vol2mesh import Pipeline
+    from vol2mesh.normals import compute_vertex_normals
+
+    expected = _ball_mesh()
+    expected.laplacian_smooth(2)
+    expected.simplify(0.5)
+    expected.recompute_normals()
+
+    normals_calls = []
+    def counted_vertex_normals(*args, **kwargs):
+        normals_calls.append(1)
+        return compute_vertex_normals(*args, **kwargs)
+    monkeypatch.setattr(vol2mesh.mesh, 'compute_vertex_normals', counted_vertex_normals)
+
+    # The 'normals' stage is deferred until after the geometry stages
+    pipeline = Pipeline(['normals', ('smooth', {'iterations': 2}), ('simplify', {'fraction': 0.5})], trace_memory=True)
+    assert [name for name, _ in pipeline.plan] == ['smooth', 'simplify', 'normals']
+
+    mesh = _ball_mesh()
+    normals_calls.clear()
+    mesh = pipeline(mesh)
+    assert len(normals_calls) == 1
+    assert (mesh.faces == expected.faces).all()
+    assert np.allclose(mesh.vertices_zyx, expected.vertices_zyx)
+    assert np.allclose(mesh.normals_zyx, expected.normals_zyx, atol=1e-5)
+
+    assert [s['stage'] for s in pipeline.stats] == ['smooth', 'simplify', 'normals']
+    assert all(s['peak_bytes'] is not None for s in pipeline.stats)
+    assert pipeline.stats[-1]['vertices'] == len(mesh.vertices_zyx)
+    assert 'simplify' in pipeline.report()
+
+    # Without a 'normals' stage, the result has no normals
+    mesh = _ball_mesh()
+    normals_calls.clear()
+    pipeline = Pipeline([('smooth', {'iterations': 2})], fmt='obj')
+    obj_bytes = pipeline(mesh)
+    assert not normals_calls
+    assert [s['stage'] for s in pipeline.stats] == ['smooth', 'serialize']
+    assert pipeline.stats[-1]['output_bytes'] == len(obj_bytes)
+    assert pipeline.stats[0]['peak_bytes'] is None
+    assert len(Mesh.from_buffer(obj_bytes, 'obj').normals_zyx) == 0
+
+    # Write to a file
+    path = str(tmp_path / 'mesh.ngmesh')
+    pipeline = Pipeline([('simplify', {'fraction': 0.5})])
+    mesh = pipeline(_ball_mesh(), path)
+    assert (Mesh.from_file(path).faces == mesh.faces).all()
+
+    # Degenerate faces left behind by decimation are dropped,
+    # even though the pipeline doesn't compute normals.
+    def keep_first_faces(vertices_zyx, faces, target_face_count, **kwargs):
+        return vertices_zyx, faces[:target_face_count]
+    monkeypatch.setattr(vol2mesh.mesh, 'simplify_arrays', keep_first_faces)
+
+    def _degenerate_mesh():
+        vertices = np.array([[0,0,0], [1,0,0], [2,0,0], [0,1,0], [0,0,1]], np.float32)
+        faces = np.array([[0,1,2], [0,1,3], [0,3,4], [0,4,1], [1,3,4], [0,1,4]], np.uint32)
+        return Mesh(vertices, faces)
+
+    expected = _degenerate_mesh()
+    expected.simplify(0.5)
+    mesh = Pipeline([('simplify', {'fraction': 0.5})])(_degenerate_mesh())
+    assert len(mesh.faces) == len(expected.faces) == 2
+    assert (mesh.faces == expected.faces).all()
+    assert len(mesh.normals_zyx) == 0
+
+    with pytest.raises(AssertionError):
+        Pipeline([('smooth', {'compute_normals': True})])
+    with pytest.raises(AssertionError):
+        Pipeline(['decimate'])
+
+
 def test_normals_guarantees(binary_vol_input):
     """
     Member functions have guarantees about whether normals are present or absent after the function runs.
@@ -491,6 +1464,69 @@ def test_compress(binary_vol_input):
     assert (mesh.vertices_zyx.shape == mesh_orig.vertices_zyx.shape)
     assert (mesh.normals_zyx.shape == mesh_orig.normals_zyx.shape)
     
+@pytest.mark.parametrize('method', ['delta-lz4', 'delta-zstd'])
+def test_compress_delta(method, monkeypatch):
+    from vol2mesh import compression
+    from vol2mesh.compression import canonicalize_faces
+    if method == 'delta-zstd' and not compression._zstd_available:
+        pytest.skip("zstandard not installed")
+
+    mesh_orig = _ball_mesh()
+    mesh_orig.laplacian_smooth(2)
+
+    lz4_mesh = copy.deepcopy(mesh_orig)
+    lz4_size = lz4_mesh.compress('lz4')
+
+    # Lossless, except for the face order
+    mesh = copy.deepcopy(mesh_orig)
+    size = mesh.compress(method)
+    assert size < lz4_size
+    assert mesh._array_counts() == (len(mesh_orig.vertices_zyx), len(mesh_orig.normals_zyx), len(mesh_orig.faces))
+    assert mesh._vertices_zyx is None
+    assert (mesh.vertices_zyx == mesh_orig.vertices_zyx).all()
+    assert (mesh.normals_zyx == mesh_orig.normals_zyx).all()
+    assert (mesh.faces == canonicalize_faces(mesh_orig.faces)).all()
+    assert mesh.vertices_zyx.dtype == np.float32 and mesh.faces.dtype == np.uint32
+
+    # Same result without numba
+    mesh.compress(method)
+    encoded = mesh._delta_bytes
+    monkeypatch.setattr(compression, '_numba_available', False)
+    assert copy.deepcopy(mesh_orig)._compress_as_delta(method[len('delta-'):], None) == len(encoded)
+    assert compression.encode_mesh_arrays(mesh_orig.vertices_zyx, mesh_orig.normals_zyx, mesh_orig.faces,
+                                          method[len('delta-'):]) == encoded
+
+    # Quantized
+    mesh = copy.deepcopy(mesh_orig)
+    quantized_size = mesh.compress(method, quantization_step=1/16)
+    assert quantized_size < size
+    assert np.abs(mesh.vertices_zyx - mesh_orig.vertices_zyx).max() <= 1/32 + 1e-4
+    assert np.abs(mesh.normals_zyx - mesh_orig.normals_zyx).max() <= 1e-4
+    assert (mesh.faces == canonicalize_faces(mesh_orig.faces)).all()
+
+    # Concatenation doesn't decompress the inputs in-place
+    mesh = copy.deepcopy(mesh_orig)
+    mesh.compress(method)
+    combined = concatenate_meshes([mesh])
+    assert mesh._vertices_zyx is None
+    assert (combined.vertices_zyx == mesh_orig.vertices_zyx).all()
+    assert (combined.faces == canonicalize_faces(mesh_orig.faces)).all()
+
+    # Pickling
+    mesh = Mesh(mesh_orig.vertices_zyx, mesh_orig.faces, mesh_orig.normals_zyx, pickle_compression_method=method)
+    unpickled = pickle.loads(pickle.dumps(mesh))
+    assert (unpickled.vertices_zyx == mesh_orig.vertices_zyx).all()
+    assert (unpickled.faces == canonicalize_faces(mesh_orig.faces)).all()
+
+    # Empty mesh
+    empty = Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32))
+    empty.compress(method)
+    assert empty.vertices_zyx.shape == empty.normals_zyx.shape == empty.faces.shape == (0,3)
+
+    with pytest.raises(AssertionError):
+        copy.deepcopy(mesh_orig).compress('lz4', quantization_step=1/16)
+
+
 @pytest.fixture(scope='module')
 def tiny_meshes():
     vertexes_1 = np.array([[0,0,0],
@@ -551,6 +1587,79 @@ def test_concatenate_with_normals(tiny_meshes):
 
     assert (combined_mesh.faces == expected_faces).all()
 
+def test_concatenate_compressed_and_streamed(tiny_meshes):
+    meshes = [copy.deepcopy(m) for m in tiny_meshes]
+    for mesh in meshes:
+        mesh.recompute_normals()
+    expected = concatenate_meshes(meshes)
+
+    # lz4-compressed inputs are not decompressed in-place
+    for mesh in meshes:
+        mesh.compress('lz4')
+    combined = concatenate_meshes(meshes)
+    assert all(mesh._vertices_zyx is None for mesh in meshes)
+    assert (combined.vertices_zyx == expected.vertices_zyx).all()
+    assert (combined.normals_zyx == expected.normals_zyx).all()
+    assert (combined.faces == expected.faces).all()
+    assert (combined.box == expected.box).all()
+
+    # Generators are consumed in a single pass
+    for keep_normals in (True, False):
+        combined = concatenate_meshes((m for m in meshes), keep_normals)
+        assert (combined.vertices_zyx == expected.vertices_zyx).all()
+        assert (combined.faces == expected.faces).all()
+        assert (combined.box == expected.box).all()
+        if keep_normals:
+            assert (combined.normals_zyx == expected.normals_zyx).all()
+        else:
+            assert len(combined.normals_zyx) == 0
+
+    meshes[1].drop_normals()
+    with pytest.raises(RuntimeError):
+        concatenate_meshes(iter(meshes))
+
+    empty = concatenate_meshes(iter([]))
+    assert len(empty.vertices_zyx) == len(empty.faces) == 0
+
+def test_concatenate_meshes_to_disk(tmpdir):
+    from vol2mesh import concatenate_meshes_to_disk
+
+    meshes = [_ball_mesh(r) for r in (5, 8, 6)]
+    meshes.insert(1, Mesh(np.zeros((0,3), np.float32), np.zeros((0,3), np.uint32)))
+    for mesh in meshes:
+        mesh.recompute_normals()
+    meshes[2].compress('lz4')
+    expected = concatenate_meshes(meshes)
+
+    combined = concatenate_meshes_to_disk(iter(meshes), f'{tmpdir}/combined.ngmesh')
+    assert isinstance(combined.vertices_zyx.base, np.memmap)
+    assert (combined.vertices_zyx == expected.vertices_zyx).all()
+    assert (combined.faces == expected.faces).all()
+    assert (combined.box == expected.box).all()
+    with open(f'{tmpdir}/combined.ngmesh', 'rb') as f:
+        assert f.read() == expected.serialize(fmt='ngmesh')
+
+    for keep_normals in (True, False):
+        assert concatenate_meshes_to_disk(iter(meshes), f'{tmpdir}/combined.obj', keep_normals) is None
+        with open(f'{tmpdir}/combined.obj', 'rb') as f:
+            assert f.read() == concatenate_meshes(meshes, keep_normals).serialize(fmt='obj')
+
+        combined = concatenate_meshes_to_disk(iter(meshes), f'{tmpdir}/combined-{keep_normals}', keep_normals)
+        assert (combined.vertices_zyx == expected.vertices_zyx).all()
+        assert (combined.faces == expected.faces).all()
+        assert (combined.box == expected.box).all()
+        if keep_normals:
+            assert (combined.normals_zyx == expected.normals_zyx).all()
+        else:
+            assert len(combined.normals_zyx) == 0
+        assert (np.load(f'{tmpdir}/combined-{keep_normals}/faces.npy') == expected.faces).all()
+
+    # Empty outputs
+    empty = concatenate_meshes_to_disk(iter([]), f'{tmpdir}/empty')
+    assert len(empty.vertices_zyx) == len(empty.faces) == 0
+    concatenate_meshes_to_disk(iter([]), f'{tmpdir}/empty.obj')
+    assert os.path.getsize(f'{tmpdir}/empty.obj') == 0
+
 def test_mismatches(tiny_meshes):
     mesh_1, mesh_2, mesh_3, _mesh_4 = tiny_meshes
     mesh_1.recompute_normals()
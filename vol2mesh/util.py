@@ -1,4 +1,10 @@
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from itertools import starmap
+
 import numpy as np
 
 
@@ -61,6 +67,184 @@ def _compute_nonzero_box_numpy(mask):
     return box
 
 
+def compute_label_boxes(vol, labels=None, slab_voxels=2**22):
+    """
+    Compute the bounding box of every label in a label volume,
+    in a single pass over the volume.
+
+    The volume is neither copied nor modified.  It is processed in slabs (along axis 0),
+    and within each slab, each row is first condensed into runs of identical labels,
+    so the only sorting involved is over the (relatively few) runs, not the voxels.
+    Arbitrary label values (e.g. large uint64 IDs) are supported.
+
+    Args:
+        vol:
+            Label volume (2D or 3D)
+        labels:
+            Optional.  If given, only compute the boxes for these labels.
+            Otherwise, compute the boxes for all non-zero labels.
+        slab_voxels:
+            Approximate number of voxels to process at a time.
+
+    Returns:
+        (box_labels, boxes), where box_labels is a sorted array of the labels
+        that were found in the volume (excluding 0), and boxes is an
+        array of shape (N, 2, vol.ndim), e.g. boxes[i] = [(z0, y0, x0), (z1, y1, x1)].
+    """
+    assert vol.ndim >= 2
+    if labels is not None:
+        labels = np.unique(np.asarray(labels, dtype=vol.dtype))
+
+    if vol.size == 0:
+        return np.zeros(0, vol.dtype), np.zeros((0, 2, vol.ndim), np.int32)
+
+    row_shape = vol.shape[1:]
+    slab_depth = max(1, slab_voxels // max(1, np.prod(row_shape)))
+
+    slab_tables = []
+    for start in range(0, vol.shape[0], slab_depth):
+        slab = vol[start:start+slab_depth]
+        slab_tables.append(_slab_label_boxes(slab, start, labels))
+
+    box_labels = np.concatenate([t[0] for t in slab_tables])
+    box_starts = np.concatenate([t[1] for t in slab_tables])
+    box_stops = np.concatenate([t[2] for t in slab_tables])
+    del slab_tables
+
+    box_labels, box_starts, box_stops = _reduce_label_boxes(box_labels, box_starts, box_stops)
+    boxes = np.stack((box_starts, box_stops), axis=1).astype(np.int32)
+    return box_labels, boxes
+
+
+def _slab_label_boxes(slab, offset, labels=None):
+    """
+    Helper for compute_label_boxes().
+    Compute the label boxes for a single slab, via run-length encoding of its rows.
+    """
+    X = slab.shape[-1]
+    flat = slab.reshape(-1)
+
+    # Runs of identical labels, never spanning more than one row.
+    run_flags = np.empty(len(flat), bool)
+    run_flags[0] = True
+    np.not_equal(flat[1:], flat[:-1], out=run_flags[1:])
+    run_flags[::X] = True
+    run_starts = np.flatnonzero(run_flags)
+    del run_flags
+
+    run_labels = flat[run_starts]
+    keep = (run_labels != 0)
+    if labels is not None:
+        keep &= np.isin(run_labels, labels)
+
+    run_stops = np.append(run_starts[1:], len(flat))
+    run_starts = run_starts[keep]
+    run_stops = run_stops[keep]
+    run_labels = run_labels[keep]
+
+    rows = np.transpose(np.unravel_index(run_starts // X, slab.shape[:-1]))
+    rows[:, 0] += offset
+    starts = np.concatenate((rows, (run_starts % X)[:, None]), axis=1)
+    stops = np.concatenate((rows + 1, ((run_stops - 1) % X + 1)[:, None]), axis=1)
+
+    return _reduce_label_boxes(run_labels, starts, stops)
+
+
+def _reduce_label_boxes(box_labels, box_starts, box_stops):
+    """
+    Helper for compute_label_boxes().
+    Given a list of (possibly repeated) labels and associated boxes,
+    combine the boxes for each label.
+    """
+    if len(box_labels) == 0:
+        ndim = box_starts.shape[1]
+        return box_labels, np.zeros((0, ndim), np.int64), np.zeros((0, ndim), np.int64)
+
+    order = np.argsort(box_labels, kind='stable')
+    box_labels = box_labels[order]
+    group_starts = np.flatnonzero(np.diff(box_labels, prepend=box_labels[:1]) != 0)
+    group_starts = np.insert(group_starts, 0, 0)
+
+    box_starts = np.minimum.reduceat(box_starts[order], group_starts, axis=0)
+    box_stops = np.maximum.reduceat(box_stops[order], group_starts, axis=0)
+    return box_labels[group_starts], box_starts, box_stops
+
+
+def factorize_rows(a):
+    """
+    Assign an integer code to each distinct row of the given 2D array,
+    in order of first appearance.
+
+    Equivalent to ``np.unique(a, axis=0, return_index=True, return_inverse=True)``,
+    except that the codes are assigned in order of first occurrence rather than
+    sorted order, and (if pandas is available) it runs in linear time, via hashing
+    rather than sorting.
+
+    Note:
+        Rows are compared via their exact bit patterns, so for floating point input,
+        -0.0 and 0.0 are considered distinct (add 0.0 to the input to normalize them).
+
+    Args:
+        a:
+            2D array
+
+    Returns:
+        (codes, first_indexes), where ``codes`` has one entry for each row of ``a``,
+        and ``first_indexes`` lists the index of the first occurrence of each distinct row.
+        Since the codes are assigned in order of first appearance, ``first_indexes`` is sorted.
+    """
+    a = np.asarray(a)
+    assert a.ndim == 2
+    if len(a) == 0:
+        return np.zeros(0, np.int64), np.zeros(0, np.int64)
+
+    try:
+        import pandas as pd
+    except ImportError:
+        return _factorize_rows_numpy(a)
+
+    # Combine the columns one at a time:
+    # Codes of the columns-so-far occupy the high bits of a uint64 key,
+    # and the next column (or its codes) occupy the low bits.
+    codes = _column_codes(a[:, 0], pd)
+    for col in a.T[1:]:
+        key = (codes.astype(np.uint64) << np.uint64(32)) | _column_codes(col, pd).astype(np.uint64)
+        codes = pd.factorize(key)[0]
+
+    # Since codes are assigned in order of first appearance,
+    # each new code appears exactly where the running maximum increases.
+    first_indexes = np.flatnonzero(np.diff(np.maximum.accumulate(codes), prepend=-1) > 0)
+    return codes.astype(np.int64), first_indexes
+
+
+def _column_codes(col, pd):
+    """
+    Helper for factorize_rows().
+    Return a uint32-compatible representation of the given column.
+    """
+    col = np.ascontiguousarray(col)
+    if col.dtype.itemsize == 4:
+        return col.view(np.uint32)
+    if col.dtype.itemsize < 4:
+        return col.view(f'u{col.dtype.itemsize}').astype(np.uint32)
+    return pd.factorize(col.view(f'u{col.dtype.itemsize}'))[0]
+
+
+def _factorize_rows_numpy(a):
+    """
+    Fallback implementation of factorize_rows() if pandas isn't available.
+    """
+    a = np.ascontiguousarray(a)
+    rows = a.view(np.dtype((np.void, a.dtype.itemsize * a.shape[1]))).ravel()
+    _, first_indexes, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    # Relabel the codes in order of first appearance
+    order = np.argsort(first_indexes)
+    ranks = np.empty_like(order)
+    ranks[order] = np.arange(len(order))
+    return ranks[inverse.reshape(-1)].astype(np.int64), first_indexes[order].astype(np.int64)
+
+
 def extract_subvol(array, box):
     """
     Extract a subarray according to the given box.
@@ -97,3 +281,111 @@ def has_nonzero_edges(vol):
         vol[-1, :, :].any()
     )
     return nz
+
+
+# How many elements each task processes in run_kernel_chunks()
+KERNEL_CHUNK_SIZE = 2**14
+
+
+def run_kernel_chunks(kernel, n, args, chunk_size=None):
+    """
+    Call ``kernel(*args, start, stop)`` for consecutive chunks of ``range(n)``,
+    in parallel, using a module-wide pool of ``os.cpu_count()`` threads.
+    By default, the chunks contain ``KERNEL_CHUNK_SIZE`` elements.
+
+    The kernel must release the GIL (e.g. a numba function compiled with ``nogil=True``),
+    and each chunk must write to a disjoint part of the output.
+
+    (We don't use numba's own ``parallel=True`` for this, because once numba's
+    threading layer has started, forking the process is unsafe, and this package
+    is often used with fork-based process pools.)
+    """
+    chunk_size = chunk_size or KERNEL_CHUNK_SIZE
+    pool = _kernel_thread_pool()
+    if pool is None or n <= chunk_size:
+        kernel(*args, 0, n)
+        return
+
+    futures = [pool.submit(kernel, *args, start, min(start + chunk_size, n))
+               for start in range(0, n, chunk_size)]
+    for f in futures:
+        f.result()
+
+
+_kernel_pool = None
+_kernel_pool_pid = None
+_kernel_pool_lock = threading.Lock()
+
+
+def _kernel_thread_pool():
+    """
+    Return the thread pool used by ``run_kernel_chunks()``, creating it if necessary,
+    or None if there's only one CPU.
+    A new pool is created after a fork, since the threads of the parent's pool don't exist in the child.
+    """
+    global _kernel_pool, _kernel_pool_pid
+    if (os.cpu_count() or 1) == 1:
+        return None
+
+    with _kernel_pool_lock:
+        if _kernel_pool is None or _kernel_pool_pid != os.getpid():
+            _kernel_pool = ThreadPoolExecutor(os.cpu_count(), thread_name_prefix='vol2mesh-kernel')
+            _kernel_pool_pid = os.getpid()
+        return _kernel_pool
+
+
+@contextmanager
+def executor_for(workers=None, executor=None):
+    """
+    Context manager.
+    Yield a ``concurrent.futures`` executor to use for parallel work, or None.
+
+    If an executor is given, it is yielded as-is (and not shut down afterwards).
+    Otherwise, if workers > 1, a ThreadPoolExecutor with that many threads is created
+    and shut down upon exit.  Otherwise, None is yielded, meaning "run serially".
+    """
+    if executor is not None:
+        yield executor
+    elif workers and workers > 1:
+        with ThreadPoolExecutor(workers) as executor:
+            yield executor
+    else:
+        yield None
+
+
+def imap_ordered(func, iterable, executor=None, max_pending=None):
+    """
+    Lazily apply ``func`` to each item in ``iterable`` and yield the results in input order.
+
+    If an executor is given, the items are processed in parallel,
+    but no more than ``max_pending`` items are submitted at once.
+    (Unlike ``Executor.map()``, the input is not consumed all at once,
+    so memory usage remains bounded even for large inputs.)
+
+    Args:
+        func:
+            A function of one argument.
+            (If using a process pool, it must be picklable.)
+        iterable:
+            The items to process.  Any iterable, including a generator.
+        executor:
+            A ``concurrent.futures`` executor, or None to process the items serially.
+        max_pending:
+            How many items may be submitted to the executor at once.
+            By default, twice the number of workers in the executor.
+    """
+    if executor is None:
+        yield from map(func, iterable)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * (getattr(executor, '_max_workers', None) or os.cpu_count() or 1)
+
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()